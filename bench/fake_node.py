@@ -0,0 +1,139 @@
+import json
+import random
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from logging import getLogger
+from threading import Lock, Thread
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from bench.synthetic import SyntheticChain
+
+LOG = getLogger(__name__)
+
+
+class FakeNode:
+    """
+    Local JSON-RPC server answering the geth methods the puller uses from a SyntheticChain.
+
+    Receipts are served by eth_getTransactionReceipt and, unless `block_receipts` is False, eth_getBlockReceipts.
+    Every request is delayed by `latency_sec` (+/- `jitter_sec`). A fraction `error_rate` of requests
+    fail, split between JSON-RPC errors, HTTP 503 and HTTP 429.
+    """
+
+    def __init__(
+        self,
+        chain: SyntheticChain,
+        head: int,
+        latency_sec: float = 0.0,
+        jitter_sec: float = 0.0,
+        error_rate: float = 0.0,
+        seed: int = 0,
+        port: int = 0,
+        block_receipts: bool = True,
+    ):
+        self._chain = chain
+        self._head = head
+        self._latency_sec = latency_sec
+        self._jitter_sec = jitter_sec
+        self._error_rate = error_rate
+        self._rand = random.Random(seed)
+        self._lock = Lock()
+        # like nodes without eth_getBlockReceipts when False
+        self._block_receipts = block_receipts
+
+        self.requests: int = 0
+        self.errors: int = 0
+
+        node = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                status, content = node.handle(json.loads(body))
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self._server.daemon_threads = True
+        self._thread: Optional[Thread] = None
+
+    @property
+    def port(self) -> int:
+        return self._server.server_address[1]
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def set_head(self, head: int) -> None:
+        self._head = head
+
+    def start(self) -> "FakeNode":
+        self._thread = Thread(target=self._server.serve_forever, name="fake-node", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def handle(self, request: Union[Dict[str, Any], List[Dict[str, Any]]]) -> Tuple[int, bytes]:
+        with self._lock:
+            self.requests += 1
+            delay = max(0.0, self._latency_sec + self._rand.uniform(-self._jitter_sec, self._jitter_sec))
+            failure = self._rand.random() < self._error_rate
+            failure_kind = self._rand.choice(["rpc", "503", "429"])
+
+        time.sleep(delay)
+
+        if failure:
+            with self._lock:
+                self.errors += 1
+            if failure_kind == "503":
+                return 503, b"Service Unavailable"
+            if failure_kind == "429":
+                return 429, b"Too Many Requests"
+
+        if isinstance(request, list):
+            return 200, json.dumps([self._response(r, failure) for r in request]).encode()
+        return 200, json.dumps(self._response(request, failure)).encode()
+
+    def _response(self, request: Dict[str, Any], failure: bool) -> Dict[str, Any]:
+        response: Dict[str, Any] = {"jsonrpc": "2.0", "id": request.get("id", 1)}
+        if failure:
+            response["error"] = {"code": -32000, "message": "injected failure"}
+            return response
+        try:
+            response["result"] = self._result(request["method"], request.get("params", []))
+        except KeyError as e:
+            response["error"] = {"code": -32601, "message": f"unsupported: {e}"}
+        return response
+
+    def _result(self, method: str, params: List[Any]) -> Any:
+        if method == "eth_blockNumber":
+            return hex(self._head)
+        if method == "eth_getTransactionReceipt":
+            with self._lock:
+                return self._chain.receipt(params[0])
+
+        num = int(params[0], 16)
+        if num > self._head:
+            return None
+        with self._lock:
+            if method == "eth_getBlockByNumber":
+                return self._chain.block(num)
+            if method == "eth_getUncleCountByBlockNumber":
+                return hex(len(self._chain.uncles(num)))
+            if method == "eth_getUncleByBlockNumberAndIndex":
+                uncles = self._chain.uncles(num)
+                index = int(params[1], 16)
+                return uncles[index] if index < len(uncles) else None
+            if method == "eth_getBlockReceipts" and self._block_receipts:
+                return self._chain.receipts(num)
+        raise KeyError(method)
@@ -0,0 +1,263 @@
+import json
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from argparse import ArgumentParser, Namespace
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Any, Callable, Dict, List
+
+from bench.fake_node import FakeNode
+from bench.synthetic import SyntheticChain
+
+LOG = logging.getLogger(__name__)
+
+START_BLOCK: int = 15_000_000
+
+
+class FixedPriceClient:
+    def __init__(self, price: Decimal = Decimal(3000)):
+        self._price = price
+
+    def get_price(self, symbol: str) -> Decimal:
+        return self._price
+
+
+def setup_logging() -> None:
+    root = logging.getLogger()
+    # the puller and processor log every block, keep them out of the timings
+    root.setLevel(logging.WARNING)
+
+    handler = logging.StreamHandler(sys.stderr)
+    formatter = logging.Formatter("%(asctime)s %(levelname)7s %(message)s [%(name)s:%(lineno)s]")
+    handler.setFormatter(formatter)
+    root.addHandler(handler)
+
+
+def make_chain(num_blocks: int, seed: int) -> SyntheticChain:
+    # end the chain two days ago so no processor report fires and every benchmark measures the same work
+    start = datetime.now() - timedelta(days=2) - timedelta(seconds=14 * num_blocks)
+    chain = SyntheticChain(start_number=START_BLOCK, start_timestamp=int(start.timestamp()), seed=seed)
+    chain.generate(num_blocks)
+    return chain
+
+
+def result(name: str, value: float, unit: str, **params: Any) -> Dict[str, Any]:
+    LOG.warning(f"{name}: {value:,.2f} {unit} {params if params else ''}")
+    return {"name": name, "value": value, "unit": unit, "params": params}
+
+
+def timed(fn: Callable[[], Any]) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def bench_pull(chain: SyntheticChain, latency_sec: float, error_rate: float) -> List[Dict[str, Any]]:
+    from eth.core.ethereum_client import EthereumClient
+    from eth.core.puller import BlockPuller
+
+    node = FakeNode(chain, head=chain.end_number, latency_sec=latency_sec, error_rate=error_rate).start()
+    try:
+        puller = BlockPuller(eth_client=EthereumClient(node.url))
+
+        def pull() -> None:
+            for num in range(chain.start_number, chain.end_number + 1):
+                puller.eth_getBlockByNumber(num, cached=False)
+
+        elapsed = timed(pull)
+    finally:
+        node.stop()
+
+    num_blocks = chain.end_number - chain.start_number + 1
+    params = {"latency_ms": latency_sec * 1000, "error_rate": error_rate, "blocks": num_blocks}
+    return [
+        result("pull_blocks_per_sec", num_blocks / elapsed, "blocks/s", **params),
+        result("pull_requests_per_block", node.requests / num_blocks, "requests/block", **params),
+    ]
+
+
+def evict_page_cache(dirpath: str) -> None:
+    for filename in os.listdir(dirpath):
+        fd = os.open(os.path.join(dirpath, filename), os.O_RDONLY)
+        try:
+            os.fsync(fd)
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        finally:
+            os.close(fd)
+
+
+def bench_read(chain: SyntheticChain) -> List[Dict[str, Any]]:
+    from eth.core.reader import read_block
+    from eth.utils.file_utils import block_filepath, blocks_dir
+
+    os.makedirs(blocks_dir(), exist_ok=True)
+    for num in range(chain.start_number, chain.end_number + 1):
+        if not os.path.exists(block_filepath(num)):
+            with open(block_filepath(num), "w") as f:
+                f.write(json.dumps(chain.detailed_block(num), indent=2))
+
+    def read_all() -> None:
+        for num in range(chain.start_number, chain.end_number + 1):
+            read_block(num)
+
+    num_blocks = chain.end_number - chain.start_number + 1
+    evict_page_cache(blocks_dir())
+    cold = timed(read_all)
+    warm = timed(read_all)
+    return [
+        result("read_cold_blocks_per_sec", num_blocks / cold, "blocks/s", blocks=num_blocks),
+        result("read_warm_blocks_per_sec", num_blocks / warm, "blocks/s", blocks=num_blocks),
+    ]
+
+
+def bench_process(chain: SyntheticChain) -> List[Dict[str, Any]]:
+    from eth.core.index import BlockIndex
+    from eth.core.processor import CATCH_UP_MARGIN, BlockProcessor
+    from eth.types.block import SummaryBlock
+
+    blocks = [SummaryBlock(chain.detailed_block(n)) for n in range(chain.start_number, chain.end_number + 1)]
+
+    results: List[Dict[str, Any]] = []
+    # the chain ends two days ago, so the default processor catches up and the live one checks every block
+    for name, catch_up_margin in [("process", CATCH_UP_MARGIN), ("process_live", None)]:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            processor = BlockProcessor(
+                coinbase_client=FixedPriceClient(),
+                index=BlockIndex(os.path.join(tmpdir, "blocks.idx")),
+                catch_up_margin=catch_up_margin,
+            )
+
+            def process_all() -> None:
+                for block in blocks:
+                    processor.process(block)
+
+            elapsed = timed(process_all)
+            results.append(result(f"{name}_blocks_per_sec", len(blocks) / elapsed, "blocks/s", blocks=len(blocks)))
+    return results
+
+
+def bench_archive(chain: SyntheticChain) -> List[Dict[str, Any]]:
+    import zlib
+
+    from eth.core.archive import train_dict
+
+    results: List[Dict[str, Any]] = []
+    nums = range(chain.start_number, chain.end_number + 1)
+    # the node's compact JSON as cached by the puller, and the indented JSON of older caches
+    for layout, separators, indent in [("compact", (",", ":"), None), ("indented", None, 2)]:
+        samples = [json.dumps(chain.detailed_block(n), separators=separators, indent=indent).encode() for n in nums]
+        zdict = train_dict(samples[::10])
+        if len(zdict) == 0:
+            raise ValueError(f"Empty dictionary trained from {layout} blocks")
+
+        def compressed_size(dictionary: bytes) -> int:
+            size = 0
+            for sample in samples:
+                compressor = zlib.compressobj(9, zdict=dictionary) if len(dictionary) > 0 else zlib.compressobj(9)
+                size += len(compressor.compress(sample) + compressor.flush())
+            return size
+
+        raw_size = sum(len(sample) for sample in samples)
+        results.append(result(f"archive_{layout}_dict_bytes", len(zdict), "bytes", blocks=len(samples)))
+        results.append(result(f"archive_{layout}_ratio", raw_size / compressed_size(zdict), "x", blocks=len(samples)))
+        results.append(result(f"archive_{layout}_ratio_no_dict", raw_size / compressed_size(b""), "x"))
+    return results
+
+
+def bench_render(chain: SyntheticChain, repeat: int) -> List[Dict[str, Any]]:
+    from eth.core.image_drawer import make_svg
+    from eth.core.processor import BlockProcessor
+    from eth.core.writer import write_tweet_aggregate
+    from eth.types.block import SummaryBlock
+
+    processor = BlockProcessor(coinbase_client=FixedPriceClient())
+    for n in range(chain.start_number, chain.end_number + 1):
+        processor.process(SummaryBlock(chain.detailed_block(n)))
+    metrics = processor.aggregate(hour_dt=processor.last_block.hour_dt - timedelta(hours=1))
+    price = Decimal(3000)
+
+    results = [
+        result("aggregate_hour_ms", 1000 * timed(lambda: processor.aggregate(hour_dt=metrics.hour)), "ms"),
+        result(
+            "write_tweet_ms",
+            1000 * timed(lambda: [write_tweet_aggregate(metrics, price) for _ in range(repeat)]) / repeat,
+            "ms",
+        ),
+        result("make_svg_ms", 1000 * timed(lambda: [make_svg(metrics, price) for _ in range(repeat)]) / repeat, "ms"),
+    ]
+
+    try:
+        import cairosvg
+    except ImportError:
+        LOG.warning("cairosvg not installed, skipping PNG render benchmark")
+        return results
+
+    svg = make_svg(metrics, price)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        png_filepath = os.path.join(tmpdir, "report.png")
+        elapsed = timed(
+            lambda: [cairosvg.svg2png(bytestring=svg.encode(), write_to=png_filepath) for _ in range(repeat)]
+        )
+    results.append(result("render_png_ms", 1000 * elapsed / repeat, "ms"))
+    return results
+
+
+def git_rev() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def parse_args() -> Namespace:
+    parser = ArgumentParser(
+        description="Benchmark the puller, reader, processor, archiver and renderer on synthetic blocks"
+    )
+    parser.add_argument("--blocks", type=int, default=2000, help="Synthetic blocks per benchmark")
+    parser.add_argument("--pull-blocks", type=int, default=300, help="Blocks pulled from the fake node")
+    parser.add_argument("--latency-ms", type=float, default=5, help="Fake node latency per request")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of fake node requests that fail")
+    parser.add_argument("--render-repeat", type=int, default=10, help="Renders per report benchmark")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=str, default=None, help="Write JSON results here instead of stdout")
+    return parser.parse_args()
+
+
+def main():
+    setup_logging()
+    args: Namespace = parse_args()
+
+    results: List[Dict[str, Any]] = []
+    with tempfile.TemporaryDirectory() as tmpdir:
+        # point the cache at a scratch directory, resolved on each call by eth.utils.file_utils
+        os.environ["ETHBURNBOT_DATA_DIR"] = tmpdir
+
+        pull_chain = make_chain(args.pull_blocks, args.seed)
+        results += bench_pull(pull_chain, latency_sec=args.latency_ms / 1000, error_rate=args.error_rate)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        os.environ["ETHBURNBOT_DATA_DIR"] = tmpdir
+
+        chain = make_chain(args.blocks, args.seed)
+        results += bench_read(chain)
+        results += bench_process(chain)
+        results += bench_archive(chain)
+        results += bench_render(chain, repeat=args.render_repeat)
+
+    output = json.dumps(
+        {"time": datetime.now().isoformat(), "git_rev": git_rev(), "results": results},
+        indent=2,
+    )
+    if args.output is None:
+        print(output)
+    else:
+        with open(args.output, "w") as f:
+            f.write(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+import random
+from typing import Any, Dict, List, Optional
+
+EMPTY_UNCLES_HASH = "0x1dcc4de8dec75d7aab85b567b6ccd41ad312451b948a7413f0a142fd40d49347"
+EMPTY_LOGS_BLOOM = "0x" + "0" * 512
+
+BLOCK_REWARD: int = 2 * 10**18
+GAS_LIMIT: int = 30_000_000
+ELASTICITY: int = 2
+BASE_FEE_CHANGE_DENOMINATOR: int = 8
+
+
+class SyntheticChain:
+    """
+    Deterministic generator of geth-shaped block and uncle JSON.
+
+    Base fee follows the EIP-1559 update rule, block times average ~13s,
+    ~1% of blocks are empty and ~5% include uncles (rarely two).
+    """
+
+    def __init__(
+        self,
+        start_number: int,
+        start_timestamp: int,
+        seed: int = 0,
+        uncle_rate: float = 0.05,
+        empty_rate: float = 0.01,
+        base_fee: int = 30_000_000_000,
+    ):
+        self._start_number = start_number
+        self._start_timestamp = start_timestamp
+        self._seed = seed
+        self._uncle_rate = uncle_rate
+        self._empty_rate = empty_rate
+        self._start_base_fee = base_fee
+
+        self._blocks: Dict[int, Dict[str, Any]] = {}
+        self._uncles: Dict[int, List[Dict[str, Any]]] = {}
+        self._tx_blocks: Dict[str, int] = {}
+
+    @property
+    def start_number(self) -> int:
+        return self._start_number
+
+    @property
+    def end_number(self) -> int:
+        return self._start_number + len(self._blocks) - 1
+
+    def generate(self, count: int) -> None:
+        rand = random.Random(self._seed + len(self._blocks))
+        for _ in range(count):
+            self._append(rand)
+
+    def block(self, num: int) -> Dict[str, Any]:
+        while num > self.end_number:
+            self.generate(1)
+        return self._blocks[num]
+
+    def uncles(self, num: int) -> List[Dict[str, Any]]:
+        self.block(num)
+        return self._uncles[num]
+
+    def detailed_block(self, num: int) -> Dict[str, Any]:
+        """
+        Block JSON as written to the cache by the puller, with the uncle annotations.
+        """
+        uncles = self.uncles(num)
+        # 2 ETH block reward since Constantinople, uncles earn (8 - depth) / 8 of it
+        uncle_reward = sum((int(u["number"], 16) + 8 - num) * BLOCK_REWARD // 8 for u in uncles)
+        return {
+            **self.block(num),
+            "__uncle_count": str(len(uncles)),
+            "__uncle_reward": str(uncle_reward),
+        }
+
+    def receipts(self, num: int) -> List[Dict[str, Any]]:
+        """
+        Receipts of the block's transactions, splitting its gas used and tipping 0-3 gwei above the BASEFEE.
+        """
+        block = self.block(num)
+        tx_hashes: List[str] = block["transactions"]
+        rand = random.Random(self._seed * 1_000_003 + num)
+        base_fee = int(block["baseFeePerGas"], 16)
+        gas_used = int(block["gasUsed"], 16)
+        receipts: List[Dict[str, Any]] = []
+        for i, tx_hash in enumerate(tx_hashes):
+            tx_gas = gas_used // len(tx_hashes) + (gas_used % len(tx_hashes) if i == 0 else 0)
+            receipts.append(
+                {
+                    "blockNumber": hex(num),
+                    "transactionHash": tx_hash,
+                    "transactionIndex": hex(i),
+                    "gasUsed": hex(tx_gas),
+                    "effectiveGasPrice": hex(base_fee + rand.randint(0, 3 * 10**9)),
+                    "status": "0x1",
+                }
+            )
+        return receipts
+
+    def receipt(self, tx_hash: str) -> Optional[Dict[str, Any]]:
+        num = self._tx_blocks.get(tx_hash)
+        if num is None:
+            return None
+        return next(r for r in self.receipts(num) if r["transactionHash"] == tx_hash)
+
+    def _append(self, rand: random.Random) -> None:
+        num = self._start_number + len(self._blocks)
+        parent = self._blocks.get(num - 1)
+
+        if parent is None:
+            base_fee = self._start_base_fee
+            timestamp = self._start_timestamp
+            parent_hash = _hash(rand)
+        else:
+            base_fee = _next_base_fee(int(parent["baseFeePerGas"], 16), int(parent["gasUsed"], 16))
+            timestamp = int(parent["timestamp"], 16) + rand.choice([12, 12, 12, 13, 13, 14, 15, 20, 30])
+            parent_hash = parent["hash"]
+
+        empty = rand.random() < self._empty_rate
+        gas_used = 0 if empty else min(GAS_LIMIT, int(rand.gauss(GAS_LIMIT / ELASTICITY, GAS_LIMIT / 5)))
+        gas_used = max(0, gas_used)
+        num_txs = 0 if empty else max(1, gas_used // 80_000)
+
+        uncles: List[Dict[str, Any]] = []
+        if rand.random() < self._uncle_rate:
+            num_uncles = 2 if rand.random() < 0.05 else 1
+            uncles = [self._uncle(rand, num) for _ in range(num_uncles)]
+
+        self._blocks[num] = {
+            "baseFeePerGas": hex(base_fee),
+            "difficulty": hex(rand.randint(10**15, 10**16)),
+            "extraData": "0x" + rand.randbytes(16).hex(),
+            "gasLimit": hex(GAS_LIMIT),
+            "gasUsed": hex(gas_used),
+            "hash": _hash(rand),
+            "logsBloom": EMPTY_LOGS_BLOOM if empty else "0x" + rand.randbytes(256).hex(),
+            "miner": "0x" + rand.randbytes(20).hex(),
+            "mixHash": _hash(rand),
+            "nonce": "0x" + rand.randbytes(8).hex(),
+            "number": hex(num),
+            "parentHash": parent_hash,
+            "receiptsRoot": _hash(rand),
+            "sha3Uncles": EMPTY_UNCLES_HASH if len(uncles) == 0 else _hash(rand),
+            "size": hex(600 + num_txs * 150),
+            "stateRoot": _hash(rand),
+            "timestamp": hex(timestamp),
+            "totalDifficulty": hex(num * 10**16),
+            "transactions": [_hash(rand) for _ in range(num_txs)],
+            "transactionsRoot": _hash(rand),
+            "uncles": [u["hash"] for u in uncles],
+        }
+        self._uncles[num] = uncles
+        for tx_hash in self._blocks[num]["transactions"]:
+            self._tx_blocks[tx_hash] = num
+
+    def _uncle(self, rand: random.Random, mined_num: int) -> Dict[str, Any]:
+        # most uncles are one or two blocks behind the block including them
+        num = mined_num - rand.choice([1, 1, 1, 2, 2, 3, 6])
+        return {
+            "baseFeePerGas": hex(self._start_base_fee),
+            "difficulty": hex(rand.randint(10**15, 10**16)),
+            "extraData": "0x" + rand.randbytes(16).hex(),
+            "gasLimit": hex(GAS_LIMIT),
+            "gasUsed": hex(rand.randint(0, GAS_LIMIT)),
+            "hash": _hash(rand),
+            "logsBloom": "0x" + rand.randbytes(256).hex(),
+            "miner": "0x" + rand.randbytes(20).hex(),
+            "mixHash": _hash(rand),
+            "nonce": "0x" + rand.randbytes(8).hex(),
+            "number": hex(num),
+            "parentHash": _hash(rand),
+            "receiptsRoot": _hash(rand),
+            "sha3Uncles": EMPTY_UNCLES_HASH,
+            "size": hex(540),
+            "stateRoot": _hash(rand),
+            "timestamp": hex(self._start_timestamp + (num - self._start_number) * 13),
+            "transactionsRoot": _hash(rand),
+            "uncles": [],
+        }
+
+
+def _hash(rand: random.Random) -> str:
+    return "0x" + rand.randbytes(32).hex()
+
+
+def _next_base_fee(base_fee: int, gas_used: int) -> int:
+    target = GAS_LIMIT // ELASTICITY
+    if gas_used == target:
+        return base_fee
+    delta = base_fee * abs(gas_used - target) // target // BASE_FEE_CHANGE_DENOMINATOR
+    if gas_used > target:
+        return base_fee + max(1, delta)
+    return max(7, base_fee - delta)
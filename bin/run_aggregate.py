@@ -0,0 +1,94 @@
+import json
+import logging
+import os
+import sys
+from argparse import ArgumentParser, Namespace
+from dataclasses import asdict
+from decimal import Decimal
+from typing import List, Optional, TextIO
+
+from eth.core.aggregate import aggregate_range
+from eth.core.block_writer import read_durable_block
+from eth.core.checkpoints import BURNED_ETH
+from eth.types.block import AggregateBlockMetrics, DayAggregateBlockMetrics, HourlyAggregateBlockMetrics
+from potpourri.python.ethereum.constants import LONDON
+
+LOG = logging.getLogger(__name__)
+
+
+def setup_logging() -> None:
+    root = logging.getLogger()
+    root.setLevel(logging.INFO)
+
+    # stdout carries the metrics
+    handler = logging.StreamHandler(sys.stderr)
+    handler.setLevel(logging.DEBUG)
+    formatter = logging.Formatter("%(asctime)s %(levelname)7s %(message)s [%(name)s:%(lineno)s]")
+    handler.setFormatter(formatter)
+    root.addHandler(handler)
+
+
+QUANTILES = {"p10": 0.1, "p50": 0.5, "p90": 0.9, "max": 1}
+
+
+def write_metrics(f: TextIO, period: str, metrics: List[AggregateBlockMetrics]) -> None:
+    for m in metrics:
+        row = {"period": period, **asdict(m), "num_blocks": m.num_blocks}
+        del row["fee_sketches"]
+        row.update({f"base_fee_gwei_{name}": m.base_fee_gwei(q) for name, q in QUANTILES.items()})
+        row.update({f"gas_used_ratio_{name}": m.gas_used_ratio(q) for name, q in QUANTILES.items()})
+        f.write(json.dumps(row, default=str) + "\n")
+
+
+def parse_args() -> Namespace:
+    parser = ArgumentParser(description="Hourly and daily metrics of a block range, aggregated across processes")
+    parser.add_argument("--start", type=int, default=LONDON, help="First block")
+    parser.add_argument("--end", type=int, default=None, help="Last block (default: the durable block)")
+    parser.add_argument(
+        "--burned-eth",
+        type=Decimal,
+        default=None,
+        help="ETH burned before --start (default: from the checkpoint before --start, aggregating from there)",
+    )
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Aggregator processes")
+    parser.add_argument("--shard-size", type=int, default=10_000, help="Blocks per aggregator task")
+    parser.add_argument("--output", type=str, default=None, help="Write JSON lines here instead of stdout")
+    return parser.parse_args()
+
+
+def main():
+    setup_logging()
+
+    args: Namespace = parse_args()
+    end: Optional[int] = args.end if args.end is not None else read_durable_block(args.start)
+    if end is None:
+        LOG.error(f"No durable block recorded by the puller from block {args.start}, pass --end")
+        sys.exit(1)
+
+    start: int = args.start
+    burned_eth: Optional[Decimal] = args.burned_eth
+    if burned_eth is None:
+        # checkpoints hold the ETH burned through their block
+        checkpoint = max([k for k in BURNED_ETH.keys() if k < start], default=LONDON - 1)
+        burned_eth = BURNED_ETH.get(checkpoint, Decimal(0))
+        start = checkpoint + 1
+
+    hourly: List[HourlyAggregateBlockMetrics]
+    daily: List[DayAggregateBlockMetrics]
+    hourly, daily = aggregate_range(start, end, burned_eth, workers=args.workers, shard_size=args.shard_size)
+    # periods before --start were only aggregated for their cumulative burn
+    hourly = [m for m in hourly if m.end_number >= args.start]
+    daily = [m for m in daily if m.end_number >= args.start]
+    LOG.info(f"{len(hourly)} hours and {len(daily)} days from block {args.start} to {end}")
+
+    f: TextIO = open(args.output, "w") if args.output is not None else sys.stdout
+    try:
+        write_metrics(f, "hour", hourly)
+        write_metrics(f, "day", daily)
+    finally:
+        if f is not sys.stdout:
+            f.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+import logging
+import os
+import sys
+from argparse import ArgumentParser, Namespace
+from typing import Optional
+
+from eth.core.block_writer import read_durable_block
+from eth.core.retention import archive_range
+from eth.utils.file_utils import archive_dir, archive_filepath
+from potpourri.python.ethereum.constants import LONDON
+
+LOG = logging.getLogger(__name__)
+
+
+def setup_logging() -> None:
+    root = logging.getLogger()
+    root.setLevel(logging.INFO)
+
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setLevel(logging.DEBUG)
+    formatter = logging.Formatter("%(asctime)s %(levelname)7s %(message)s [%(name)s:%(lineno)s]")
+    handler.setFormatter(formatter)
+    root.addHandler(handler)
+
+
+def run_archiver(start: int, end: int, range_size: int, dict_samples: int, delete: bool) -> None:
+    os.makedirs(archive_dir(), exist_ok=True)
+    # ranges are aligned so the same blocks always land in the same archive
+    range_start = start - (start - LONDON) % range_size
+    while range_start + range_size - 1 <= end:
+        range_end = range_start + range_size - 1
+        if range_start < start:
+            LOG.info(f"Skip blocks {range_start}-{range_end}: starts before --start")
+        elif os.path.exists(archive_filepath(range_start, range_end)):
+            LOG.info(f"Skip blocks {range_start}-{range_end}: already archived")
+        else:
+            archive_range(range_start, range_end, dict_samples=dict_samples, delete=delete)
+        range_start += range_size
+
+
+def parse_args() -> Namespace:
+    parser = ArgumentParser(description="Seal cached block ranges into compressed archives")
+    parser.add_argument("--start", type=int, default=LONDON, help="First block to archive")
+    parser.add_argument(
+        "--end", type=int, default=None, help="Last block to archive (default: --keep-hot blocks below the cache)"
+    )
+    parser.add_argument("--keep-hot", type=int, default=50_000, help="Recent blocks never archived")
+    parser.add_argument("--range-size", type=int, default=10_000, help="Blocks per archive")
+    parser.add_argument("--dict-samples", type=int, default=500, help="Blocks sampled to train each dictionary")
+    parser.add_argument("--delete", action="store_true", help="Delete cached files once archived and verified")
+    return parser.parse_args()
+
+
+def main():
+    setup_logging()
+
+    args: Namespace = parse_args()
+    end: Optional[int] = args.end
+    if end is None:
+        durable_block: Optional[int] = read_durable_block(args.start)
+        if durable_block is None:
+            LOG.error(f"No durable block recorded by the puller from block {args.start}, pass --end")
+            sys.exit(1)
+        end = durable_block - args.keep_hot
+
+    run_archiver(
+        start=args.start, end=end, range_size=args.range_size, dict_samples=args.dict_samples, delete=args.delete
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+import logging
+import signal
+import sys
+from argparse import ArgumentParser, Namespace
+
+from eth.core.block_server import BlockServer, BlockStore
+
+LOG = logging.getLogger(__name__)
+
+
+def setup_logging() -> None:
+    root = logging.getLogger()
+    root.setLevel(logging.INFO)
+
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setLevel(logging.DEBUG)
+    formatter = logging.Formatter("%(asctime)s %(levelname)7s %(message)s [%(name)s:%(lineno)s]")
+    handler.setFormatter(formatter)
+    root.addHandler(handler)
+
+
+def parse_args() -> Namespace:
+    parser = ArgumentParser(description="Serve the cached blocks over HTTP to processors on other hosts")
+    parser.add_argument("--host", type=str, default="127.0.0.1", help="Listening interface")
+    parser.add_argument("--port", type=int, default=8560, help="Listening port")
+    return parser.parse_args()
+
+
+def main():
+    setup_logging()
+
+    args: Namespace = parse_args()
+    store = BlockStore().start()
+    server = BlockServer(store, host=args.host, port=args.port)
+    signal.signal(signal.SIGTERM, lambda sig, frame: sys.exit(0))
+    LOG.info(f"Serving blocks on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    store.stop()
+    LOG.info("Exit Block Server")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+import logging
+import os
+import sys
+from argparse import ArgumentParser, Namespace
+from typing import Optional, Tuple
+
+from eth.core.block_writer import read_durable_range, write_durable_block
+from eth.core.importer import ImportSummary, import_dump
+from eth.core.verifier import write_repair_list
+from eth.utils.file_utils import repair_list_filepath
+from potpourri.python.ethereum.constants import LONDON
+
+LOG = logging.getLogger(__name__)
+
+MAX_LOGGED_PROBLEMS = 100
+
+
+def setup_logging() -> None:
+    root = logging.getLogger()
+    root.setLevel(logging.INFO)
+
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setLevel(logging.DEBUG)
+    formatter = logging.Formatter("%(asctime)s %(levelname)7s %(message)s [%(name)s:%(lineno)s]")
+    handler.setFormatter(formatter)
+    root.addHandler(handler)
+
+
+def parse_args() -> Namespace:
+    parser = ArgumentParser(description="Import a JSONL or CSV block dump into the cache, see docs/import.md")
+    parser.add_argument("dump", type=str, help="Blocks .jsonl or .csv, optionally .gz")
+    parser.add_argument("--uncles", type=str, default=None, help="Uncles .csv going with a CSV dump")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Parsing and writing processes")
+    parser.add_argument("--chunk-size", type=int, default=5_000, help="Lines per import task")
+    return parser.parse_args()
+
+
+def main():
+    setup_logging()
+
+    args: Namespace = parse_args()
+    LOG.info(f"Import {args.dump} with {args.workers} workers")
+    summary: ImportSummary = import_dump(
+        args.dump, uncles_filepath=args.uncles, workers=args.workers, chunk_size=args.chunk_size
+    )
+    LOG.info(f"Imported {summary.blocks} blocks {summary.first}-{summary.last} and {summary.uncles} uncles")
+
+    for problem in summary.problems[:MAX_LOGGED_PROBLEMS]:
+        LOG.warning(str(problem))
+    if len(summary.problems) > MAX_LOGGED_PROBLEMS:
+        LOG.warning(f"... and {len(summary.problems) - MAX_LOGGED_PROBLEMS} more")
+    if len(summary.problems) > 0:
+        repair_nums = write_repair_list(problem.num for problem in summary.problems)
+        LOG.info(f"{len(repair_nums)} blocks to re-fetch with run_puller --repair in {repair_list_filepath()}")
+        sys.exit(1)
+
+    if summary.last is None:
+        return
+    # the puller continues from the import when it extends the complete part of the cache
+    durable: Optional[Tuple[int, int]] = read_durable_range()
+    if durable is None:
+        durable = (summary.first, summary.first - 1) if summary.first <= LONDON + 1 else None
+    if durable is not None and summary.first <= durable[1] + 1 <= summary.last:
+        write_durable_block(min(durable[0], summary.first), summary.last)
+        LOG.info(f"Cache durable from block {min(durable[0], summary.first)} through block {summary.last}")
+
+
+if __name__ == "__main__":
+    main()
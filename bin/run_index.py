@@ -0,0 +1,116 @@
+import logging
+import sys
+from argparse import ArgumentParser, Namespace
+from datetime import datetime
+from decimal import Decimal
+from typing import Optional
+
+from eth.core.block_writer import read_durable_block
+from eth.core.checkpoints import BURNED_ETH
+from eth.core.index import BlockIndex
+from eth.core.reader import read_block
+from eth.core.supply import SupplyAnchor, load_supply_anchor
+from eth.types.block import AggregateBlockMetrics, SummaryBlock
+from potpourri.python.ethereum.constants import LONDON
+
+LOG = logging.getLogger(__name__)
+
+
+def setup_logging() -> None:
+    root = logging.getLogger()
+    root.setLevel(logging.INFO)
+
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setLevel(logging.DEBUG)
+    formatter = logging.Formatter("%(asctime)s %(levelname)7s %(message)s [%(name)s:%(lineno)s]")
+    handler.setFormatter(formatter)
+    root.addHandler(handler)
+
+
+def rebuild(index: BlockIndex, end: int) -> None:
+    """
+    Index the cached blocks up to `end`, continuing from the last indexed block.
+    """
+    # like the processor, start after the LONDON checkpoint
+    first_block: int = LONDON + 1
+    last_block: Optional[int] = index.last_block
+    if last_block is None:
+        index.reset(first_block, BURNED_ETH[LONDON])
+    num = last_block + 1 if last_block is not None else first_block
+
+    burned_eth: Decimal = Decimal(0)
+    if last_block is not None:
+        burned_eth = index.aggregate(last_block, last_block).cumulative_burned_eth
+    while num <= end:
+        block: Optional[SummaryBlock] = read_block(num)
+        if block is None:
+            LOG.error(f"Block {num} is not cached, stop indexing")
+            return
+        index.append(block, burned_eth=burned_eth)
+        burned_eth += block.burned_eth
+        if num % 10000 == 0:
+            LOG.info(f"Indexed block={num} time={block.timestamp_dt}")
+        num += 1
+    LOG.info(f"Indexed blocks {index.first_block}-{index.last_block}")
+
+    anchor: Optional[SupplyAnchor] = load_supply_anchor()
+    if anchor is not None:
+        if index.set_supply(anchor.block, anchor.supply_eth):
+            LOG.info(f"Supply anchored at block {anchor.block}: {anchor.supply_eth:,.4f} ETH")
+        else:
+            LOG.warning(f"Supply anchor block {anchor.block} is not indexed")
+
+
+def print_metrics(metrics: Optional[AggregateBlockMetrics]) -> None:
+    if metrics is None:
+        print("No indexed blocks in range")
+        return
+    print(f"blocks              {metrics.start_number}-{metrics.end_number} ({metrics.num_blocks})")
+    print(f"burned              {metrics.burnt_eth:,.4f} ETH")
+    print(f"cumulative burned   {metrics.cumulative_burned_eth:,.4f} ETH")
+    print(f"issuance            {metrics.issuance_eth:,.4f} ETH (uncles {metrics.uncle_issuance_eth:,.4f} ETH)")
+    print(f"net issuance        {metrics.net_issuance_eth:,.4f} ETH")
+    print(f"gas used            {metrics.gas_used:,.0f}")
+    print(f"gas fees paid       {metrics.gas_fees_paid / Decimal(10**18):,.4f} ETH")
+    if metrics.supply_eth is not None:
+        print(f"supply              {metrics.supply_eth:,.4f} ETH at block {metrics.end_number}")
+
+
+def parse_args() -> Namespace:
+    parser = ArgumentParser(description="Build the block index and query burn and issuance over a range")
+    parser.add_argument("--rebuild", action="store_true", help="Index cached blocks up to the durable block")
+    parser.add_argument("--start-time", type=datetime.fromisoformat, default=None, help="Range start (ISO format)")
+    parser.add_argument("--end-time", type=datetime.fromisoformat, default=None, help="Range end, exclusive")
+    parser.add_argument("--start-block", type=int, default=None, help="First block of the range")
+    parser.add_argument("--end-block", type=int, default=None, help="Last block of the range")
+    return parser.parse_args()
+
+
+def main():
+    setup_logging()
+
+    args: Namespace = parse_args()
+    index = BlockIndex()
+    if args.rebuild:
+        end: Optional[int] = read_durable_block(LONDON + 1)
+        if end is None:
+            LOG.error(f"No durable block recorded by the puller from block {LONDON + 1}")
+            sys.exit(1)
+        rebuild(index, end)
+
+    if index.last_block is None:
+        LOG.error("Nothing indexed yet, run with --rebuild")
+        sys.exit(1)
+
+    if args.start_time is not None or args.end_time is not None:
+        start_time: datetime = args.start_time if args.start_time is not None else datetime.fromtimestamp(0)
+        end_time: datetime = args.end_time if args.end_time is not None else datetime.now()
+        print_metrics(index.aggregate_time(start_time, end_time))
+    elif args.start_block is not None or args.end_block is not None:
+        start_block: int = args.start_block if args.start_block is not None else index.first_block
+        end_block: int = args.end_block if args.end_block is not None else index.last_block
+        print_metrics(index.aggregate(start_block, end_block))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+import logging
+import sys
+from argparse import ArgumentParser, Namespace
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+from eth.core.latency import STAGES, percentile, stage_latencies, traces_in_range
+from eth.core.outbox import Outbox
+
+LOG = logging.getLogger(__name__)
+
+PERCENTILES: List[int] = [50, 90, 99]
+
+
+def setup_logging() -> None:
+    root = logging.getLogger()
+    root.setLevel(logging.INFO)
+
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setLevel(logging.DEBUG)
+    formatter = logging.Formatter("%(asctime)s %(levelname)7s %(message)s [%(name)s:%(lineno)s]")
+    handler.setFormatter(formatter)
+    root.addHandler(handler)
+
+
+def report(start: datetime, end: datetime, include_pending: bool) -> None:
+    traces = traces_in_range(Outbox().traces(), start, end)
+    if not include_pending:
+        traces = [trace for trace in traces if "tweeted" in trace]
+
+    by_stage: Dict[str, List[float]] = {stage: [] for stage in STAGES + ["total"]}
+    for trace in traces:
+        for stage, latency in stage_latencies(trace).items():
+            by_stage[stage].append(latency)
+
+    print(f"{len(traces)} reports from {start} to {end}")
+    print(f"{'stage':<12}{'count':>8}" + "".join(f"{'p' + str(p):>10}" for p in PERCENTILES) + f"{'max':>10}")
+    for stage, latencies in by_stage.items():
+        if len(latencies) == 0:
+            continue
+        cols = "".join(f"{percentile(latencies, p):>10.1f}" for p in PERCENTILES)
+        print(f"{stage:<12}{len(latencies):>8}{cols}{max(latencies):>10.1f}")
+
+
+def parse_args() -> Namespace:
+    now = datetime.now()
+    parser = ArgumentParser(description="Percentile latency (seconds) per report lifecycle stage")
+    parser.add_argument(
+        "--start", type=datetime.fromisoformat, default=now - timedelta(days=7), help="Start time (ISO format)"
+    )
+    parser.add_argument("--end", type=datetime.fromisoformat, default=now, help="End time (ISO format)")
+    parser.add_argument("--pending", action="store_true", help="Include reports not yet tweeted")
+    return parser.parse_args()
+
+
+def main():
+    setup_logging()
+
+    args: Namespace = parse_args()
+    report(start=args.start, end=args.end, include_pending=args.pending)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+import logging
+import os
+import signal
+import sys
+from argparse import ArgumentParser, Namespace
+from typing import List, Optional
+
+from eth.core.checkpoints import BURNED_ETH
+from eth.core.ethereum_client import EthereumClient
+from eth.core.pipeline import Pipeline
+from eth.core.rpc_pool import make_eth_client
+
+LOG = logging.getLogger(__name__)
+
+
+pipeline: Optional[Pipeline] = None
+
+
+def signal_handler(sig, frame):
+    LOG.info(f"Exit signal received: {sig}")
+    if pipeline is None or not pipeline.running:
+        # second signal, or nothing to wait for
+        sys.exit(1)
+    pipeline.stop()
+
+
+def setup_logging() -> None:
+    root = logging.getLogger()
+    root.setLevel(logging.INFO)
+
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setLevel(logging.DEBUG)
+    formatter = logging.Formatter("%(asctime)s %(levelname)7s %(message)s [%(name)s:%(lineno)s]")
+    handler.setFormatter(formatter)
+    root.addHandler(handler)
+
+
+def parse_args() -> Namespace:
+    parser = ArgumentParser(description="Run puller, processor and tweeter in one process")
+    parser.add_argument(
+        "--eth.addr",
+        type=str,
+        default=os.getenv("ETHBURNBOT_ETHEREUM_RPC", "localhost"),
+        help="HTTP-RPC server listening interface",
+    )
+    parser.add_argument("--eth.port", type=int, default=8545, help="HTTP-RPC server listening port")
+    parser.add_argument(
+        "--eth.rpc",
+        type=str,
+        action="append",
+        default=None,
+        help="HTTP-RPC endpoint URL, repeat to pool several endpoints (overrides --eth.addr/--eth.port)",
+    )
+    parser.add_argument("--eth.hedge-ms", type=int, default=500, help="Hedge pooled requests slower than this")
+    parser.add_argument("--no-cache", action="store_true")
+    parser.add_argument("--dry-run", action="store_true", help="Dry run")
+    parser.add_argument("--max-pending-blocks", type=int, default=1000, help="Blocks buffered between stages")
+    parser.add_argument("--min-interval-sec", type=int, default=5, help="Seconds between tweets when draining")
+    parser.add_argument(
+        "--priority-fees", action="store_true", help="Fetch receipts and cache each block's total priority fees"
+    )
+    return parser.parse_args()
+
+
+def main():
+    global pipeline
+    setup_logging()
+
+    signal.signal(signal.SIGINT, signal_handler)
+    signal.signal(signal.SIGTERM, signal_handler)
+    signal.signal(signal.SIGHUP, signal_handler)
+    signal.signal(signal.SIGQUIT, signal_handler)
+
+    args: Namespace = parse_args()
+    rpc_urls: Optional[List[str]] = getattr(args, "eth.rpc")
+    eth_client: EthereumClient = make_eth_client(
+        eth_addr=getattr(args, "eth.addr"),
+        eth_port=getattr(args, "eth.port"),
+        rpc_urls=rpc_urls,
+        hedge_ms=getattr(args, "eth.hedge_ms"),
+    )
+
+    last_known_block = max([k for k in BURNED_ETH.keys()])
+    pipeline = Pipeline(
+        eth_client=eth_client,
+        start_block=last_known_block + 1,
+        burned_eth=BURNED_ETH[last_known_block],
+        use_cache=not args.no_cache,
+        dry_run=args.dry_run,
+        max_pending_blocks=args.max_pending_blocks,
+        min_tweet_interval_sec=args.min_interval_sec,
+        fetch_priority_fees=args.priority_fees,
+    )
+    pipeline.start()
+    pipeline.join()
+
+
+if __name__ == "__main__":
+    main()
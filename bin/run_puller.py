@@ -2,15 +2,25 @@ import functools
 import logging
 import os
 import signal
+import socket
 import sys
 import time
 from argparse import ArgumentParser, Namespace
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 from threading import Thread
+from typing import List, Optional
 
-from eth.core.ethereum_client import EthereumClient, GethClient
-from eth.core.puller import BlockPuller
+from eth.core.block_writer import BlockWriter
+from eth.core.ethereum_client import EthereumClient
+from eth.core.lanes import HEAD_LOOKBACK, DualLanePuller
+from eth.core.lease import LEASE_SIZE, Lease, LeaseTable
+from eth.core.puller import MAX_UNCLES, BlockPuller
+from eth.core.rpc_pool import make_eth_client
+from eth.core.throttle import RequestController
+from eth.core.verifier import read_repair_list
 from eth.types.block import DetailedBlock
+from eth.utils.file_utils import block_filepath, repair_list_filepath, uncle_block_filepath
+from eth.utils.profiler import Profiler
 from potpourri.python.ethereum.constants import LONDON
 
 LOG = logging.getLogger(__name__)
@@ -54,41 +64,137 @@ def log_progress(block: DetailedBlock, prefix: str = "") -> None:
     LOG.info(f"{prefix}block={block.number} time={block.timestamp_dt}")
 
 
-def run_puller(eth_addr: str, eth_port: int, use_cache: bool, block: int) -> None:
-    eth_client: EthereumClient = GethClient(ip_addr=eth_addr, port=eth_port)
-    block_puller: BlockPuller = BlockPuller(eth_client=eth_client)
+def run_puller(
+    eth_client: EthereumClient,
+    use_cache: bool,
+    block: int,
+    block_writer: Optional[BlockWriter] = None,
+    profiler: Optional[Profiler] = None,
+    fetch_priority_fees: bool = False,
+    receipt_workers: int = 4,
+    head_lookback: int = HEAD_LOOKBACK,
+    backfill_workers: int = 1,
+) -> None:
+    block_puller: BlockPuller = BlockPuller(
+        eth_client=eth_client,
+        block_writer=block_writer,
+        fetch_priority_fees=fetch_priority_fees,
+        receipt_workers=receipt_workers,
+    )
 
-    prev_sha3_uncles = ""
+    # the head stays current while the history from `block` is backfilled
+    lanes = DualLanePuller(
+        block_puller,
+        start_block=block,
+        use_cache=use_cache,
+        head_lookback=head_lookback,
+        profiler=profiler,
+        backfill_workers=backfill_workers,
+    ).start()
+    try:
+        while _still_running() and lanes.running:
+            time.sleep(1)
+    finally:
+        lanes.stop()
+        lanes.join()
+
+    LOG.info("Exit Block Cacher")
 
-    start_block = block
-    while _still_running():
-        time.sleep(0)
-        latest_block_number = block_puller.eth_blockNumber()
-        block: DetailedBlock = block_puller.eth_getBlockByNumber(
-            latest_block_number, cached=use_cache, prev_sha3_uncles=prev_sha3_uncles
-        )
-        log_progress(block, "latest")
 
-        if start_block != latest_block_number:
-            for block_num in range(start_block, latest_block_number):
-                block = block_puller.eth_getBlockByNumber(
-                    block_num, cached=use_cache, prev_sha3_uncles=prev_sha3_uncles
-                )
-                prev_sha3_uncles = block._sha3_uncles
+def repair_blocks(eth_client: EthereumClient, workers: int, fetch_priority_fees: bool = False) -> None:
+    """
+    Re-fetch the blocks listed by bin/run_verify_cache.py, replacing their cached block and uncle files.
+    """
+    repair_nums: List[int] = read_repair_list()
+    LOG.info(f"Repair {len(repair_nums)} blocks from {repair_list_filepath()}")
+    # written on the fetching threads, so the list is only removed once every block is on disk
+    block_puller: BlockPuller = BlockPuller(eth_client=eth_client, fetch_priority_fees=fetch_priority_fees)
 
-                if not _still_running():
-                    log_progress(block, prefix="exit block cacher")
-                    return
+    def repair(num: int) -> DetailedBlock:
+        # stale uncle files would otherwise outlive the block
+        for uncle_index in range(MAX_UNCLES):
+            if os.path.exists(uncle_block_filepath(num, uncle_index)):
+                os.remove(uncle_block_filepath(num, uncle_index))
+        if os.path.exists(block_filepath(num)):
+            os.remove(block_filepath(num))
+        return block_puller.eth_getBlockByNumber(num, cached=False)
 
-        sleep_sec = 1 if datetime.now().minute in [59, 0, 1] else 20
-        for _ in range(sleep_sec):
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="repair") as executor:
+        for block in executor.map(repair, repair_nums):
+            log_progress(block, prefix="repaired")
             if not _still_running():
-                log_progress(block, prefix="exit block cacher")
                 return
-            time.sleep(1)
-        start_block = latest_block_number
 
-    LOG.info("Exit Block Cacher")
+    os.remove(repair_list_filepath())
+
+
+def run_worker(
+    eth_client: EthereumClient,
+    start: int,
+    end: int,
+    owner: str,
+    lease_size: int = LEASE_SIZE,
+    workers: int = 8,
+    fetch_priority_fees: bool = False,
+    backfill_id: Optional[str] = None,
+    refetch: bool = False,
+) -> None:
+    """
+    Pull the block ranges leased from the other workers of a distributed backfill until every range is done.
+    With `refetch`, blocks already cached are pulled again, e.g. to replace corrupted ones.
+    """
+    leases = LeaseTable(start, end, owner=owner, lease_size=lease_size, backfill_id=backfill_id)
+    # blocks count once written, the leases are the progress record
+    block_writer = BlockWriter(first_block=start, record=False).start()
+    block_puller = BlockPuller(
+        eth_client=eth_client, block_writer=block_writer, fetch_priority_fees=fetch_priority_fees
+    )
+    LOG.info(f"Worker {owner}: {len(leases.remaining())} ranges of blocks {start}-{end} left in {leases.backfill_id}")
+    try:
+        while _still_running():
+            lease: Optional[Lease] = leases.claim()
+            if lease is None:
+                if len(leases.remaining()) == 0:
+                    break
+                # the rest is leased by live workers, one may still crash
+                time.sleep(leases.ttl_sec / 10)
+                continue
+
+            if _pull_lease(leases, lease, block_puller, workers, refetch=refetch):
+                block_writer.flush()
+                leases.complete(lease)
+            elif not _still_running():
+                leases.release(lease)
+    finally:
+        block_writer.close()
+
+    LOG.info(f"Exit worker {owner}")
+
+
+def _pull_lease(
+    leases: LeaseTable, lease: Lease, block_puller: BlockPuller, workers: int, refetch: bool = False
+) -> bool:
+    """
+    Pull the leased range, renewing the lease. False if the lease was lost or the puller is exiting.
+    """
+    renew_at: float = time.time() + leases.ttl_sec / 3
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="worker") as executor:
+        # unless refetching, cached blocks are skipped, so a range taken over resumes where its worker stopped
+        blocks = executor.map(
+            lambda num: block_puller.eth_getBlockByNumber(num, cached=not refetch), range(lease.start, lease.end + 1)
+        )
+        for block in blocks:
+            if time.time() >= renew_at:
+                if not leases.renew(lease):
+                    executor.shutdown(wait=True, cancel_futures=True)
+                    return False
+                renew_at = time.time() + leases.ttl_sec / 3
+            if not _still_running():
+                executor.shutdown(wait=True, cancel_futures=True)
+                return False
+            if block.number % 1000 == 0:
+                log_progress(block, prefix="worker")
+    return True
 
 
 def parse_args() -> Namespace:
@@ -100,8 +206,53 @@ def parse_args() -> Namespace:
         help="HTTP-RPC server listening interface",
     )
     parser.add_argument("--eth.port", type=int, default=8545, help="HTTP-RPC server listening port")
+    parser.add_argument(
+        "--eth.rpc",
+        type=str,
+        action="append",
+        default=None,
+        help="HTTP-RPC endpoint URL, repeat to pool several endpoints (overrides --eth.addr/--eth.port)",
+    )
+    parser.add_argument("--eth.hedge-ms", type=int, default=500, help="Hedge pooled requests slower than this")
     parser.add_argument("--no-cache", action="store_true")
+    parser.add_argument("--sync-writes", action="store_true", help="Write blocks on the pulling thread")
     parser.add_argument("--block", type=int, default=LONDON, help="Start block")
+    parser.add_argument(
+        "--head-lookback",
+        type=int,
+        default=HEAD_LOOKBACK,
+        help="Blocks below the head pulled first, before the backfill from --block",
+    )
+    parser.add_argument(
+        "--worker",
+        action="store_true",
+        help="Backfill --block to --end with other workers sharing data/blocks, then exit",
+    )
+    parser.add_argument("--end", type=int, default=None, help="Last block of a --worker backfill (default: the head)")
+    parser.add_argument("--worker-id", type=str, default=f"{socket.gethostname()}-{os.getpid()}", help="Lease owner")
+    parser.add_argument("--lease-size", type=int, default=LEASE_SIZE, help="Blocks per lease")
+    parser.add_argument(
+        "--backfill-id",
+        type=str,
+        default=None,
+        help="Backfill the leases belong to (default: <block>-<end>), a new id pulls every range again",
+    )
+    parser.add_argument("--refetch", action="store_true", help="Pull the blocks of a --worker backfill even if cached")
+    parser.add_argument("--repair", action="store_true", help="Re-fetch the blocks in the repair list and exit")
+    parser.add_argument("--repair-workers", type=int, default=8, help="Blocks re-fetched concurrently")
+    parser.add_argument(
+        "--priority-fees", action="store_true", help="Fetch receipts and cache each block's total priority fees"
+    )
+    parser.add_argument("--receipt-workers", type=int, default=4, help="Receipt batch requests in flight per block")
+    parser.add_argument("--backfill-workers", type=int, default=8, help="Backfill blocks pulled concurrently")
+    parser.add_argument(
+        "--max-in-flight", type=int, default=16, help="Most requests in flight, the controller adapts below it"
+    )
+    parser.add_argument("--rps", type=float, default=None, help="Requests per second cap, batched calls count")
+    parser.add_argument("--daily-budget", type=int, default=None, help="Calls per UTC day cap")
+    parser.add_argument("--profile", action="store_true", help="Profile the first blocks pulled")
+    parser.add_argument("--profile-blocks", type=int, default=1000, help="Blocks to profile")
+    parser.add_argument("--profile-seconds", type=int, default=None, help="Seconds to profile")
     return parser.parse_args()
 
 
@@ -116,10 +267,59 @@ def main():
     args: Namespace = parse_args()
     addr: str = getattr(args, "eth.addr")
     port: int = getattr(args, "eth.port")
+    rpc_urls: Optional[List[str]] = getattr(args, "eth.rpc")
+    hedge_ms: int = getattr(args, "eth.hedge_ms")
     use_cache: bool = not getattr(args, "no_cache")
     block: int = getattr(args, "block")
 
-    run_puller(eth_addr=addr, eth_port=port, use_cache=use_cache, block=block)
+    # SIGUSR1 snapshots a running profile or starts a bounded one
+    profiler = Profiler("puller", max_blocks=args.profile_blocks, max_seconds=args.profile_seconds)
+    profiler.install_signal_handler()
+    if args.profile:
+        profiler.start()
+
+    controller = RequestController(
+        max_in_flight=args.max_in_flight, requests_per_sec=args.rps, daily_budget=args.daily_budget
+    )
+    eth_client: EthereumClient = make_eth_client(
+        eth_addr=addr, eth_port=port, rpc_urls=rpc_urls, hedge_ms=hedge_ms, controller=controller
+    )
+    if args.repair:
+        repair_blocks(eth_client=eth_client, workers=args.repair_workers, fetch_priority_fees=args.priority_fees)
+        return
+
+    if args.worker:
+        end: int = args.end if args.end is not None else eth_client.eth_blockNumber()
+        run_worker(
+            eth_client=eth_client,
+            start=block,
+            end=end,
+            owner=args.worker_id,
+            lease_size=args.lease_size,
+            workers=args.backfill_workers,
+            fetch_priority_fees=args.priority_fees,
+            backfill_id=args.backfill_id,
+            refetch=args.refetch,
+        )
+        return
+
+    block_writer: Optional[BlockWriter] = None if args.sync_writes else BlockWriter(first_block=block).start()
+    try:
+        run_puller(
+            eth_client=eth_client,
+            use_cache=use_cache,
+            block=block,
+            block_writer=block_writer,
+            profiler=profiler,
+            fetch_priority_fees=args.priority_fees,
+            receipt_workers=args.receipt_workers,
+            head_lookback=args.head_lookback,
+            backfill_workers=args.backfill_workers,
+        )
+    finally:
+        if block_writer is not None:
+            block_writer.close()
+            LOG.info(f"Cache durable through block {block_writer.durable_block}")
 
 
 if __name__ == "__main__":
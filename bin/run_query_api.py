@@ -0,0 +1,52 @@
+import logging
+import signal
+import sys
+from argparse import ArgumentParser, Namespace
+
+from eth.core.index import BlockIndex
+from eth.core.query_api import QueryServer
+from eth.utils.file_utils import block_index_filepath
+
+LOG = logging.getLogger(__name__)
+
+
+def setup_logging() -> None:
+    root = logging.getLogger()
+    root.setLevel(logging.INFO)
+
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setLevel(logging.DEBUG)
+    formatter = logging.Formatter("%(asctime)s %(levelname)7s %(message)s [%(name)s:%(lineno)s]")
+    handler.setFormatter(formatter)
+    root.addHandler(handler)
+
+
+def parse_args() -> Namespace:
+    parser = ArgumentParser(description="Read-only HTTP API over burn and issuance metrics from the block index")
+    parser.add_argument("--host", type=str, default="127.0.0.1", help="Listening interface")
+    parser.add_argument("--port", type=int, default=8550, help="Listening port")
+    return parser.parse_args()
+
+
+def main():
+    setup_logging()
+
+    args: Namespace = parse_args()
+    try:
+        index = BlockIndex(read_only=True)
+    except FileNotFoundError:
+        LOG.error(f"No block index at {block_index_filepath()}, run the processor or bin.run_index --rebuild")
+        sys.exit(1)
+
+    server = QueryServer(index, host=args.host, port=args.port)
+    signal.signal(signal.SIGTERM, lambda sig, frame: sys.exit(0))
+    LOG.info(f"Serving metrics on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    LOG.info("Exit Query API")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+import json
+import logging
+import os
+import sys
+from argparse import ArgumentParser, Namespace
+from decimal import Decimal
+from typing import Any, Dict, Optional
+
+from eth.core.block_writer import read_durable_block
+from eth.core.checkpoints import BURNED_ETH
+from eth.core.clock import SimulatedClock
+from eth.core.index import BlockIndex
+from eth.core.outbox import Outbox
+from eth.core.processor import BlockProcessor
+from eth.core.reader import read_block
+from eth.core.replay import FixedPriceClient, Replay
+from eth.types.block import SummaryBlock
+from eth.utils.file_utils import data_dir
+from potpourri.python.ethereum.constants import LONDON
+
+LOG = logging.getLogger(__name__)
+
+
+def setup_logging() -> None:
+    root = logging.getLogger()
+    root.setLevel(logging.INFO)
+
+    # stdout carries the timings
+    handler = logging.StreamHandler(sys.stderr)
+    handler.setLevel(logging.DEBUG)
+    formatter = logging.Formatter("%(asctime)s %(levelname)7s %(message)s [%(name)s:%(lineno)s]")
+    handler.setFormatter(formatter)
+    root.addHandler(handler)
+
+
+def parse_args() -> Namespace:
+    parser = ArgumentParser(
+        description="Replay cached blocks through the processor on a simulated clock, writing the tweets and images"
+        " the live bot would have, and time each stage"
+    )
+    parser.add_argument(
+        "--start",
+        type=int,
+        required=True,
+        help="First block processed live",
+    )
+    parser.add_argument("--end", type=int, default=None, help="Last block (default: the durable block)")
+    parser.add_argument(
+        "--speed", type=float, default=0, help="Times faster than real time, 0 for as fast as possible (default)"
+    )
+    parser.add_argument("--eth-usd", type=Decimal, default=Decimal(3000), help="Fixed ETH/USD price")
+    parser.add_argument(
+        "--output-dir",
+        type=str,
+        default=os.path.join(data_dir(), "replay"),
+        help="New directory for the tweets, images and block index of the replay",
+    )
+    parser.add_argument("--output", type=str, default=None, help="Write the timings JSON here instead of stdout")
+    return parser.parse_args()
+
+
+def main():
+    setup_logging()
+
+    args: Namespace = parse_args()
+    # start from the checkpoint before --start, the blocks up to it are caught up
+    checkpoint = max([k for k in BURNED_ETH.keys() if k < args.start], default=LONDON)
+    burned_eth: Decimal = BURNED_ETH[checkpoint]
+
+    end: Optional[int] = args.end if args.end is not None else read_durable_block(checkpoint + 1)
+    if end is None:
+        LOG.error(f"No durable block recorded by the puller from block {checkpoint + 1}, pass --end")
+        sys.exit(1)
+    if os.path.isdir(args.output_dir) and len(os.listdir(args.output_dir)) > 0:
+        # tweets already in the outbox would not be written again
+        LOG.error(f"Output directory {args.output_dir} is not empty")
+        sys.exit(1)
+
+    first_block: Optional[SummaryBlock] = read_block(args.start)
+    if first_block is None:
+        LOG.error(f"Block {args.start} is not cached")
+        sys.exit(1)
+
+    os.environ["ETHBURNBOT_TWEETS_DIR"] = os.path.join(args.output_dir, "tweets")
+    clock = SimulatedClock(first_block.timestamp)
+    outbox = Outbox()
+    processor = BlockProcessor(
+        burned_eth=burned_eth,
+        coinbase_client=FixedPriceClient(args.eth_usd),
+        outbox=outbox,
+        index=BlockIndex(os.path.join(args.output_dir, "blocks.idx")),
+        clock=clock,
+    )
+    LOG.info(f"Replay blocks {checkpoint + 1}-{end}, live from block {args.start} @ ({first_block.timestamp_dt})")
+    stats: Dict[str, Any] = Replay(processor, clock, outbox, speed=args.speed).run(checkpoint + 1, end)
+
+    content = json.dumps(stats, indent=2)
+    if args.output is not None:
+        with open(args.output, "w") as f:
+            f.write(content + "\n")
+    else:
+        print(content)
+
+
+if __name__ == "__main__":
+    main()
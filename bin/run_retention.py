@@ -0,0 +1,75 @@
+import logging
+import signal
+import sys
+import time
+from argparse import ArgumentParser, Namespace
+from typing import List, Optional
+
+from eth.core.block_writer import read_durable_block
+from eth.core.index import BlockIndex
+from eth.core.retention import RetentionPolicy, run_retention
+from potpourri.python.ethereum.constants import LONDON
+
+LOG = logging.getLogger(__name__)
+
+
+def setup_logging() -> None:
+    root = logging.getLogger()
+    root.setLevel(logging.INFO)
+
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setLevel(logging.DEBUG)
+    formatter = logging.Formatter("%(asctime)s %(levelname)7s %(message)s [%(name)s:%(lineno)s]")
+    handler.setFormatter(formatter)
+    root.addHandler(handler)
+
+
+def summarized_block(start: int) -> Optional[int]:
+    """
+    Last block both durable from `start` and, when there is a block index, indexed by the processor.
+    """
+    durable_block: Optional[int] = read_durable_block(start)
+    if durable_block is None:
+        return None
+    try:
+        index = BlockIndex(read_only=True)
+    except FileNotFoundError:
+        return durable_block
+    bounds: List[int] = [durable_block] + ([index.last_block] if index.last_block is not None else [])
+    return min(bounds)
+
+
+def parse_args() -> Namespace:
+    parser = ArgumentParser(description="Compact cached blocks older than the retention period into summaries")
+    parser.add_argument("--days", type=int, default=30, help="Blocks younger than this many days stay whole")
+    parser.add_argument("--archive", action="store_true", help="Also seal each range whole into a compressed archive")
+    parser.add_argument("--start", type=int, default=LONDON, help="First block to compact")
+    parser.add_argument("--range-size", type=int, default=10_000, help="Blocks per summary file")
+    parser.add_argument("--dict-samples", type=int, default=500, help="Blocks sampled to train each dictionary")
+    parser.add_argument("--interval-sec", type=int, default=3600, help="Seconds between passes")
+    parser.add_argument("--once", action="store_true", help="Run a single pass and exit")
+    return parser.parse_args()
+
+
+def main():
+    setup_logging()
+
+    args: Namespace = parse_args()
+    policy = RetentionPolicy(
+        days=args.days, range_size=args.range_size, archive=args.archive, dict_samples=args.dict_samples
+    )
+    signal.signal(signal.SIGTERM, lambda sig, frame: sys.exit(0))
+    while True:
+        end: Optional[int] = summarized_block(args.start)
+        if end is None:
+            LOG.warning("No durable block recorded by the puller yet")
+        else:
+            compacted = run_retention(policy, start=args.start, end=end)
+            LOG.info(f"Retention pass up to block {end}: {compacted} ranges compacted")
+        if args.once:
+            break
+        time.sleep(args.interval_sec)
+
+
+if __name__ == "__main__":
+    main()
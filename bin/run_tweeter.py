@@ -4,18 +4,20 @@ import signal
 import sys
 import time
 from argparse import ArgumentParser, Namespace
-from decimal import Decimal
 from threading import Thread
-from typing import Dict, Optional
+from typing import Optional
 
+from eth.core.checkpoints import BURNED_ETH
 from eth.core.processor import BlockProcessor
-from eth.core.reader import read_block
+from eth.core.reader import read_block, wait_block
 from eth.core.tweeter import Tweeter, TweeterException
 from eth.types.block import SummaryBlock
-from potpourri.python.ethereum.constants import LONDON
+from eth.utils.profiler import Profiler
 
 LOG = logging.getLogger(__name__)
 LOG_WIDTH = 40
+# longest the processor waits for the next block before checking for an exit
+WAIT_SEC = 10
 
 
 exit_signal = False
@@ -51,26 +53,7 @@ def setup_logging() -> None:
     root.addHandler(handler)
 
 
-CHECKPOINT_1 = 13233800
-CHECKPOINT_2 = 13596500
-CHECKPOINT_3 = 13648000
-CHECKPOINT_4 = 14000000
-CHECKPOINT_5 = 14100000
-CHECKPOINT_6 = 15000000
-CHECKPOINT_7 = 15080000
-BURNED_ETH: Dict[int, Decimal] = {
-    LONDON: Decimal(0),
-    CHECKPOINT_1: Decimal("301720.664913446243502258"),
-    CHECKPOINT_2: Decimal("848916.085936463748695936"),
-    CHECKPOINT_3: Decimal("949398.242163151858483080"),
-    CHECKPOINT_4: Decimal("1487958.407215919376807183"),
-    CHECKPOINT_5: Decimal("1688489.510719468494472673"),
-    CHECKPOINT_6: Decimal("2470957.033914244745381122"),
-    CHECKPOINT_7: Decimal("2512085.166061214922158636"),
-}
-
-
-def run_processor(last_known_block: int) -> None:
+def run_processor(last_known_block: int, profiler: Optional[Profiler] = None) -> None:
     burned_eth = BURNED_ETH[last_known_block]
     # first block to process
     block_num = last_known_block + 1 if last_known_block != 0 else last_known_block
@@ -86,43 +69,59 @@ def run_processor(last_known_block: int) -> None:
                 LOG.info(f"{'Processor caught up'.ljust(LOG_WIDTH)}block={block_num}")
             caught_up = True
             LOG.debug(f"Block {block_num} not yet available")
-            time.sleep(1)
-            continue
+            block = wait_block(block_num, timeout=WAIT_SEC)
+            if block is None:
+                continue
 
         block_processor.process(block)
+        if profiler is not None:
+            profiler.tick()
 
         block_num = block_num + 1
 
     LOG.info("Exit Block Processor")
 
 
-def run_tweeter(dry_run: bool) -> None:
+def run_tweeter(dry_run: bool, min_interval_sec: int) -> None:
     tweeter = Tweeter()
 
-    wakeup_sec = 20
+    # the processor wakes the tweeter up when it queues a tweet, this is only a heartbeat
+    wakeup_sec = 60
     tweets = 0
     failures = 0
     while _still_running():
         time.sleep(0)
-        LOG.info(f"{'Tweeter Heartbeat!'.ljust(LOG_WIDTH)}tweets={tweets} failures={failures} dry_run={dry_run}")
 
         tweeted: bool = False
         try:
             tweeted = tweeter.process(dry_run=dry_run)
         except TweeterException as e:
+            LOG.error(f"{e}")
             failures += 1
         tweets = tweets + 1 if tweeted else tweets
 
-        for _ in range(wakeup_sec if not tweeted else 1):
-            if not _still_running():
-                return
-            time.sleep(1)
+        if tweeted:
+            # drain the queue at the rate limit
+            for _ in range(min_interval_sec):
+                if not _still_running():
+                    return
+                time.sleep(1)
+        else:
+            LOG.info(
+                f"{'Tweeter Heartbeat!'.ljust(LOG_WIDTH)}tweets={tweets} failures={failures} pending={tweeter.pending}"
+                f" dry_run={dry_run}"
+            )
+            tweeter.wait(wakeup_sec)
 
 
 def parse_args() -> Namespace:
     parser = ArgumentParser()
     parser.add_argument("--dry-run", action="store_true", help="Dry run")
     parser.add_argument("--process", action="store_true", help="Run processor")
+    parser.add_argument("--min-interval-sec", type=int, default=5, help="Seconds between tweets when draining")
+    parser.add_argument("--profile", action="store_true", help="Profile the first blocks processed")
+    parser.add_argument("--profile-blocks", type=int, default=10000, help="Blocks to profile")
+    parser.add_argument("--profile-seconds", type=int, default=None, help="Seconds to profile")
     return parser.parse_args()
 
 
@@ -139,9 +138,15 @@ def main():
 
     last_known_block = max([k for k in BURNED_ETH.keys()])
     if args.process:
-        run_processor(last_known_block=last_known_block)
+        # SIGUSR1 snapshots a running profile or starts a bounded one
+        profiler = Profiler("processor", max_blocks=args.profile_blocks, max_seconds=args.profile_seconds)
+        profiler.install_signal_handler()
+        if args.profile:
+            profiler.start()
+
+        run_processor(last_known_block=last_known_block, profiler=profiler)
     else:
-        run_tweeter(dry_run=dry_run)
+        run_tweeter(dry_run=dry_run, min_interval_sec=args.min_interval_sec)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,59 @@
+import logging
+import os
+import sys
+from argparse import ArgumentParser, Namespace
+from typing import List, Optional
+
+from eth.core.block_writer import read_durable_block
+from eth.core.verifier import CacheProblem, verify_cache, write_repair_list
+from eth.utils.file_utils import repair_list_filepath
+from potpourri.python.ethereum.constants import LONDON
+
+LOG = logging.getLogger(__name__)
+
+MAX_LOGGED_PROBLEMS = 100
+
+
+def setup_logging() -> None:
+    root = logging.getLogger()
+    root.setLevel(logging.INFO)
+
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setLevel(logging.DEBUG)
+    formatter = logging.Formatter("%(asctime)s %(levelname)7s %(message)s [%(name)s:%(lineno)s]")
+    handler.setFormatter(formatter)
+    root.addHandler(handler)
+
+
+def parse_args() -> Namespace:
+    parser = ArgumentParser(description="Verify cached blocks and write the blocks to re-fetch to a repair list")
+    parser.add_argument("--start", type=int, default=LONDON, help="First block to verify")
+    parser.add_argument("--end", type=int, default=None, help="Last block to verify (default: the durable block)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Verifier processes")
+    parser.add_argument("--chunk-size", type=int, default=10_000, help="Blocks per verifier task")
+    return parser.parse_args()
+
+
+def main():
+    setup_logging()
+
+    args: Namespace = parse_args()
+    end: Optional[int] = args.end if args.end is not None else read_durable_block(args.start)
+    if end is None:
+        LOG.error(f"No durable block recorded by the puller from block {args.start}, pass --end")
+        sys.exit(1)
+
+    LOG.info(f"Verify blocks {args.start}-{end} with {args.workers} workers")
+    problems: List[CacheProblem] = verify_cache(args.start, end, workers=args.workers, chunk_size=args.chunk_size)
+    for problem in problems[:MAX_LOGGED_PROBLEMS]:
+        LOG.warning(str(problem))
+    if len(problems) > MAX_LOGGED_PROBLEMS:
+        LOG.warning(f"... and {len(problems) - MAX_LOGGED_PROBLEMS} more")
+
+    repair_nums = write_repair_list(problem.num for problem in problems)
+    LOG.info(f"{len(problems)} problems, {len(repair_nums)} blocks to repair in {repair_list_filepath()}")
+    sys.exit(1 if len(problems) > 0 else 0)
+
+
+if __name__ == "__main__":
+    main()
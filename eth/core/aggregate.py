@@ -0,0 +1,121 @@
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, fields, replace
+from datetime import datetime
+from decimal import Decimal
+from logging import getLogger
+from typing import Dict, List, Optional, Tuple, TypeVar
+
+from eth.core.reader import read_block
+from eth.types.block import AggregateBlockMetrics, DayAggregateBlockMetrics, HourlyAggregateBlockMetrics, SummaryBlock
+from eth.types.sketch import FeeSketches
+
+LOG = getLogger(__name__)
+
+M = TypeVar("M", bound=AggregateBlockMetrics)
+
+
+@dataclass
+class ShardMetrics:
+    """
+    Hourly and daily metrics of a block range, with cumulative burn counted from the start of the range.
+    """
+
+    start_number: int
+    end_number: int
+    burnt_eth: Decimal
+    hourly: Dict[datetime, HourlyAggregateBlockMetrics]
+    daily: Dict[datetime, DayAggregateBlockMetrics]
+
+
+def block_metrics(block: SummaryBlock, cumulative_burned_eth: Decimal) -> HourlyAggregateBlockMetrics:
+    return HourlyAggregateBlockMetrics(
+        day=block.day_dt,
+        hour=block.hour_dt,
+        start_number=block.number,
+        end_number=block.number,
+        burnt_eth=block.burned_eth,
+        cumulative_burned_eth=cumulative_burned_eth,
+        base_issuance_eth=block.base_issuance_eth,
+        uncle_issuance_eth=block.uncle_reward_eth,
+        gas_used=Decimal(block.gas_used),
+        gas_fees_paid=Decimal(block.gas_used * block.base_fee_per_gas),
+        priority_fees_eth=block.priority_fees_eth,
+    )
+
+
+def day_metrics(metrics: HourlyAggregateBlockMetrics) -> DayAggregateBlockMetrics:
+    return DayAggregateBlockMetrics(**{f.name: getattr(metrics, f.name) for f in fields(DayAggregateBlockMetrics)})
+
+
+def _merge_into(periods: Dict[datetime, M], key: datetime, metrics: M) -> None:
+    periods[key] = periods[key].merge(metrics) if key in periods else metrics
+
+
+def aggregate_shard(start: int, end: int) -> ShardMetrics:
+    """
+    Map step: metrics of the cached blocks `start` to `end`. Raises ValueError if a block is not cached.
+    """
+    burnt_eth: Decimal = Decimal(0)
+    hourly: Dict[datetime, HourlyAggregateBlockMetrics] = {}
+    daily: Dict[datetime, DayAggregateBlockMetrics] = {}
+    sketches: Dict[datetime, FeeSketches] = {}
+    for num in range(start, end + 1):
+        block: Optional[SummaryBlock] = read_block(num)
+        if block is None:
+            raise ValueError(f"Block {num} is not cached")
+
+        burnt_eth += block.burned_eth
+        metrics: HourlyAggregateBlockMetrics = block_metrics(block, cumulative_burned_eth=burnt_eth)
+        _merge_into(hourly, block.hour_dt, metrics)
+        _merge_into(daily, block.day_dt, day_metrics(metrics))
+        sketches.setdefault(block.hour_dt, FeeSketches()).add(block.base_fee_per_gas, block.gas_used, block.gas_limit)
+
+    # attached per period rather than per block, merging a sketch into every block's metrics would copy it
+    day_sketches: Dict[datetime, FeeSketches] = {}
+    for hour in sorted(hourly):
+        hourly[hour] = replace(hourly[hour], fee_sketches=sketches[hour])
+        day: datetime = hourly[hour].day
+        day_sketches[day] = day_sketches[day].merge(sketches[hour]) if day in day_sketches else sketches[hour]
+    for day in daily:
+        daily[day] = replace(daily[day], fee_sketches=day_sketches[day])
+
+    return ShardMetrics(start_number=start, end_number=end, burnt_eth=burnt_eth, hourly=hourly, daily=daily)
+
+
+def merge_shards(
+    shards: List[ShardMetrics], burned_eth: Decimal
+) -> Tuple[List[HourlyAggregateBlockMetrics], List[DayAggregateBlockMetrics]]:
+    """
+    Reduce step: shift each shard's cumulative burn by everything burned before it, then merge the periods
+    that span shard boundaries.
+    """
+    hourly: Dict[datetime, HourlyAggregateBlockMetrics] = {}
+    daily: Dict[datetime, DayAggregateBlockMetrics] = {}
+    offset: Decimal = burned_eth
+    for shard in sorted(shards, key=lambda s: s.start_number):
+        for hour, metrics in shard.hourly.items():
+            _merge_into(hourly, hour, metrics.offset(offset))
+        for day, metrics in shard.daily.items():
+            _merge_into(daily, day, metrics.offset(offset))
+        offset += shard.burnt_eth
+
+    return [hourly[hour] for hour in sorted(hourly)], [daily[day] for day in sorted(daily)]
+
+
+def aggregate_range(
+    start: int, end: int, burned_eth: Decimal, workers: Optional[int] = None, shard_size: int = 10_000
+) -> Tuple[List[HourlyAggregateBlockMetrics], List[DayAggregateBlockMetrics]]:
+    """
+    Hourly and daily metrics of blocks `start` to `end`, sharded across a pool of processes. `burned_eth` is
+    the ETH burned before `start`. The first and last periods only count the blocks inside the range.
+    """
+    starts = list(range(start, end + 1, shard_size))
+    ends = [min(end, shard_start + shard_size - 1) for shard_start in starts]
+
+    shards: List[ShardMetrics] = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for shard in executor.map(aggregate_shard, starts, ends):
+            LOG.info(f"Aggregated blocks {shard.start_number}-{shard.end_number} burned={shard.burnt_eth:,.2f}")
+            shards.append(shard)
+
+    return merge_shards(shards, burned_eth)
@@ -0,0 +1,247 @@
+import os
+import re
+import struct
+import zlib
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from functools import lru_cache
+from logging import getLogger
+from threading import Lock
+from typing import Iterable, List, Optional, Tuple
+
+from eth.utils.file_utils import archive_dir, summaries_dir
+
+LOG = getLogger(__name__)
+
+MAGIC = b"EBA1"
+# index_offset, dict_offset, dict_length, entry_count, magic
+FOOTER = struct.Struct("<QQII4s")
+# block number, uncle index (-1 for the block itself), offset, compressed length
+ENTRY = struct.Struct("<qiQI")
+
+# zlib only looks back 32KB, a larger dictionary is never referenced
+MAX_DICT_SIZE = 32 * 1024
+# a JSON member whatever the layout: the separator and whitespace before it, its key and a scalar value
+MEMBER = re.compile(rb'[,{\[]?\s*"[^"]+"\s*:\s*("[^"]*"|[^,\]}\s]+)')
+# runs of zeros in hex values, e.g. the logsBloom of a block without logs
+ZERO_RUN = re.compile(rb"0{16,}")
+
+BLOCK_INDEX = -1
+
+ARCHIVE_FILENAME_RE = re.compile(r"^(\d+)_(\d+)\.blocks$")
+
+Entry = Tuple[int, int, bytes]
+
+
+class BlockArchive:
+    """
+    Sealed, read-only range of cached blocks and uncles.
+
+    Every file is compressed on its own with a zlib dictionary trained on the range, so a single block is
+    decompressed without touching its neighbours. The index and the dictionary are read once on open.
+
+    Layout: compressed files | index (ENTRY each, sorted by block and uncle) | dictionary | FOOTER
+    """
+
+    def __init__(self, filepath: str):
+        self._filepath = filepath
+        self._fd = -1
+        self._fd = os.open(filepath, os.O_RDONLY)
+
+        size = os.fstat(self._fd).st_size
+        index_offset, dict_offset, dict_length, count, magic = FOOTER.unpack(
+            os.pread(self._fd, FOOTER.size, size - FOOTER.size)
+        )
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"Not a block archive: {filepath}")
+
+        self._zdict: bytes = os.pread(self._fd, dict_length, dict_offset)
+        index = os.pread(self._fd, count * ENTRY.size, index_offset)
+        self._keys: List[Tuple[int, int]] = []
+        self._locations: List[Tuple[int, int]] = []
+        for num, uncle_index, offset, length in ENTRY.iter_unpack(index):
+            self._keys.append((num, uncle_index))
+            self._locations.append((offset, length))
+
+    @property
+    def filepath(self) -> str:
+        return self._filepath
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def contains(self, num: int, uncle_index: int = BLOCK_INDEX) -> bool:
+        return self._find(num, uncle_index) is not None
+
+    def read(self, num: int, uncle_index: int = BLOCK_INDEX) -> Optional[bytes]:
+        i = self._find(num, uncle_index)
+        if i is None:
+            return None
+
+        offset, length = self._locations[i]
+        decompressor = zlib.decompressobj(zdict=self._zdict)
+        return decompressor.decompress(os.pread(self._fd, length, offset)) + decompressor.flush()
+
+    def _find(self, num: int, uncle_index: int) -> Optional[int]:
+        i = bisect_left(self._keys, (num, uncle_index))
+        return i if i < len(self._keys) and self._keys[i] == (num, uncle_index) else None
+
+    def keys(self) -> List[Tuple[int, int]]:
+        return list(self._keys)
+
+    def close(self) -> None:
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+    def __del__(self):
+        self.close()
+
+
+def train_dict(samples: Iterable[bytes], size: int = MAX_DICT_SIZE) -> bytes:
+    """
+    zlib preset dictionary from sample files: the JSON members (key and value, e.g. an empty sha3Uncles or a
+    frequent miner), member prefixes (separator and key up to the value) and zero runs that save the most bytes
+    across the samples. Compact and indented JSON alike. zlib encodes nearer matches in fewer bits, so the most
+    valuable go last.
+    """
+    fragments: Counter = Counter()
+    for sample in samples:
+        for match in MEMBER.finditer(sample):
+            member, value = match.group(0), match.group(1)
+            fragments[member] += 1
+            # ',"baseFeePerGas":"0x' and the like, shared by members with different values
+            prefix = member[: match.start(1) - match.start(0)]
+            fragments[prefix + value[:3] if value.startswith(b'"0x') else prefix] += 1
+            for run in ZERO_RUN.finditer(value):
+                fragments[run.group(0)] += 1
+
+    candidates: Counter = Counter()
+    for fragment, count in fragments.items():
+        if count > 1:
+            candidates[fragment] = (count - 1) * len(fragment)
+
+    chosen: List[bytes] = []
+    remaining = size
+    for fragment, _ in candidates.most_common():
+        if len(fragment) <= remaining:
+            chosen.append(fragment)
+            remaining -= len(fragment)
+        if remaining < 8:
+            break
+    return b"".join(reversed(chosen))
+
+
+def write_archive(filepath: str, entries: Iterable[Entry], zdict: bytes, level: int = 9) -> int:
+    """
+    Write (block number, uncle index, file content) entries, sorted by block and uncle index, to an archive.
+    Returns the number of entries.
+    """
+    index: List[Tuple[int, int, int, int]] = []
+    tmp_filepath = f"{filepath}.tmp"
+    with open(tmp_filepath, "wb") as f:
+        for num, uncle_index, content in entries:
+            if len(index) > 0 and (num, uncle_index) <= index[-1][:2]:
+                raise ValueError(f"Archive entries out of order at block {num} uncle {uncle_index}")
+            compressor = zlib.compressobj(level, zdict=zdict)
+            compressed = compressor.compress(content) + compressor.flush()
+            index.append((num, uncle_index, f.tell(), len(compressed)))
+            f.write(compressed)
+
+        index_offset = f.tell()
+        for entry in index:
+            f.write(ENTRY.pack(*entry))
+        dict_offset = f.tell()
+        f.write(zdict)
+        f.write(FOOTER.pack(index_offset, dict_offset, len(zdict), len(index), MAGIC))
+        f.flush()
+        os.fsync(f.fileno())
+
+    os.replace(tmp_filepath, filepath)
+    return len(index)
+
+
+# READER
+
+
+def cold_dirs() -> List[str]:
+    """
+    Where blocks go once they leave the hot cache: full archives, then the summaries of compacted blocks.
+    """
+    return [archive_dir(), summaries_dir()]
+
+
+def archive_filepaths(dirpath: Optional[str] = None) -> List[Tuple[int, int, str]]:
+    """
+    (first block, last block, path) of every archive, by first block.
+    """
+    dirpath = dirpath if dirpath is not None else archive_dir()
+    try:
+        dir_mtime = os.stat(dirpath).st_mtime_ns
+    except FileNotFoundError:
+        return []
+    return _archive_filepaths(dirpath, dir_mtime)
+
+
+@lru_cache(maxsize=4)
+def _archive_filepaths(dirpath: str, dir_mtime: int) -> List[Tuple[int, int, str]]:
+    archives = []
+    for filename in os.listdir(dirpath):
+        match = ARCHIVE_FILENAME_RE.match(filename)
+        if match is not None:
+            archives.append((int(match.group(1)), int(match.group(2)), os.path.join(dirpath, filename)))
+    return sorted(archives)
+
+
+_open_archives_lock = Lock()
+
+
+@lru_cache(maxsize=64)
+def _open_archive(filepath: str, mtime: int) -> BlockArchive:
+    return BlockArchive(filepath)
+
+
+def open_archive(filepath: str) -> BlockArchive:
+    with _open_archives_lock:
+        return _open_archive(filepath, os.stat(filepath).st_mtime_ns)
+
+
+def find_archive(num: int, dirpath: Optional[str] = None) -> Optional[BlockArchive]:
+    archives = archive_filepaths(dirpath)
+    i = bisect_right(archives, (num, float("inf"), "")) - 1
+    if i < 0 or archives[i][1] < num:
+        return None
+
+    filepath = archives[i][2]
+    try:
+        return open_archive(filepath)
+    except (OSError, ValueError) as e:
+        LOG.error(f"Could not open archive {filepath}: {e}")
+        return None
+
+
+def _find_cold(num: int, uncle_index: int) -> Optional[BlockArchive]:
+    for dirpath in cold_dirs():
+        archive = find_archive(num, dirpath)
+        if archive is not None and archive.contains(num, uncle_index):
+            return archive
+    return None
+
+
+def is_archived(num: int, uncle_index: int = BLOCK_INDEX) -> bool:
+    """
+    Whether the block or uncle is in an archive, or in the summaries of compacted blocks.
+    """
+    return _find_cold(num, uncle_index) is not None
+
+
+def read_archived(num: int, uncle_index: int = BLOCK_INDEX) -> Optional[bytes]:
+    archive = _find_cold(num, uncle_index)
+    if archive is None:
+        return None
+    try:
+        return archive.read(num, uncle_index)
+    except (OSError, zlib.error) as e:
+        LOG.error(f"Could not read block {num} from {archive.filepath}: {e}")
+        return None
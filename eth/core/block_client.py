@@ -0,0 +1,76 @@
+import json
+from logging import getLogger
+from threading import Lock
+from typing import Any, Dict, Optional
+
+import requests
+
+LOG = getLogger(__name__)
+
+# blocks fetched ahead of the one asked for, readers mostly go through blocks in order
+PREFETCH_BLOCKS = 1000
+
+
+class BlockClient:
+    """
+    Reads cached blocks from a bin/run_block_server.py on another host, in place of the local block files.
+
+    A miss fetches the block together with the next `prefetch` ones in one streamed request, so reading blocks
+    in order costs one request per `prefetch` blocks. Blocks the server does not have yet read as None.
+    """
+
+    def __init__(self, url: str, prefetch: int = PREFETCH_BLOCKS, timeout_sec: float = 10):
+        self._url = url.rstrip("/")
+        self._prefetch = prefetch
+        self._timeout_sec = timeout_sec
+        self._session = requests.Session()
+        self._lock = Lock()
+        self._buffer: Dict[int, Dict[str, Any]] = {}
+
+    @property
+    def url(self) -> str:
+        return self._url
+
+    def read_block_json(self, num: int) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            content = self._buffer.get(num)
+            if content is None:
+                self._buffer = self._fetch(num, num + self._prefetch - 1, wait=0)
+                content = self._buffer.get(num)
+            return content
+
+    def wait_block_json(self, num: int, timeout: float) -> Optional[Dict[str, Any]]:
+        """
+        JSON of block `num`, long-polling the server up to `timeout` seconds for it to be cached.
+        """
+        with self._lock:
+            content = self._buffer.get(num)
+            if content is None:
+                self._buffer = self._fetch(num, num + self._prefetch - 1, wait=timeout)
+                content = self._buffer.get(num)
+            return content
+
+    def status(self) -> Dict[str, Any]:
+        response = self._session.get(f"{self._url}/status", timeout=self._timeout_sec)
+        response.raise_for_status()
+        return response.json()
+
+    def _fetch(self, start: int, end: int, wait: float) -> Dict[int, Dict[str, Any]]:
+        params = {"start": start, "end": end, "wait": int(wait)}
+        blocks: Dict[int, Dict[str, Any]] = {}
+        try:
+            with self._session.get(
+                f"{self._url}/blocks", params=params, stream=True, timeout=self._timeout_sec + wait
+            ) as response:
+                if response.status_code != 200:
+                    LOG.error(f"Block server {self._url}: status code: {response.status_code}, {response.text}")
+                    return blocks
+                # requests undoes the gzip encoding
+                for line in response.iter_lines():
+                    if len(line) > 0:
+                        content = json.loads(line)
+                        blocks[int(content["number"], 16)] = content
+        except (requests.RequestException, ValueError) as e:
+            # the blocks read before the failure are kept, the rest are asked for again
+            LOG.warning(f"Block server {self._url}: blocks {start}-{end}: {e}")
+        return blocks
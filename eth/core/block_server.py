@@ -0,0 +1,218 @@
+import itertools
+import json
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from logging import getLogger
+from threading import Condition, Event, Thread
+from typing import Any, Dict, Iterator, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+from eth.core.block_writer import Availability, read_availability
+from eth.core.reader import read_block_json
+
+LOG = getLogger(__name__)
+
+# blocks per /blocks request
+MAX_RANGE = 10_000
+# longest a /blocks request waits for its first block
+MAX_WAIT_SEC = 60
+# blocks per chunk of a streamed response
+CHUNK_BLOCKS = 100
+# how often the server re-reads the writer's availability record
+POLL_SEC = 0.2
+
+
+class BlockServerError(Exception):
+    pass
+
+
+def _int(params: Dict[str, str], name: str, default: Optional[int] = None) -> int:
+    if name not in params:
+        if default is None:
+            raise BlockServerError(f"{name} is required")
+        return default
+    try:
+        return int(params[name])
+    except ValueError:
+        raise BlockServerError(f"Invalid {name}: {params[name]}")
+
+
+class BlockStore:
+    """
+    Cached blocks as seen by the server. One thread follows the block writer's availability record, so any
+    number of waiting requests cost a single file read per poll.
+    """
+
+    def __init__(self, poll_sec: float = POLL_SEC):
+        self._poll_sec = poll_sec
+        self._changed = Condition()
+        self._availability: Availability = read_availability()
+        self._stopped = Event()
+        self._thread = Thread(target=self._run, name="block-store", daemon=True)
+
+    @property
+    def availability(self) -> Availability:
+        with self._changed:
+            return self._availability
+
+    def start(self) -> "BlockStore":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stopped.set()
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self._poll_sec):
+            availability = read_availability()
+            with self._changed:
+                if availability != self._availability:
+                    self._availability = availability
+                    self._changed.notify_all()
+
+    def wait(self, num: int, timeout: float) -> Optional[Dict[str, Any]]:
+        """
+        JSON of block `num`, waiting up to `timeout` seconds for it to be cached.
+        """
+        deadline = time.time() + timeout
+        while True:
+            content = self._read(num)
+            remaining = deadline - time.time()
+            if content is not None or remaining <= 0:
+                return content
+            with self._changed:
+                # blocks written without an availability record are found on the next poll
+                self._changed.wait_for(lambda: self._availability.contains(num), timeout=min(remaining, 1.0))
+
+    def _read(self, num: int) -> Optional[Dict[str, Any]]:
+        try:
+            return read_block_json(num)
+        except ValueError as e:
+            # left for the puller or bin/run_verify_cache.py to repair, served as not cached
+            LOG.warning(f"Erroneous cached block {num}: {e}")
+            return None
+
+    def blocks(self, start: int, end: int, wait: float = 0) -> Iterator[Dict[str, Any]]:
+        """
+        JSON of the cached blocks from `start` up to `end`, stopping at the first one not cached. Waits up to
+        `wait` seconds for `start`.
+        """
+        first = self.wait(start, wait) if wait > 0 else self._read(start)
+        if first is None:
+            return
+        yield first
+        for num in range(start + 1, end + 1):
+            content = self._read(num)
+            if content is None:
+                return
+            yield content
+
+
+class BlockServer:
+    """
+    Read-only HTTP server in front of the block cache, so processors and analytics jobs on other hosts read
+    from one puller without sharing its volume.
+
+    /blocks?start=&end=&wait= streams a range as one compact JSON line per block, gzipped when the client
+    accepts it. The range stops at the first block not cached. With `wait`, the request long-polls up to that
+    many seconds for `start` to be written. /status is the writer's availability record.
+    """
+
+    def __init__(self, store: BlockStore, host: str = "127.0.0.1", port: int = 8560):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # chunked responses need HTTP/1.1
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+                try:
+                    if url.path == "/blocks":
+                        server._blocks(self, params)
+                    elif url.path == "/status":
+                        self._respond(200, server._status())
+                    else:
+                        self._respond(404, {"error": f"Unknown path {url.path}, expected /blocks or /status"})
+                except BlockServerError as e:
+                    self._respond(400, {"error": str(e)})
+                except (BrokenPipeError, ConnectionResetError):
+                    LOG.debug(f"Client went away during {self.path}")
+                except Exception as e:
+                    LOG.exception(f"Request {self.path} failed")
+                    self._respond(500, {"error": repr(e)})
+
+            def _respond(self, status: int, body: Any) -> None:
+                content = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            def log_message(self, format, *args):
+                LOG.debug(format % args)
+
+        self._store = store
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def serve_forever(self) -> None:
+        self._server.serve_forever()
+
+    def shutdown(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _status(self) -> Dict[str, Any]:
+        availability = self._store.availability
+        return {
+            "first_block": availability.first_block,
+            "durable_block": availability.durable_block,
+            "ranges": availability.ranges,
+            "head": availability.head,
+        }
+
+    def _blocks(self, handler: BaseHTTPRequestHandler, params: Dict[str, str]) -> None:
+        start = _int(params, "start")
+        end = _int(params, "end", default=start)
+        wait = min(_int(params, "wait", default=0), MAX_WAIT_SEC)
+        if end < start or end - start + 1 > MAX_RANGE:
+            raise BlockServerError(f"Invalid block range {start}-{end}, at most {MAX_RANGE} blocks")
+
+        gzipped = "gzip" in handler.headers.get("Accept-Encoding", "")
+        blocks = self._store.blocks(start, end, wait=wait)
+        # wait for the first block before answering, so the response never stalls once it has started
+        first = next(blocks, None)
+
+        handler.send_response(200)
+        handler.send_header("Content-Type", "application/x-ndjson")
+        handler.send_header("Transfer-Encoding", "chunked")
+        if gzipped:
+            handler.send_header("Content-Encoding", "gzip")
+        handler.end_headers()
+
+        compressor = zlib.compressobj(wbits=31) if gzipped else None
+        lines: List[bytes] = []
+        for content in itertools.chain([first] if first is not None else [], blocks):
+            lines.append(json.dumps(content, separators=(",", ":")).encode() + b"\n")
+            if len(lines) >= CHUNK_BLOCKS:
+                self._write_chunk(handler, b"".join(lines), compressor)
+                lines = []
+        self._write_chunk(handler, b"".join(lines), compressor)
+        if compressor is not None:
+            self._write_chunk(handler, compressor.flush(), None)
+        handler.wfile.write(b"0\r\n\r\n")
+
+    def _write_chunk(self, handler: BaseHTTPRequestHandler, data: bytes, compressor: Optional[Any]) -> None:
+        if compressor is not None:
+            data = compressor.compress(data)
+        if len(data) > 0:
+            handler.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
@@ -0,0 +1,295 @@
+import json
+import os
+import time
+from dataclasses import asdict, dataclass
+from logging import getLogger
+from queue import Empty, Queue
+from threading import Condition, Thread
+from typing import Any, Dict, List, Optional, Set, Tuple, Union
+
+from eth.core.writer import block_json_bytes, uncle_block_json_str
+from eth.types.block import DetailedBlock, UncleBlock
+from eth.utils.file_utils import (
+    available_blocks_filepath,
+    block_filepath,
+    blocks_dir,
+    durable_block_filepath,
+    uncle_block_filepath,
+)
+
+LOG = getLogger(__name__)
+
+Item = Tuple[Union[DetailedBlock, UncleBlock], bool]
+
+
+class BlockWriter:
+    """
+    Writes blocks and uncles to the cache on a background thread, in the order they were submitted.
+
+    Writes are group-committed: everything queued when the writer wakes up (up to `max_batch` items) is
+    written to temporary files, fsynced and renamed into place, followed by a single fsync of the blocks
+    directory. Readers only ever see complete files. After each batch the high-water mark, the highest block
+    such that it and every block from `first_block` up to it are on disk, is recorded in `durable_block` and
+    in the blocks directory together with the block it counts from, so a restarted puller knows how far the
+    cache is known to be complete. A recorded mark is only carried on when `first_block` follows it. The blocks
+    written above the mark are recorded with it, for consumers that only need the newest blocks.
+
+    Submitting blocks when `max_pending` writes are queued waits for the writer to catch up. A batch that
+    cannot be written stops the writer, and its error is raised by the next write_block(), flush() or close().
+    """
+
+    def __init__(
+        self,
+        first_block: Optional[int] = None,
+        max_pending: int = 1000,
+        max_batch: int = 256,
+        max_delay_sec: float = 0.05,
+        record: bool = True,
+    ):
+        self._queue: "Queue[Optional[Item]]" = Queue(maxsize=max_pending)
+        self._max_batch = max_batch
+        self._max_delay_sec = max_delay_sec
+        self._thread: Thread = Thread(target=self._run, name="block-writer", daemon=True)
+
+        # workers of a distributed backfill share the blocks directory, their leases record the progress instead
+        self._record = record
+        self._durable = Condition()
+        durable: Optional[Tuple[int, int]] = read_durable_range() if record else None
+        if first_block is not None and (durable is None or not durable[0] <= first_block <= durable[1] + 1):
+            # nothing tells whether the blocks between the recorded mark and first_block are on disk
+            if durable is not None:
+                LOG.warning(
+                    f"Blocks {durable[1] + 1}-{first_block - 1} may be missing, durable blocks from {first_block}"
+                )
+            durable = (first_block, first_block - 1)
+        # first block the high-water mark counts from
+        self._first_block: Optional[int] = durable[0] if durable is not None else None
+        self._durable_block: Optional[int] = durable[1] if durable is not None else None
+        # written blocks above the high-water mark, waiting for the gap below them to fill
+        self._written: Set[int] = set()
+        self._error: Optional[Exception] = None
+
+    @property
+    def durable_block(self) -> Optional[int]:
+        """
+        Highest block number whose file, and the files of every block from `first_block` to it, are on disk.
+        """
+        with self._durable:
+            return self._durable_block
+
+    def start(self) -> "BlockWriter":
+        self._thread.start()
+        return self
+
+    def write_block(self, block: DetailedBlock, warn_overwrite: bool = False) -> None:
+        self._raise_error()
+        self._queue.put((block, warn_overwrite))
+
+    def write_uncle_block(self, uncle_block: UncleBlock, warn_overwrite: bool = False) -> None:
+        self._raise_error()
+        self._queue.put((uncle_block, warn_overwrite))
+
+    def wait_durable(self, num: int, timeout: Optional[float] = None) -> bool:
+        with self._durable:
+            return self._durable.wait_for(
+                lambda: self._durable_block is not None and self._durable_block >= num, timeout=timeout
+            )
+
+    def flush(self) -> None:
+        """
+        Wait until everything submitted so far is written.
+        """
+        self._queue.join()
+        self._raise_error()
+
+    def close(self) -> None:
+        """
+        Write everything submitted so far and stop.
+        """
+        self._queue.put(None)
+        self._thread.join()
+        self._raise_error()
+
+    def _raise_error(self) -> None:
+        if self._error is not None:
+            raise self._error
+
+    def _run(self) -> None:
+        os.makedirs(blocks_dir(), exist_ok=True)
+        stopping = False
+        while not stopping:
+            batch: List[Item] = []
+            item = self._queue.get()
+            deadline = time.time() + self._max_delay_sec
+            while item is not None:
+                batch.append(item)
+                if len(batch) >= self._max_batch:
+                    break
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.time()))
+                except Empty:
+                    break
+            stopping = item is None
+
+            # after a failed batch the rest is dropped, the blocks above it would never become durable
+            if len(batch) > 0 and self._error is None:
+                try:
+                    self._commit(batch)
+                except Exception as e:
+                    LOG.exception(f"Stop writing blocks, could not write {len(batch)} blocks: {e}")
+                    self._error = e
+            for _ in range(len(batch) + (1 if stopping else 0)):
+                self._queue.task_done()
+
+    def _commit(self, batch: List[Item]) -> None:
+        renames: List[Tuple[str, str]] = []
+        block_nums: List[int] = []
+        for block, warn_overwrite in batch:
+            if isinstance(block, UncleBlock):
+                filepath = uncle_block_filepath(block.mined_block_num, block.uncle_index)
+                content = uncle_block_json_str(block)
+            else:
+                filepath = block_filepath(block.number)
+                content = block_json_bytes(block)
+                block_nums.append(block.number)
+
+            if warn_overwrite and os.path.exists(filepath):
+                LOG.warning(f"Overwrite block {block.number} to {filepath}")
+            tmp_filepath = f"{filepath}.tmp"
+            _write_synced(tmp_filepath, content)
+            renames.append((tmp_filepath, filepath))
+
+        for tmp_filepath, filepath in renames:
+            os.replace(tmp_filepath, filepath)
+
+        durable = self._advance(block_nums) if self._record else None
+        if durable is not None and self._record:
+            write_durable_block(self._first_block, durable)
+        if len(block_nums) > 0 and self._record:
+            availability = Availability(
+                durable if durable is not None else self.durable_block, self._ranges(), first_block=self._first_block
+            )
+            tmp_filepath = f"{available_blocks_filepath()}.tmp"
+            _write_synced(tmp_filepath, json.dumps(asdict(availability)))
+            os.replace(tmp_filepath, available_blocks_filepath())
+
+        # one directory sync makes every rename in the batch durable
+        dir_fd = os.open(blocks_dir(), os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+        if durable is not None:
+            with self._durable:
+                self._durable_block = durable
+                self._durable.notify_all()
+        if len(block_nums) > 0:
+            LOG.info(f"Write {len(batch)} blocks and uncles up to block {max(block_nums)} durable={self.durable_block}")
+
+    def _advance(self, block_nums: List[int]) -> Optional[int]:
+        """
+        High-water mark once `block_nums` are on disk, None if it does not move.
+        """
+        with self._durable:
+            durable = self._durable_block
+        if durable is None:
+            if len(block_nums) == 0:
+                return None
+            durable = min(block_nums) - 1
+            self._first_block = min(block_nums)
+
+        self._written.update(n for n in block_nums if n > durable)
+        advanced = durable
+        while advanced + 1 in self._written:
+            advanced += 1
+            self._written.remove(advanced)
+        return advanced if advanced != self._durable_block else None
+
+    def _ranges(self) -> List[Tuple[int, int]]:
+        """
+        Runs of consecutive blocks written above the high-water mark, newest first.
+        """
+        ranges: List[Tuple[int, int]] = []
+        for num in sorted(self._written, reverse=True):
+            if len(ranges) > 0 and ranges[-1][0] == num + 1:
+                ranges[-1] = (num, ranges[-1][1])
+            else:
+                ranges.append((num, num))
+        return ranges
+
+
+@dataclass
+class Availability:
+    """
+    Blocks on disk: every block from `first_block` through `durable_block`, plus the `ranges` (first, last) written
+    above it, newest first, e.g. the chain head pulled while the history below it is still being backfilled.
+    """
+
+    durable_block: Optional[int]
+    ranges: List[Tuple[int, int]]
+    first_block: Optional[int] = None
+
+    @property
+    def head(self) -> Optional[int]:
+        return self.ranges[0][1] if len(self.ranges) > 0 else self.durable_block
+
+    def contains(self, num: int) -> bool:
+        if self.first_block is not None and self.first_block <= num <= self.durable_block:
+            return True
+        return any(first <= num <= last for first, last in self.ranges)
+
+
+def read_availability() -> Availability:
+    """
+    Blocks the puller has made available, recorded after each batch it writes.
+    """
+    try:
+        with open(available_blocks_filepath(), "r") as f:
+            content: Dict[str, Any] = json.load(f)
+        return Availability(
+            content["durable_block"],
+            [(first, last) for first, last in content["ranges"]],
+            first_block=content.get("first_block"),
+        )
+    except (OSError, ValueError, KeyError):
+        durable = read_durable_range()
+        if durable is None:
+            return Availability(None, [])
+        return Availability(durable[1], [], first_block=durable[0])
+
+
+def read_durable_range() -> Optional[Tuple[int, int]]:
+    """
+    (first, last) blocks all on disk as recorded by the puller, None without a record.
+    """
+    try:
+        with open(durable_block_filepath(), "r") as f:
+            content: Dict[str, Any] = json.load(f)
+        return int(content["first_block"]), int(content["durable_block"])
+    except (OSError, ValueError, KeyError, TypeError):
+        # including the bare block number of earlier versions, which did not say where the blocks start
+        return None
+
+
+def read_durable_block(start: int) -> Optional[int]:
+    """
+    Highest block such that every block from `start` to it is on disk, None when the record does not cover `start`.
+    """
+    durable = read_durable_range()
+    if durable is None or not durable[0] <= start <= durable[1]:
+        return None
+    return durable[1]
+
+
+def write_durable_block(first_block: int, num: int) -> None:
+    tmp_filepath = f"{durable_block_filepath()}.tmp"
+    _write_synced(tmp_filepath, json.dumps({"first_block": first_block, "durable_block": num}))
+    os.replace(tmp_filepath, durable_block_filepath())
+
+
+def _write_synced(filepath: str, content: Union[str, bytes]) -> None:
+    with open(filepath, "wb" if isinstance(content, bytes) else "w") as f:
+        f.write(content)
+        f.flush()
+        os.fsync(f.fileno())
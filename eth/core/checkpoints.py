@@ -0,0 +1,22 @@
+from decimal import Decimal
+from typing import Dict
+
+from potpourri.python.ethereum.constants import LONDON
+
+CHECKPOINT_1 = 13233800
+CHECKPOINT_2 = 13596500
+CHECKPOINT_3 = 13648000
+CHECKPOINT_4 = 14000000
+CHECKPOINT_5 = 14100000
+CHECKPOINT_6 = 15000000
+CHECKPOINT_7 = 15080000
+BURNED_ETH: Dict[int, Decimal] = {
+    LONDON: Decimal(0),
+    CHECKPOINT_1: Decimal("301720.664913446243502258"),
+    CHECKPOINT_2: Decimal("848916.085936463748695936"),
+    CHECKPOINT_3: Decimal("949398.242163151858483080"),
+    CHECKPOINT_4: Decimal("1487958.407215919376807183"),
+    CHECKPOINT_5: Decimal("1688489.510719468494472673"),
+    CHECKPOINT_6: Decimal("2470957.033914244745381122"),
+    CHECKPOINT_7: Decimal("2512085.166061214922158636"),
+}
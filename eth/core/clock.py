@@ -0,0 +1,33 @@
+import time
+from datetime import datetime
+
+
+class Clock:
+    """
+    Wall clock the processor reads to tell live blocks from old ones and when a period has ended.
+    """
+
+    def time(self) -> float:
+        return time.time()
+
+    def now(self) -> datetime:
+        return datetime.fromtimestamp(self.time())
+
+
+class SimulatedClock(Clock):
+    """
+    Clock driven by the replay instead of the wall, e.g. set to each block's timestamp as it is fed in.
+    It never goes back, a block mined earlier than the last one leaves it where it is.
+    """
+
+    def __init__(self, start: float):
+        self._time: float = start
+
+    def time(self) -> float:
+        return self._time
+
+    def set(self, timestamp: float) -> None:
+        self._time = max(self._time, timestamp)
+
+    def advance(self, seconds: float) -> None:
+        self.set(self._time + seconds)
@@ -1,61 +1,133 @@
 import json
+import re
 import time
 from logging import getLogger
-from typing import Any, Dict, List, Union
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 
 import requests
 
-from eth.types.block import Block, UncleBlock
+from eth.core.throttle import RequestController
+from eth.types.block import Block, PulledBlock, UncleBlock
 
 URL = "https://mainnet.infura.io/v3/"
+# JSON-RPC error code for a method the node does not implement
+METHOD_NOT_FOUND = -32601
+# JSON-RPC error code Infura and others answer once a rate limit or quota is exceeded
+LIMIT_EXCEEDED = -32005
+# Infura's free plan
+INFURA_REQUESTS_PER_SEC = 10
+INFURA_DAILY_BUDGET = 100_000
 
 LOG = getLogger(__name__)
 
+# "result" of a JSON-RPC response, which geth and Infura send after "jsonrpc" and "id"
+RESULT_MEMBER = re.compile(rb'"result"\s*:')
+
+
+def raw_result(content: bytes) -> Optional[bytes]:
+    """
+    Bytes of the object in the "result" member of a response, found without parsing it again. None unless
+    "result" is the last member of the response and holds an object.
+    """
+    match = RESULT_MEMBER.search(content)
+    id_pos = content.find(b'"id"')
+    if match is None or not 0 <= id_pos < match.start():
+        return None
+    end = content.rfind(b"}")
+    raw = content[match.end() : end].strip()
+    if not (raw.startswith(b"{") and raw.endswith(b"}")):
+        return None
+    return raw
+
 
 class EthereumClient:
-    def __init__(self, url: str):
+    def __init__(self, url: str, controller: Optional[RequestController] = None):
         self._url = url
-
-    def retry_post(self, data: Dict[str, Any], attempts: int = 10):
+        # unknown until the first eth_getBlockReceipts answer
+        self._block_receipts_supported: Optional[bool] = None
+        # paces requests to the endpoint's capacity and quota, unpaced when None
+        self._controller: Optional[RequestController] = controller
+
+    def _post(self, data: Union[Dict[str, Any], List[Dict[str, Any]]]) -> requests.Response:
+        return self._controlled(lambda: requests.post(self._url, json=data, timeout=10), data)
+
+    def _controlled(
+        self, post: Callable[[], requests.Response], data: Union[Dict[str, Any], List[Dict[str, Any]]]
+    ) -> requests.Response:
+        if self._controller is None:
+            return post()
+
+        # every call of a batch counts against rate limits and quotas
+        self._controller.acquire(cost=len(data) if isinstance(data, list) else 1)
+        start = time.time()
+        response: Optional[requests.Response] = None
+        try:
+            response = post()
+            return response
+        finally:
+            self._controller.release(time.time() - start, response)
+
+    def batch_size(self, limit: int) -> int:
+        """
+        Calls per batch request, at most `limit`, fewer while the endpoint is throttling.
+        """
+        return min(limit, self._controller.batch_size) if self._controller is not None else limit
+
+    def _parse(self, response: requests.Response, attempt: int = 0) -> Optional[Any]:
+        """
+        JSON of a successful response, None if it failed. The only place a response is parsed.
+        """
+        if response.status_code != 200:
+            LOG.error(f"[Attempt: {attempt+1}] status code: {response.status_code}, reason: {response.status_code}")
+            return None
+
+        response_json = json.loads(response.content)
+
+        # read response, every response of a batch must succeed
+        for item in response_json if isinstance(response_json, list) else [response_json]:
+            if "error" in item:
+                code = item["error"]["code"]
+                message = item["error"]["message"]
+                LOG.error(f'Error code "{code}", message: "{message}"')
+                if code == LIMIT_EXCEEDED and self._controller is not None:
+                    self._controller.throttle()
+                return None
+
+            elif "result" not in item:
+                LOG.error(f"Malformed response JSON missing 'result' field:")
+                LOG.error(f"{item}")
+                return None
+
+        return response_json
+
+    def retry_post(
+        self, data: Union[Dict[str, Any], List[Dict[str, Any]]], attempts: int = 10
+    ) -> Tuple[requests.Response, Optional[Any]]:
+        """
+        Last response and its JSON, None if every attempt failed.
+        """
         backoff_sec = 1
         response = None
         for i in range(attempts):
             if i > 0:
                 time.sleep(backoff_sec)
 
-            response = requests.post(self._url, json=data, timeout=10)
-
-            # parse JSON response
-            if response.status_code != 200:
-                LOG.error(f"[Attempt: {i+1}] status code: {response.status_code}, reason: {response.status_code}")
-
-            else:
-                response_json = json.loads(response.content)
-
-                # read response
-                if "error" in response_json:
-                    code = response_json["error"]["code"]
-                    message = response_json["error"]["message"]
-                    LOG.error(f'Error code "{code}", message: "{message}"')
-
-                elif "result" not in response_json:
-                    LOG.error(f"Malformed response JSON missing 'result' field:")
-                    LOG.error(f"{response_json}")
-                else:
-                    return response
+            response = self._post(data)
+            response_json = self._parse(response, attempt=i)
+            if response_json is not None:
+                return response, response_json
 
             backoff_sec = backoff_sec * 1.5
 
-        return response
+        return response, None
 
     def _params(self, method: str, params: List[str]) -> Dict[str, Union[str, int, List[str]]]:
         return {"jsonrpc": "2.0", "method": method, "params": params, "id": 1}
 
     def eth_blockNumber(self) -> int:
         params = self._params("eth_blockNumber", [])
-        r = self.retry_post(params)
-        if r.status_code == 200:
-            content_dict = json.loads(r.content)
+        r, content_dict = self.retry_post(params)
+        if content_dict is not None:
             return int(content_dict["result"], 16)
         else:
             raise IOError(f"status code: {r.status_code}, reason: {r.status_code}")
@@ -67,14 +139,13 @@ class EthereumClient:
             "params": [hex(num), False],
             "id": 1,
         }
-        r = self.retry_post(params)
-        if r.status_code == 200:
-            block_dict = json.loads(r.content)
+        r, block_dict = self.retry_post(params)
+        if block_dict is not None:
             if "baseFeePerGas" not in block_dict["result"]:
                 LOG.error("Unexpected response:")
                 LOG.error(f"{block_dict}")
-            block = Block(block_dict["result"])
-            return block
+            # the node's bytes of the block are cached as they are
+            return PulledBlock(block_dict["result"], raw=raw_result(r.content))
         else:
             raise IOError(f"status code: {r.status_code}, reason: {r.status_code}")
 
@@ -85,9 +156,8 @@ class EthereumClient:
             "params": [hex(num)],
             "id": 1,
         }
-        r = self.retry_post(params)
-        if r.status_code == 200:
-            content_dict = json.loads(r.content)
+        r, content_dict = self.retry_post(params)
+        if content_dict is not None:
             val: int = int(content_dict["result"], 16)
             return val
         else:
@@ -95,9 +165,8 @@ class EthereumClient:
 
     def eth_getUncleByBlockNumberAndIndex(self, num: int, index) -> UncleBlock:
         params = self._params("eth_getUncleByBlockNumberAndIndex", [hex(num), hex(index)])
-        r = self.retry_post(params)
-        if r.status_code == 200:
-            block_dict = json.loads(r.content)
+        r, block_dict = self.retry_post(params)
+        if block_dict is not None:
             try:
                 block = UncleBlock(block_dict["result"], num, index)
             except:
@@ -108,12 +177,71 @@ class EthereumClient:
         else:
             raise IOError(f"status code: {r.status_code}, reason: {r.status_code}")
 
+    def eth_getBlockReceipts(self, num: int) -> Optional[List[Dict[str, Any]]]:
+        """
+        Receipts of every transaction in the block, None if the node does not implement eth_getBlockReceipts.
+        """
+        if self._block_receipts_supported is False:
+            return None
+
+        params = self._params("eth_getBlockReceipts", [hex(num)])
+        content_dict = None
+        if self._block_receipts_supported is None:
+            # probe once, an unsupported method is not worth retrying
+            error = None
+            try:
+                r, content_dict = self.retry_post(params, attempts=1)
+                if content_dict is None:
+                    error = json.loads(r.content).get("error")
+            except (requests.RequestException, ValueError, AttributeError):
+                pass
+            if error is not None and error.get("code") == METHOD_NOT_FOUND:
+                LOG.warning(f"eth_getBlockReceipts not supported, fall back to eth_getTransactionReceipt")
+                self._block_receipts_supported = False
+                return None
+            self._block_receipts_supported = True
+
+        if content_dict is None:
+            r, content_dict = self.retry_post(params)
+        if content_dict is not None:
+            receipts = content_dict["result"]
+            if receipts is None:
+                raise IOError(f"No receipts for block {num}")
+            return receipts
+        else:
+            raise IOError(f"status code: {r.status_code}, reason: {r.status_code}")
+
+    def eth_getTransactionReceipts(self, tx_hashes: List[str]) -> List[Dict[str, Any]]:
+        """
+        Receipts of `tx_hashes` in one batch request.
+        """
+        if len(tx_hashes) == 0:
+            return []
+        params = [{**self._params("eth_getTransactionReceipt", [h]), "id": i} for i, h in enumerate(tx_hashes)]
+        r, content = self.retry_post(params)
+        if content is not None:
+            responses = sorted(content, key=lambda response: response["id"])
+            receipts = [response["result"] for response in responses]
+            if len(receipts) != len(tx_hashes) or any(receipt is None for receipt in receipts):
+                raise IOError(f"Missing receipts for {len(tx_hashes)} transactions")
+            return receipts
+        else:
+            raise IOError(f"status code: {r.status_code}, reason: {r.status_code}")
+
 
 class InfuraClient(EthereumClient):
-    def __init__(self, project_id: str):
-        super().__init__(f"{URL}{project_id}")
+    def __init__(
+        self,
+        project_id: str,
+        requests_per_sec: Optional[float] = INFURA_REQUESTS_PER_SEC,
+        daily_budget: Optional[int] = INFURA_DAILY_BUDGET,
+    ):
+        super().__init__(
+            f"{URL}{project_id}",
+            controller=RequestController(requests_per_sec=requests_per_sec, daily_budget=daily_budget),
+        )
 
 
 class GethClient(EthereumClient):
-    def __init__(self, ip_addr: str = "localhost", port: int = 8545):
-        super().__init__(f"http://{ip_addr}:{port}")
+    def __init__(self, ip_addr: str = "localhost", port: int = 8545, controller: Optional[RequestController] = None):
+        super().__init__(f"http://{ip_addr}:{port}", controller=controller)
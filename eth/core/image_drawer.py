@@ -3,7 +3,7 @@ from decimal import Decimal
 from logging import getLogger
 
 from eth.core.writer import calc_inflation_rate, to_billion_usd
-from eth.types.block import AggregateBlockMetrics, DayAggregateBlockMetrics, HourlyAggregateBlockMetrics
+from eth.types.block import DayAggregateBlockMetrics, PeriodAggregateBlockMetrics
 
 LOG = getLogger(__name__)
 
@@ -16,10 +16,9 @@ def hour_str(hour: datetime, delimiter="T") -> str:
     return hour.strftime(f"%Y-%m-%d{delimiter}%H:%M%Z")
 
 
-def make_svg(metrics: AggregateBlockMetrics, eth_price_usd: Decimal) -> str:
-    is_hourly = isinstance(metrics, HourlyAggregateBlockMetrics)
-    report_name = f"{'Hourly' if is_hourly else 'Daily'} Report"
-    time_str = metrics.hour_range_str(delimiter=" ") if is_hourly else metrics.day_range_str(delimiter=" ")
+def make_svg(metrics: PeriodAggregateBlockMetrics, eth_price_usd: Decimal) -> str:
+    report_name = f"{metrics.report_name} Report"
+    time_str = metrics.time_range_str(delimiter=" ")
 
     graph_bar_width = 120
     graph_height = 400
@@ -56,6 +55,17 @@ def make_svg(metrics: AggregateBlockMetrics, eth_price_usd: Decimal) -> str:
     graph_net_change_height = graph_height - graph_burned_height  # transparent when negative
     graph_end_y = graph_start_y + graph_height
 
+    # per-block BASEFEE and gas used ratio percentiles, when the metrics were aggregated from the blocks
+    fee_stats_svg: str = ""
+    if metrics.fee_sketches is not None:
+        base_fees = " / ".join(f"{metrics.base_fee_gwei(q):,.0f}" for q in [0.1, 0.5, 0.9, 1])
+        gas_ratios = " / ".join(f"{100 * metrics.gas_used_ratio(q):.0f}%" for q in [0.1, 0.5, 0.9, 1])
+        fee_stats_svg = f"""
+    <text x="800" y="{graph_start_y + 180}" class="txt small" text-anchor="middle">BASEFEE p10 / p50 / p90 / max</text>
+    <text x="800" y="{graph_start_y + 214}" class="txt medium" text-anchor="middle">{base_fees} gwei</text>
+    <text x="800" y="{graph_start_y + 270}" class="txt small" text-anchor="middle">Gas Used p10 / p50 / p90 / max</text>
+    <text x="800" y="{graph_start_y + 304}" class="txt medium" text-anchor="middle">{gas_ratios}</text>"""
+
     text_color: str = "white"
     bar_radius_issuance: int = 0
     bar_radius_burn: int = 0
@@ -279,6 +289,7 @@ def make_svg(metrics: AggregateBlockMetrics, eth_price_usd: Decimal) -> str:
           class="txt inflation{'' if inflation_pct > 0 else ' deflationary'}"
           text-anchor="middle"
           style="dominant-baseline: middle">{'+' if inflation_pct > 0 else ''}{inflation_pct:,.2f}%</text>
+{fee_stats_svg}
 
     <!-- Cumlative Burn graphic -->
     <svg viewBox="0 0 150 75">
@@ -0,0 +1,246 @@
+import csv
+import gzip
+import json
+import os
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from itertools import islice
+from logging import getLogger
+from typing import IO, Any, Deque, Dict, Iterator, List, Optional, Tuple
+
+from eth.core.archive import BLOCK_INDEX
+from eth.core.reader import read_block_json
+from eth.core.verifier import CacheProblem
+from eth.core.writer import block_json_bytes, uncle_block_json_str
+from eth.types.block import Block, DetailedBlock, UncleBlock
+from eth.utils.file_utils import block_filepath, uncle_block_filepath
+
+LOG = getLogger(__name__)
+
+JSONL = "jsonl"
+CSV = "csv"
+
+# CSV columns holding a quantity, decimal or 0x-prefixed, cached as hex like the node sends them
+QUANTITY_COLUMNS = {"number", "timestamp", "gas_used", "gas_limit", "base_fee_per_gas", "difficulty", "size"}
+# CSV columns holding a ;-separated list of hashes
+LIST_COLUMNS = {"transactions", "uncles"}
+# columns that are not part of the block itself
+PRIORITY_FEES_COLUMN = "priority_fees"
+UNCLE_COLUMNS = {"block_number", "uncle_index"}
+
+Uncles = Dict[int, List[Dict[str, Any]]]
+
+
+@dataclass
+class ChunkResult:
+    """
+    Blocks written from one chunk of the dump, with what is needed to check continuity across chunks.
+    """
+
+    first: Optional[int] = None
+    last: Optional[int] = None
+    first_parent_hash: Optional[str] = None
+    last_hash: Optional[str] = None
+    blocks: int = 0
+    uncles: int = 0
+    problems: List[CacheProblem] = field(default_factory=list)
+
+
+def open_dump(filepath: str) -> IO[str]:
+    if filepath.endswith(".gz"):
+        return gzip.open(filepath, "rt")
+    return open(filepath, "r")
+
+
+def dump_format(filepath: str) -> str:
+    name = filepath[: -len(".gz")] if filepath.endswith(".gz") else filepath
+    return CSV if name.endswith(".csv") else JSONL
+
+
+def _camel(column: str) -> str:
+    head, *rest = column.split("_")
+    return head + "".join(part.title() for part in rest)
+
+
+def _quantity(value: str) -> str:
+    return value if value.startswith("0x") else hex(int(value))
+
+
+def csv_record(row: Dict[str, str]) -> Dict[str, Any]:
+    """
+    A CSV row of the documented schema as the block (or uncle) JSON of the node.
+    """
+    record: Dict[str, Any] = {}
+    for column, value in row.items():
+        if column in UNCLE_COLUMNS or column == PRIORITY_FEES_COLUMN or value is None:
+            continue
+        if column in QUANTITY_COLUMNS:
+            record[_camel(column)] = _quantity(value)
+        elif column in LIST_COLUMNS:
+            record[column] = [h for h in value.split(";") if h != ""]
+        else:
+            record[_camel(column)] = value
+    return record
+
+
+def read_csv_uncles(filepath: str) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """
+    (mined block number, uncle JSON) of an uncles CSV sorted by block_number and uncle_index.
+    """
+    with open_dump(filepath) as f:
+        for row in csv.DictReader(f):
+            yield int(row["block_number"]), csv_record(row)
+
+
+def _parse(line: str, fmt: str, header: Optional[List[str]], uncles: Uncles) -> Tuple[Dict, List, Optional[int]]:
+    if fmt == CSV:
+        row: Dict[str, str] = dict(zip(header, next(csv.reader([line]))))
+        data = csv_record(row)
+        tips = row.get(PRIORITY_FEES_COLUMN)
+        return data, uncles.get(int(data["number"], 16), []), int(tips) if tips not in (None, "") else None
+
+    data = json.loads(line)
+    uncle_blocks = data.pop("uncleBlocks", [])
+    tips = data.pop("__priority_fees", None)
+    # cache files of another deployment import as they are
+    for annotation in ["__uncle_count", "__uncle_reward", "__pulled_at"]:
+        data.pop(annotation, None)
+    return data, uncle_blocks, int(tips) if tips is not None else None
+
+
+def import_chunk(lines: List[str], fmt: str, header: Optional[List[str]], uncles: Uncles) -> ChunkResult:
+    """
+    Parse, check and write the blocks of a chunk of the dump, in a worker process.
+    """
+    result = ChunkResult()
+    prev: Optional[Tuple[int, str]] = None
+    for line in lines:
+        if line.strip() == "":
+            continue
+        try:
+            data, uncle_blocks, tips = _parse(line, fmt, header, uncles)
+            num = int(data["number"], 16)
+            block = DetailedBlock(
+                Block(data), [UncleBlock(u, num, i) for i, u in enumerate(uncle_blocks)], priority_fees=tips
+            )
+        except (ValueError, KeyError, TypeError) as e:
+            LOG.error(f"Skip malformed {fmt} record after block {prev[0] if prev else None}: {e}")
+            if prev is not None:
+                result.problems.append(CacheProblem(prev[0] + 1, BLOCK_INDEX, f"malformed record: {e}"))
+            prev = None
+            continue
+
+        if "uncles" in data and len(data["uncles"]) != len(uncle_blocks):
+            result.problems.append(
+                CacheProblem(num, BLOCK_INDEX, f"{len(uncle_blocks)} uncle records for {len(data['uncles'])} uncles")
+            )
+        if prev is not None and (prev[0] + 1 != num or prev[1] != data.get("parentHash")):
+            result.problems.append(CacheProblem(num, BLOCK_INDEX, f"does not follow block {prev[0]} {prev[1]}"))
+
+        for uncle in block._uncles:
+            _write(uncle_block_filepath(num, uncle.uncle_index), uncle_block_json_str(uncle).encode())
+        _write(block_filepath(num), block_json_bytes(block))
+
+        if result.first is None:
+            result.first, result.first_parent_hash = num, data.get("parentHash")
+        result.last, result.last_hash = num, data.get("hash")
+        result.blocks += 1
+        result.uncles += len(uncle_blocks)
+        prev = (num, data.get("hash"))
+    return result
+
+
+def _write(filepath: str, content: bytes) -> None:
+    os.makedirs(os.path.dirname(filepath), exist_ok=True)
+    tmp_filepath = f"{filepath}.tmp"
+    with open(tmp_filepath, "wb") as f:
+        f.write(content)
+    os.replace(tmp_filepath, filepath)
+
+
+@dataclass
+class ImportSummary:
+    first: Optional[int] = None
+    last: Optional[int] = None
+    blocks: int = 0
+    uncles: int = 0
+    problems: List[CacheProblem] = field(default_factory=list)
+
+
+def import_dump(
+    filepath: str,
+    uncles_filepath: Optional[str] = None,
+    workers: Optional[int] = None,
+    chunk_size: int = 5_000,
+) -> ImportSummary:
+    """
+    Write the blocks of a JSONL or CSV dump (see docs/import.md) to the cache.
+
+    The dump is streamed in chunks of `chunk_size` lines, parsed and written by a pool of processes with at most
+    two chunks per process in flight, so memory stays bounded whatever the size of the dump. Blocks must be in
+    order: numbers and `parentHash` are checked across the whole dump, and against the cached block before it.
+    """
+    fmt: str = dump_format(filepath)
+    if fmt == JSONL and uncles_filepath is not None:
+        raise ValueError("JSONL dumps carry their uncles in uncleBlocks, an uncles CSV only goes with a CSV dump")
+    summary = ImportSummary()
+    workers = workers if workers is not None else os.cpu_count()
+    csv_uncles: Optional[Iterator[Tuple[int, Dict[str, Any]]]] = (
+        read_csv_uncles(uncles_filepath) if uncles_filepath is not None else None
+    )
+    pending_uncle: Optional[Tuple[int, Dict[str, Any]]] = None
+
+    prev: Optional[Tuple[int, Optional[str]]] = None
+    in_flight: Deque[Future] = deque()
+
+    def collect(result: ChunkResult) -> None:
+        nonlocal prev
+        summary.problems.extend(result.problems)
+        if result.first is None:
+            return
+        if prev is None:
+            before = read_block_json(result.first - 1)
+            prev = (result.first - 1, before.get("hash")) if before is not None else None
+        if prev is not None and (prev[0] + 1 != result.first or prev[1] != result.first_parent_hash):
+            summary.problems.append(CacheProblem(result.first, BLOCK_INDEX, f"does not follow block {prev[0]}"))
+        prev = (result.last, result.last_hash)
+
+        summary.first = result.first if summary.first is None else summary.first
+        summary.last = result.last
+        summary.blocks += result.blocks
+        summary.uncles += result.uncles
+        LOG.info(f"Imported blocks up to {result.last} ({summary.blocks} blocks, {summary.uncles} uncles)")
+
+    with open_dump(filepath) as f, ProcessPoolExecutor(max_workers=workers) as executor:
+        header: Optional[List[str]] = next(csv.reader([f.readline()])) if fmt == CSV else None
+        while True:
+            lines: List[str] = list(islice(f, chunk_size))
+            if len(lines) == 0:
+                break
+
+            uncles: Uncles = {}
+            if csv_uncles is not None:
+                # the uncles of this chunk, both files are sorted by block number
+                last = _last_csv_number(lines, header)
+                while True:
+                    pending_uncle = pending_uncle if pending_uncle is not None else next(csv_uncles, None)
+                    if pending_uncle is None or pending_uncle[0] > last:
+                        break
+                    uncles.setdefault(pending_uncle[0], []).append(pending_uncle[1])
+                    pending_uncle = None
+
+            in_flight.append(executor.submit(import_chunk, lines, fmt, header, uncles))
+            if len(in_flight) >= 2 * workers:
+                collect(in_flight.popleft().result())
+        while len(in_flight) > 0:
+            collect(in_flight.popleft().result())
+
+    return summary
+
+
+def _last_csv_number(lines: List[str], header: List[str]) -> int:
+    for line in reversed(lines):
+        if line.strip() != "":
+            return int(_quantity(dict(zip(header, next(csv.reader([line]))))["number"]), 16)
+    return -1
@@ -0,0 +1,274 @@
+import os
+import struct
+from datetime import datetime
+from decimal import Decimal
+from logging import getLogger
+from threading import Lock
+from typing import Optional, Tuple
+
+from eth.types.block import AggregateBlockMetrics, SummaryBlock
+from eth.utils.file_utils import block_index_filepath
+
+LOG = getLogger(__name__)
+
+MAGIC = b"EBI3"
+WEI = 10**18
+# magic, first block, ETH burned before the first block (wei), ETH supply before the first block (wei)
+HEADER = struct.Struct("<4sQ16s16s")
+# supply of an index started without a known supply
+UNKNOWN_SUPPLY = 2**128 - 1
+# timestamp, then running totals through the block (wei, gas): burned, base issuance, uncle issuance, gas used,
+# gas fees paid, priority fees, blocks with their priority fees pulled
+RECORD = struct.Struct("<Q16s16s16s16s16s16s16s")
+FIELDS = 7
+
+
+def _int(value: bytes) -> int:
+    return int.from_bytes(value, "little")
+
+
+def _bytes(value: int) -> bytes:
+    return value.to_bytes(16, "little")
+
+
+def _wei(eth: Decimal) -> int:
+    return int(eth * WEI)
+
+
+class BlockIndex:
+    """
+    Append-only file of block timestamps and running totals, one fixed-width record per block.
+
+    Timestamps are sorted, so time -> block is a binary search, and any block range total is the difference of
+    two running totals. Every query is O(log n) reads, whatever the range. Records are appended as the
+    processor advances; other processes see them on their next query.
+    """
+
+    def __init__(self, filepath: Optional[str] = None, read_only: bool = False):
+        self._filepath = filepath if filepath is not None else block_index_filepath()
+        self._lock = Lock()
+        if read_only:
+            self._fd = os.open(self._filepath, os.O_RDONLY)
+        else:
+            os.makedirs(os.path.dirname(self._filepath), exist_ok=True)
+            self._fd = os.open(self._filepath, os.O_RDWR | os.O_CREAT, 0o644)
+
+        self._first_block: Optional[int] = None
+        self._burned_before_wei: int = 0
+        self._supply_before_wei: Optional[int] = None
+        try:
+            self.refresh()
+        except ValueError:
+            if read_only or self._count() > 0:
+                # e.g. an index written before the record format changed, shared with other processes
+                raise ValueError(f"{self._filepath} is not a current block index, move it away to index from scratch")
+            LOG.warning(f"{self._filepath} has no blocks and an unknown header, start it over")
+            os.ftruncate(self._fd, 0)
+        size = os.fstat(self._fd).st_size
+        # drop a record cut short by a crash
+        if not read_only and size > HEADER.size and (size - HEADER.size) % RECORD.size != 0:
+            LOG.warning(f"Truncate partial record at the end of {self._filepath}")
+            os.ftruncate(self._fd, size - (size - HEADER.size) % RECORD.size)
+        self._last: Optional[Tuple[int, ...]] = None
+
+    def refresh(self) -> None:
+        """
+        Re-read the header, for readers of an index the processor may have started over.
+        """
+        header = os.pread(self._fd, HEADER.size, 0)
+        if len(header) < HEADER.size:
+            self._first_block = None
+            return
+        magic, first_block, burned_before, supply_before = HEADER.unpack(header)
+        if magic != MAGIC:
+            raise ValueError(f"Not a block index: {self._filepath}")
+        self._first_block = first_block
+        self._burned_before_wei = _int(burned_before)
+        self._supply_before_wei = _int(supply_before) if _int(supply_before) != UNKNOWN_SUPPLY else None
+
+    @property
+    def first_block(self) -> Optional[int]:
+        return self._first_block
+
+    @property
+    def last_block(self) -> Optional[int]:
+        count = self._count()
+        return self._first_block + count - 1 if self._first_block is not None and count > 0 else None
+
+    def _count(self) -> int:
+        return max(0, (os.fstat(self._fd).st_size - HEADER.size) // RECORD.size)
+
+    # WRITE
+
+    def reset(self, first_block: int, burned_eth: Decimal, supply_eth: Optional[Decimal] = None) -> None:
+        """
+        Start an empty index at `first_block`, `burned_eth` being the ETH burned before it and `supply_eth` the
+        ETH supply before it, if known. An index that already holds blocks is never started over.
+        """
+        if self._first_block is not None and self._count() > 0:
+            raise ValueError(f"{self._filepath} already holds blocks {self._first_block}-{self.last_block}")
+        with self._lock:
+            os.ftruncate(self._fd, 0)
+            self._first_block = first_block
+            self._burned_before_wei = _wei(burned_eth)
+            self._supply_before_wei = _wei(supply_eth) if supply_eth is not None else None
+            self._write_header()
+            self._last = None
+
+    def _write_header(self) -> None:
+        supply_before = self._supply_before_wei if self._supply_before_wei is not None else UNKNOWN_SUPPLY
+        header = HEADER.pack(MAGIC, self._first_block, _bytes(self._burned_before_wei), _bytes(supply_before))
+        os.pwrite(self._fd, header, 0)
+
+    def set_supply(self, num: int, supply_eth: Decimal) -> bool:
+        """
+        Anchor the supply ledger: `supply_eth` is the ETH supply after block `num`, which must be indexed or be
+        the block before the first one. Returns False if it is not.
+        """
+        last_block = self.last_block
+        if self._first_block is None or not self._first_block - 1 <= num <= (last_block or self._first_block - 1):
+            return False
+        with self._lock:
+            burned, base_issuance, uncle_issuance = self._totals(num - self._first_block)[:3]
+            self._supply_before_wei = _wei(supply_eth) - (base_issuance + uncle_issuance - burned)
+            self._write_header()
+        return True
+
+    def append(self, block: SummaryBlock, burned_eth: Decimal, supply_eth: Optional[Decimal] = None) -> None:
+        """
+        Index the next block, `burned_eth` being the ETH burned before it and `supply_eth` the ETH supply before
+        it, if known. Blocks already indexed are skipped. A block that leaves a gap after the last indexed block, or
+        comes before the first, raises ValueError.
+        """
+        count = self._count()
+        last_block = self._first_block + count - 1 if self._first_block is not None and count > 0 else None
+        if last_block is not None and self._first_block <= block.number <= last_block:
+            return
+        if self._first_block is None or (last_block is None and block.number != self._first_block):
+            self.reset(block.number, burned_eth, supply_eth)
+            count = 0
+        elif block.number != last_block + 1:
+            raise ValueError(
+                f"Block {block.number} does not follow the blocks {self._first_block}-{last_block} in {self._filepath}"
+            )
+
+        with self._lock:
+            prev = self._last if self._last is not None else self._totals(count - 1)
+            totals = (
+                prev[0] + _wei(block.burned_eth),
+                prev[1] + _wei(block.base_issuance_eth),
+                prev[2] + block.uncle_reward,
+                prev[3] + block.gas_used,
+                prev[4] + block.gas_used * block.base_fee_per_gas,
+                prev[5] + (block.priority_fees or 0),
+                prev[6] + (1 if block.priority_fees is not None else 0),
+            )
+            offset = HEADER.size + count * RECORD.size
+            os.pwrite(self._fd, RECORD.pack(block.timestamp, *[_bytes(t) for t in totals]), offset)
+            self._last = totals
+
+    # READ
+
+    def _record(self, i: int) -> Tuple[int, Tuple[int, ...]]:
+        timestamp, *totals = RECORD.unpack(os.pread(self._fd, RECORD.size, HEADER.size + i * RECORD.size))
+        return timestamp, tuple(_int(t) for t in totals)
+
+    def _totals(self, i: int) -> Tuple[int, ...]:
+        """
+        Running totals through record `i`, zeros before the first record.
+        """
+        return self._record(i)[1] if i >= 0 else (0,) * FIELDS
+
+    def _timestamp(self, i: int) -> int:
+        return struct.unpack("<Q", os.pread(self._fd, 8, HEADER.size + i * RECORD.size))[0]
+
+    def _supply_through(self, totals: Tuple[int, ...]) -> Optional[Decimal]:
+        if self._supply_before_wei is None:
+            return None
+        burned, base_issuance, uncle_issuance = totals[:3]
+        return Decimal(self._supply_before_wei + base_issuance + uncle_issuance - burned) / WEI
+
+    def supply(self, num: int) -> Optional[Decimal]:
+        """
+        ETH supply after block `num`: the anchor plus the issuance minus the burn of every block since. None if
+        no supply is known or the block is not indexed.
+        """
+        last_block = self.last_block
+        if self._first_block is None or not self._first_block - 1 <= num <= (last_block or self._first_block - 1):
+            return None
+        return self._supply_through(self._totals(num - self._first_block))
+
+    def timestamp(self, num: int) -> Optional[int]:
+        """
+        Timestamp of an indexed block, None if it is not indexed.
+        """
+        last_block = self.last_block
+        if last_block is None or not self._first_block <= num <= last_block:
+            return None
+        return self._timestamp(num - self._first_block)
+
+    def _bisect(self, timestamp: int) -> int:
+        """
+        Index of the first record with a timestamp at or after `timestamp`.
+        """
+        lo, hi = 0, self._count()
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._timestamp(mid) < timestamp:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def block_at(self, dt: datetime) -> Optional[int]:
+        """
+        Last indexed block mined at or before `dt`.
+        """
+        i = self._bisect(int(dt.timestamp()) + 1) - 1
+        return self._first_block + i if i >= 0 else None
+
+    def blocks_between(self, start_dt: datetime, end_dt: datetime) -> Optional[Tuple[int, int]]:
+        """
+        First and last indexed blocks mined in [start_dt, end_dt), None if there are none.
+        """
+        start = self._bisect(int(start_dt.timestamp()))
+        end = self._bisect(int(end_dt.timestamp())) - 1
+        if start > end:
+            return None
+        return self._first_block + start, self._first_block + end
+
+    def aggregate(self, start_number: int, end_number: int) -> AggregateBlockMetrics:
+        """
+        Metrics of the indexed blocks `start_number` to `end_number`.
+        """
+        last_block = self.last_block
+        if last_block is None or start_number < self._first_block or end_number > last_block:
+            raise ValueError(f"Blocks {start_number}-{end_number} are not indexed ({self._first_block}-{last_block})")
+
+        before = self._totals(start_number - self._first_block - 1)
+        through = self._totals(end_number - self._first_block)
+        burned, base_issuance, uncle_issuance, gas_used, gas_fees_paid, priority_fees, tipped = [
+            t - b for t, b in zip(through, before)
+        ]
+        return AggregateBlockMetrics(
+            burnt_eth=Decimal(burned) / WEI,
+            start_number=start_number,
+            end_number=end_number,
+            cumulative_burned_eth=Decimal(self._burned_before_wei + through[0]) / WEI,
+            base_issuance_eth=Decimal(base_issuance) / WEI,
+            uncle_issuance_eth=Decimal(uncle_issuance) / WEI,
+            gas_used=Decimal(gas_used),
+            gas_fees_paid=Decimal(gas_fees_paid),
+            priority_fees_eth=Decimal(priority_fees) / WEI if tipped == end_number - start_number + 1 else None,
+            supply_eth=self._supply_through(through),
+        )
+
+    def aggregate_time(self, start_dt: datetime, end_dt: datetime) -> Optional[AggregateBlockMetrics]:
+        """
+        Metrics of the indexed blocks mined in [start_dt, end_dt), None if there are none.
+        """
+        blocks = self.blocks_between(start_dt, end_dt)
+        return self.aggregate(*blocks) if blocks is not None else None
+
+    def close(self) -> None:
+        os.close(self._fd)
@@ -0,0 +1,151 @@
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from logging import getLogger
+from threading import Event, Thread
+from typing import Deque, List, Optional
+
+from eth.core.puller import BlockPuller
+from eth.types.block import DetailedBlock
+from eth.utils.profiler import Profiler
+
+LOG = getLogger(__name__)
+
+# the head lane starts this far below the head, the processor reports from the last two hours of blocks
+HEAD_LOOKBACK: int = 600
+
+
+class DualLanePuller:
+    """
+    Pulls the chain on two lanes sharing one BlockPuller.
+
+    The head lane follows the chain head and pulls every new block as soon as it sees it, starting `head_lookback`
+    blocks below the head. The backfill lane works through the blocks from `start_block` up to where the head
+    lane started, `backfill_workers` blocks at a time. It only starts blocks while the head lane has nothing to
+    pull, so history never holds up a new block. Blocks are pulled out of order, the BlockWriter records which
+    ones are on disk.
+    """
+
+    def __init__(
+        self,
+        block_puller: BlockPuller,
+        start_block: int,
+        use_cache: bool = True,
+        head_lookback: int = HEAD_LOOKBACK,
+        profiler: Optional[Profiler] = None,
+        backfill_workers: int = 1,
+    ):
+        self._block_puller = block_puller
+        self._start_block = start_block
+        self._use_cache = use_cache
+        self._head_lookback = head_lookback
+        self._profiler = profiler
+        # the client's RequestController, if any, decides how many of them are actually in flight
+        self._backfill_workers = backfill_workers
+
+        self._stop = Event()
+        # set while the head lane has no block to pull
+        self._head_idle = Event()
+        # set once the head lane knows where it starts, which is where the backfill ends
+        self._head_started = Event()
+        self._head_start: int = start_block
+        self._error: Optional[BaseException] = None
+
+        self._threads: List[Thread] = [
+            Thread(target=self._run_lane, args=(self._run_head,), name="head-lane"),
+            Thread(target=self._run_lane, args=(self._run_backfill,), name="backfill-lane"),
+        ]
+
+    @property
+    def running(self) -> bool:
+        return not self._stop.is_set()
+
+    def start(self) -> "DualLanePuller":
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        # wake the backfill lane waiting on the head lane
+        self._head_idle.set()
+        self._head_started.set()
+
+    def join(self) -> None:
+        """
+        Wait for both lanes, raising the error that stopped a lane if there was one.
+        """
+        for thread in self._threads:
+            thread.join()
+        if self._error is not None:
+            raise self._error
+
+    def _run_lane(self, lane) -> None:
+        try:
+            lane()
+        except BaseException as e:
+            LOG.exception(f"Stop pulling, {lane.__name__} failed: {e}")
+            self._error = e
+            self.stop()
+
+    # HEAD
+
+    def _run_head(self) -> None:
+        next_block: Optional[int] = None
+        while self.running:
+            latest_block_number = self._block_puller.eth_blockNumber()
+            if next_block is None:
+                next_block = max(self._start_block, latest_block_number - self._head_lookback)
+                self._head_start = next_block
+                self._head_started.set()
+                LOG.info(f"Head lane from block {next_block}, backfill blocks {self._start_block}-{next_block - 1}")
+
+            if next_block <= latest_block_number:
+                self._head_idle.clear()
+                for block_num in range(next_block, latest_block_number + 1):
+                    block: DetailedBlock = self._block_puller.eth_getBlockByNumber(block_num, cached=self._use_cache)
+                    next_block = block_num + 1
+                    if self._profiler is not None:
+                        self._profiler.tick()
+                    if not self.running:
+                        return
+                LOG.info(f"latest    block={block.number} time={block.timestamp_dt}")
+            self._head_idle.set()
+
+            self._stop.wait(1 if datetime.now().minute in [59, 0, 1] else 20)
+
+        LOG.info("Exit head lane")
+
+    # BACKFILL
+
+    def _run_backfill(self) -> None:
+        self._head_started.wait()
+        pending: Deque[Future] = deque()
+        with ThreadPoolExecutor(max_workers=self._backfill_workers, thread_name_prefix="backfill") as executor:
+            for block_num in range(self._start_block, self._head_start):
+                # yield to the head lane
+                self._head_idle.wait()
+                if not self.running:
+                    LOG.info(f"Exit backfill lane at block={block_num}")
+                    break
+
+                pending.append(executor.submit(self._pull_backfill, block_num))
+                if len(pending) >= self._backfill_workers:
+                    self._backfilled(pending.popleft().result())
+            for future in pending:
+                self._backfilled(future.result())
+
+        if self.running:
+            LOG.info(f"Backfill done up to block {self._head_start - 1}")
+
+    def _pull_backfill(self, block_num: int) -> DetailedBlock:
+        # on an executor thread, profiled on its own
+        if self._profiler is not None:
+            self._profiler.attach()
+        return self._block_puller.eth_getBlockByNumber(block_num, self._use_cache)
+
+    def _backfilled(self, block: DetailedBlock) -> None:
+        if self._profiler is not None:
+            self._profiler.tick()
+        if block.number % 10000 == 0:
+            LOG.info(f"backfill    block={block.number} time={block.timestamp_dt}")
@@ -0,0 +1,57 @@
+import math
+import time
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from eth.types.block import SummaryBlock
+
+# lifecycle of an aggregate report, in order
+STAGES: List[str] = ["pulled", "processed", "rendered", "written", "tweeted"]
+
+
+def new_trace(block: SummaryBlock, processed_at: float) -> Dict[str, float]:
+    """
+    Start a trace for the report triggered by `block`, the first block after the period closed.
+    """
+    trace: Dict[str, float] = {
+        "block": block.number,
+        "block_time": block.timestamp_dt.timestamp(),
+        "processed": processed_at,
+    }
+    if block.pulled_at is not None:
+        trace["pulled"] = block.pulled_at
+    return trace
+
+
+def stamp(trace: Optional[Dict[str, float]], stage: str) -> None:
+    assert stage in STAGES
+    if trace is not None:
+        trace[stage] = time.time()
+
+
+def stage_latencies(trace: Dict[str, float]) -> Dict[str, float]:
+    """
+    Seconds spent in each stage, measured from the previous recorded stage (or the block timestamp).
+    """
+    latencies: Dict[str, float] = {}
+    prev: float = trace["block_time"]
+    for stage in STAGES:
+        if stage not in trace:
+            continue
+        latencies[stage] = trace[stage] - prev
+        prev = trace[stage]
+    latencies["total"] = prev - trace["block_time"]
+    return latencies
+
+
+def percentile(values: List[float], pct: float) -> float:
+    assert len(values) > 0
+    ordered = sorted(values)
+    # nearest-rank
+    rank = min(len(ordered), max(1, math.ceil(pct / 100 * len(ordered))))
+    return ordered[rank - 1]
+
+
+def traces_in_range(traces: Iterable[Dict[str, float]], start: datetime, end: datetime) -> List[Dict[str, float]]:
+    start_ts, end_ts = start.timestamp(), end.timestamp()
+    return [trace for trace in traces if start_ts <= trace["block_time"] < end_ts]
@@ -0,0 +1,165 @@
+import json
+import os
+import time
+from dataclasses import asdict, dataclass
+from logging import getLogger
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from eth.utils.file_utils import leases_dir
+
+LOG = getLogger(__name__)
+
+# blocks per lease, ranges are aligned to multiples of it so every worker agrees on them
+LEASE_SIZE: int = 10_000
+# a lease not renewed for this long is taken over by another worker
+LEASE_TTL_SEC: float = 300.0
+
+
+@dataclass
+class Lease:
+    start: int
+    end: int
+    owner: str
+    expires_at: float
+
+
+class LeaseTable:
+    """
+    Leases on the block ranges of a distributed backfill, as files in a directory shared by the workers next to
+    the blocks (e.g. over NFS).
+
+    The files of a backfill are in their own directory, named by `backfill_id` (by default the block range), and
+    are keyed by the exact range they cover. Running the backfill again under a new id pulls every range again.
+
+    A worker claims a range by creating its lease file exclusively, renews it while pulling and marks the range
+    done at the end. A lease that expires, e.g. because its worker crashed, is taken over by the first worker to
+    exclusively create the takeover marker for that expiry, so a range is never taken over twice. A worker
+    stalled past its expiry gives up the range at its next renewal. At worst two workers briefly pull the same
+    range, writing the same files.
+    """
+
+    def __init__(
+        self,
+        start: int,
+        end: int,
+        owner: str,
+        lease_size: int = LEASE_SIZE,
+        ttl_sec: float = LEASE_TTL_SEC,
+        backfill_id: Optional[str] = None,
+        dirpath: Optional[str] = None,
+    ):
+        self._start = start
+        self._end = end
+        self._owner = owner
+        self._lease_size = lease_size
+        self._ttl_sec = ttl_sec
+        self._backfill_id = backfill_id if backfill_id is not None else f"{start}-{end}"
+        self._dirpath = dirpath if dirpath is not None else os.path.join(leases_dir(), self._backfill_id)
+        os.makedirs(self._dirpath, exist_ok=True)
+
+    @property
+    def ttl_sec(self) -> float:
+        return self._ttl_sec
+
+    @property
+    def backfill_id(self) -> str:
+        return self._backfill_id
+
+    def ranges(self) -> Iterator[Tuple[int, int]]:
+        """
+        Aligned ranges covering start to end, clipped to them.
+        """
+        first = self._start - self._start % self._lease_size
+        for range_start in range(first, self._end + 1, self._lease_size):
+            yield max(range_start, self._start), min(range_start + self._lease_size - 1, self._end)
+
+    def remaining(self) -> List[Tuple[int, int]]:
+        return [(start, end) for start, end in self.ranges() if not os.path.exists(self._done_filepath(start, end))]
+
+    def claim(self) -> Optional[Lease]:
+        """
+        Lease the first range neither done nor leased by a live worker, None when there is none.
+        """
+        for start, end in self.remaining():
+            lease = Lease(start, end, self._owner, time.time() + self._ttl_sec)
+            if self._create(lease):
+                LOG.info(f"Leased blocks {start}-{end}")
+                return lease
+
+            current: Optional[Lease] = self._read(start, end)
+            if current is None or current.expires_at >= time.time():
+                continue
+            if self._take_over(current, lease):
+                LOG.warning(f"Took over blocks {start}-{end} from {current.owner}, lease expired")
+                return lease
+        return None
+
+    def renew(self, lease: Lease) -> bool:
+        """
+        Extend the lease, False if it expired or another worker took the range over.
+        """
+        current: Optional[Lease] = self._read(lease.start, lease.end)
+        if current is None or current.owner != self._owner or lease.expires_at < time.time():
+            LOG.warning(f"Lost lease on blocks {lease.start}-{lease.end}")
+            return False
+        lease.expires_at = time.time() + self._ttl_sec
+        self._replace(lease)
+        return True
+
+    def complete(self, lease: Lease) -> None:
+        with open(self._done_filepath(lease.start, lease.end), "w") as f:
+            f.write(json.dumps(asdict(lease)))
+        self.release(lease)
+        LOG.info(f"Done blocks {lease.start}-{lease.end}")
+
+    def release(self, lease: Lease) -> None:
+        current: Optional[Lease] = self._read(lease.start, lease.end)
+        if current is not None and current.owner == self._owner:
+            os.remove(self._lease_filepath(lease.start, lease.end))
+        for filename in os.listdir(self._dirpath):
+            if filename.startswith(f"{self._key(lease.start, lease.end)}.takeover."):
+                os.remove(os.path.join(self._dirpath, filename))
+
+    def _create(self, lease: Lease) -> bool:
+        try:
+            fd = os.open(self._lease_filepath(lease.start, lease.end), os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            return False
+        with os.fdopen(fd, "w") as f:
+            f.write(json.dumps(asdict(lease)))
+        return True
+
+    def _take_over(self, expired: Lease, lease: Lease) -> bool:
+        # one marker per expired lease, only its creator replaces the lease
+        marker = os.path.join(self._dirpath, f"{self._key(lease.start, lease.end)}.takeover.{expired.expires_at:.6f}")
+        try:
+            os.close(os.open(marker, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+        except FileExistsError:
+            return False
+        self._replace(lease)
+        return True
+
+    def _replace(self, lease: Lease) -> None:
+        filepath = self._lease_filepath(lease.start, lease.end)
+        tmp_filepath = f"{filepath}.{self._owner}.tmp"
+        with open(tmp_filepath, "w") as f:
+            f.write(json.dumps(asdict(lease)))
+        os.replace(tmp_filepath, filepath)
+
+    def _read(self, start: int, end: int) -> Optional[Lease]:
+        try:
+            with open(self._lease_filepath(start, end), "r") as f:
+                content: Dict[str, Any] = json.load(f)
+            return Lease(**content)
+        except (OSError, ValueError, TypeError):
+            return None
+
+    def _key(self, start: int, end: int) -> str:
+        # the exact range, a range clipped by --block or --end is not the aligned one
+        return f"{start}_{end}"
+
+    def _lease_filepath(self, start: int, end: int) -> str:
+        return os.path.join(self._dirpath, f"{self._key(start, end)}.lease")
+
+    def _done_filepath(self, start: int, end: int) -> str:
+        return os.path.join(self._dirpath, f"{self._key(start, end)}.done")
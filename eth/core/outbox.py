@@ -0,0 +1,276 @@
+import errno
+import json
+import os
+import select
+import sqlite3
+import stat
+import time
+from dataclasses import dataclass
+from logging import getLogger
+from threading import Lock
+from typing import Any, Dict, Iterator, Optional
+
+from eth.utils.file_utils import (
+    outbox_filepath,
+    outbox_wakeup_filepath,
+    pending_tweets_dir,
+    pending_tweets_filepaths,
+    tweeted_tweets_dir,
+)
+
+LOG = getLogger(__name__)
+
+STATE_PENDING = "pending"
+STATE_SENT = "sent"
+STATE_FAILED = "failed"
+# kept for the record, never tweeted, e.g. reports of periods only partly seen
+STATE_ARCHIVED = "archived"
+
+# higher goes first
+PRIORITY_HOURLY = 0
+PRIORITY_DAILY = 1
+PRIORITY_MILESTONE = 2
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tweets (
+    name TEXT PRIMARY KEY,
+    text TEXT NOT NULL,
+    media_path TEXT,
+    priority INTEGER NOT NULL DEFAULT 0,
+    state TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    trace TEXT,
+    dry_run_at REAL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS tweets_by_state ON tweets (state, priority DESC, created_at);
+"""
+
+
+@dataclass
+class OutboxTweet:
+    name: str
+    text: str
+    media_path: Optional[str]
+    priority: int
+    attempts: int
+    trace: Optional[Dict[str, float]]
+
+
+class Outbox:
+    """
+    Durable queue of tweets, shared by the processor and the tweeter through an SQLite table.
+
+    Tweets are keyed by name (e.g. the hour they summarize), so a tweet is queued once no matter how often
+    the processor replays its period. enqueue() wakes a tweeter blocked in wait(), also across processes,
+    through a named pipe next to the database.
+    """
+
+    def __init__(self, filepath: Optional[str] = None):
+        self._filepath = filepath if filepath is not None else outbox_filepath()
+        os.makedirs(os.path.dirname(self._filepath), exist_ok=True)
+        self._wakeup_filepath = outbox_wakeup_filepath(self._filepath)
+        self._wakeup_fd: Optional[int] = None
+
+        self._lock = Lock()
+        self._conn = sqlite3.connect(self._filepath, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+
+        with self._lock:
+            created = self._conn.execute("SELECT name FROM sqlite_master WHERE name = 'tweets'").fetchone() is None
+            self._conn.executescript(SCHEMA)
+            self._add_dry_run_column()
+        if created:
+            self._import_tweet_files()
+
+    # PROCESSOR
+
+    def contains(self, name: str) -> bool:
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM tweets WHERE name = ?", (name,)).fetchone() is not None
+
+    def enqueue(
+        self,
+        name: str,
+        text: str,
+        media_path: Optional[str] = None,
+        priority: int = PRIORITY_HOURLY,
+        trace: Optional[Dict[str, float]] = None,
+        state: str = STATE_PENDING,
+    ) -> bool:
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO tweets (name, text, media_path, priority, state, trace, created_at, updated_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (name, text, media_path, priority, state, _dumps(trace), now, now),
+            )
+        inserted = cursor.rowcount > 0
+        if inserted and state == STATE_PENDING:
+            self.notify()
+        return inserted
+
+    # TWEETER
+
+    def next_pending(self, dry_run: bool = False) -> Optional[OutboxTweet]:
+        """
+        Most urgent pending tweet. For a dry run, only those no dry run has logged yet.
+        """
+        logged = " AND dry_run_at IS NULL" if dry_run else ""
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT * FROM tweets WHERE state = ?{logged} ORDER BY priority DESC, created_at LIMIT 1",
+                (STATE_PENDING,),
+            ).fetchone()
+        return _to_tweet(row) if row is not None else None
+
+    def count_pending(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM tweets WHERE state = ?", (STATE_PENDING,)).fetchone()[0]
+
+    def mark_sent(self, name: str, trace: Optional[Dict[str, float]] = None) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE tweets SET state = ?, attempts = attempts + 1, trace = COALESCE(?, trace), updated_at = ?"
+                " WHERE name = ?",
+                (STATE_SENT, _dumps(trace), time.time(), name),
+            )
+
+    def mark_dry_run(self, name: str) -> None:
+        """
+        Record that a dry run logged the tweet, which stays pending for the real tweeter.
+        """
+        with self._lock:
+            self._conn.execute("UPDATE tweets SET dry_run_at = ? WHERE name = ?", (time.time(), name))
+
+    def mark_failed(self, name: str, max_attempts: int) -> int:
+        """
+        Count a failed attempt, giving up on the tweet after `max_attempts`. Returns the attempts so far.
+        """
+        with self._lock:
+            self._conn.execute(
+                "UPDATE tweets SET attempts = attempts + 1, updated_at = ?,"
+                " state = CASE WHEN attempts + 1 >= ? THEN ? ELSE state END WHERE name = ?",
+                (time.time(), max_attempts, STATE_FAILED, name),
+            )
+            return self._conn.execute("SELECT attempts FROM tweets WHERE name = ?", (name,)).fetchone()[0]
+
+    def traces(self) -> Iterator[Dict[str, float]]:
+        with self._lock:
+            rows = self._conn.execute("SELECT trace FROM tweets WHERE trace IS NOT NULL").fetchall()
+        for row in rows:
+            yield json.loads(row["trace"])
+
+    # WAKEUP
+
+    def notify(self) -> None:
+        try:
+            self._make_wakeup_fifo()
+            fd = os.open(self._wakeup_filepath, os.O_WRONLY | os.O_NONBLOCK)
+        except OSError as e:
+            # ENXIO: nobody is waiting
+            if e.errno != errno.ENXIO:
+                LOG.warning(f"Could not wake up tweeter: {e}")
+            return
+        try:
+            os.write(fd, b"\n")
+        except BlockingIOError:
+            # already woken up
+            pass
+        finally:
+            os.close(fd)
+
+    def wait(self, timeout: float) -> None:
+        """
+        Sleep until a tweet is enqueued or `timeout` seconds pass.
+        """
+        if self._wakeup_fd is None:
+            try:
+                self._make_wakeup_fifo()
+                # read-write so the pipe always has a writer and never reports EOF
+                self._wakeup_fd = os.open(self._wakeup_filepath, os.O_RDWR | os.O_NONBLOCK)
+            except OSError as e:
+                LOG.warning(f"Could not open tweeter wakeup pipe, polling instead: {e}")
+                time.sleep(timeout)
+                return
+
+        readable, _, _ = select.select([self._wakeup_fd], [], [], timeout)
+        if len(readable) > 0:
+            try:
+                while len(os.read(self._wakeup_fd, 4096)) > 0:
+                    pass
+            except BlockingIOError:
+                pass
+
+    def _make_wakeup_fifo(self) -> None:
+        try:
+            os.mkfifo(self._wakeup_filepath)
+        except FileExistsError:
+            if not stat.S_ISFIFO(os.stat(self._wakeup_filepath).st_mode):
+                raise
+
+    # MIGRATION
+
+    def _add_dry_run_column(self) -> None:
+        """
+        Outboxes created before dry runs were recorded lack the dry_run_at column.
+        """
+        columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(tweets)")}
+        if "dry_run_at" not in columns:
+            try:
+                self._conn.execute("ALTER TABLE tweets ADD COLUMN dry_run_at REAL")
+            except sqlite3.OperationalError as e:
+                # added by another process opening the outbox at the same time
+                if "duplicate column" not in str(e):
+                    raise
+
+    def _import_tweet_files(self) -> None:
+        """
+        Carry over tweets from the pending/ and tweeted/ directories used before the outbox.
+        """
+        for tweeted_filename in next(os.walk(tweeted_tweets_dir()), (None, None, []))[2]:
+            if tweeted_filename.endswith(".txt"):
+                self._import_tweet_file(os.path.join(tweeted_tweets_dir(), tweeted_filename), STATE_SENT)
+        if os.path.isdir(pending_tweets_dir()):
+            for pending_filepath in pending_tweets_filepaths(".txt"):
+                self._import_tweet_file(pending_filepath, STATE_PENDING)
+
+    def _import_tweet_file(self, filepath: str, state: str) -> None:
+        name = tweet_name(os.path.basename(filepath))
+        media_path = filepath.replace(".txt", ".png")
+        try:
+            with open(filepath, "r") as f:
+                text = f.read()
+        except FileNotFoundError:
+            # imported by another process opening the outbox at the same time
+            return
+
+        LOG.info(f"Import {state} tweet {name} from {filepath}")
+        self.enqueue(name, text, media_path=media_path if os.path.exists(media_path) else None, state=state)
+        if state == STATE_PENDING and os.path.exists(filepath):
+            os.remove(filepath)
+
+
+def tweet_name(tweet_filename: str) -> str:
+    """
+    tweet_<name>.txt -> <name>
+    """
+    return tweet_filename[len("tweet_") : -len(".txt")]
+
+
+def _dumps(trace: Optional[Dict[str, Any]]) -> Optional[str]:
+    return json.dumps(trace) if trace is not None else None
+
+
+def _to_tweet(row: sqlite3.Row) -> OutboxTweet:
+    return OutboxTweet(
+        name=row["name"],
+        text=row["text"],
+        media_path=row["media_path"],
+        priority=row["priority"],
+        attempts=row["attempts"],
+        trace=json.loads(row["trace"]) if row["trace"] is not None else None,
+    )
@@ -0,0 +1,178 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from decimal import Decimal
+from logging import getLogger
+from queue import Empty, Full, Queue
+from threading import Event, Thread
+from typing import List, Optional
+
+from eth.core.block_writer import BlockWriter
+from eth.core.ethereum_client import EthereumClient
+from eth.core.outbox import Outbox
+from eth.core.processor import BlockProcessor
+from eth.core.puller import BlockPuller
+from eth.core.tweeter import Tweeter, TweeterException
+from eth.types.block import DetailedBlock, SummaryBlock
+
+LOG = getLogger(__name__)
+LOG_WIDTH = 40
+
+
+class Pipeline:
+    """
+    Puller, processor, renderer and tweeter in one process.
+
+    Pulled blocks go straight to the processor through a bounded queue while a background writer persists
+    them to the cache. Reports are rendered on their own worker and the tweeter runs on its own thread.
+    A full queue slows the puller down to the processor's pace. stop() lets every stage finish its current
+    item and the processor the blocks already queued, then flushes the cache writer. A stage failing stops the
+    whole pipeline and join() raises its error.
+    """
+
+    def __init__(
+        self,
+        eth_client: EthereumClient,
+        start_block: int,
+        burned_eth: Decimal,
+        use_cache: bool = True,
+        dry_run: bool = False,
+        max_pending_blocks: int = 1000,
+        min_tweet_interval_sec: int = 5,
+        fetch_priority_fees: bool = False,
+    ):
+        self._stop = Event()
+        self._start_block = start_block
+        self._use_cache = use_cache
+        self._dry_run = dry_run
+
+        self._blocks: "Queue[SummaryBlock]" = Queue(maxsize=max_pending_blocks)
+        self._block_writer = BlockWriter(first_block=start_block, max_pending=max_pending_blocks)
+        self._block_puller = BlockPuller(
+            eth_client=eth_client, block_writer=self._block_writer, fetch_priority_fees=fetch_priority_fees
+        )
+        self._render_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="renderer")
+        self._outbox = Outbox()
+        self._block_processor = BlockProcessor(
+            burned_eth=burned_eth, render_executor=self._render_executor, outbox=self._outbox
+        )
+        self._tweeter: Optional[Tweeter] = None
+        self._min_tweet_interval_sec = min_tweet_interval_sec
+
+        self._error: Optional[BaseException] = None
+
+        self._puller_thread = Thread(target=self._run_stage, args=(self._run_puller,), name="puller")
+        self._threads: List[Thread] = [
+            self._puller_thread,
+            Thread(target=self._run_stage, args=(self._run_processor,), name="processor"),
+            Thread(target=self._run_stage, args=(self._run_tweeter,), name="tweeter"),
+        ]
+
+    @property
+    def running(self) -> bool:
+        return not self._stop.is_set()
+
+    def start(self) -> None:
+        self._block_writer.start()
+        self._tweeter = Tweeter(outbox=self._outbox)
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._outbox.notify()
+
+    def join(self) -> None:
+        """
+        Wait for every stage, raising the error that stopped the pipeline if there was one.
+        """
+        for thread in self._threads:
+            thread.join()
+        self._render_executor.shutdown(wait=True)
+        self._block_writer.close()
+        LOG.info("Exit Pipeline")
+        if self._error is not None:
+            raise self._error
+
+    def _run_stage(self, stage) -> None:
+        try:
+            stage()
+        except BaseException as e:
+            LOG.exception(f"Stop pipeline, {stage.__name__} failed: {e}")
+            self._error = e
+            self.stop()
+
+    # PULLER
+
+    def _put(self, block: SummaryBlock) -> bool:
+        while self.running:
+            try:
+                self._blocks.put(block, timeout=1)
+                return True
+            except Full:
+                continue
+        return False
+
+    def _run_puller(self) -> None:
+        next_block = self._start_block
+        while self.running:
+            latest_block_number = self._block_puller.eth_blockNumber()
+
+            for block_num in range(next_block, latest_block_number + 1):
+                block: DetailedBlock = self._block_puller.eth_getBlockByNumber(block_num, cached=self._use_cache)
+                if not self._put(SummaryBlock(block.json)):
+                    LOG.info(f"Exit puller at block={block_num}")
+                    return
+                next_block = block_num + 1
+
+            self._stop.wait(1 if datetime.now().minute in [59, 0, 1] else 20)
+
+        LOG.info("Exit puller")
+
+    # PROCESSOR
+
+    def _run_processor(self) -> None:
+        caught_up = False
+        while self.running:
+            try:
+                block: SummaryBlock = self._blocks.get(timeout=1)
+            except Empty:
+                if not caught_up:
+                    LOG.info(f"{'Processor caught up'.ljust(LOG_WIDTH)}")
+                caught_up = True
+                continue
+
+            caught_up = False
+            self._block_processor.process(block)
+
+        # the puller puts nothing once it has exited, what it queued before is processed
+        self._puller_thread.join()
+        drained = 0
+        while self._error is None:
+            try:
+                block = self._blocks.get_nowait()
+            except Empty:
+                break
+            self._block_processor.process(block)
+            drained += 1
+
+        LOG.info(f"Exit processor, {drained} queued blocks processed")
+
+    # TWEETER
+
+    def _run_tweeter(self) -> None:
+        wakeup_sec = 60
+        while self.running:
+            tweeted: bool = False
+            try:
+                tweeted = self._tweeter.process(dry_run=self._dry_run)
+            except TweeterException as e:
+                LOG.error(f"Tweet failed: {e}")
+
+            if tweeted:
+                # drain the queue at the rate limit
+                self._stop.wait(self._min_tweet_interval_sec)
+            else:
+                # woken up by the processor queueing a tweet, or by stop()
+                self._tweeter.wait(wakeup_sec)
+
+        LOG.info("Exit tweeter")
@@ -1,14 +1,28 @@
 import os
 import time
+from concurrent.futures import Executor, Future
+from dataclasses import replace
 from datetime import datetime, timedelta
 from decimal import Decimal
 from logging import getLogger
-from typing import List, Optional
+from typing import Dict, List, Optional
 
+from eth.core.clock import Clock
 from eth.core.image_drawer import make_svg
+from eth.core.index import BlockIndex
+from eth.core.latency import new_trace, stamp
+from eth.core.outbox import PRIORITY_DAILY, PRIORITY_HOURLY, PRIORITY_MILESTONE, STATE_ARCHIVED, Outbox
+from eth.core.rollup import DAY, Rollups
+from eth.core.supply import SupplyAnchor, load_supply_anchor
 from eth.core.writer import write_tweet_aggregate, write_tweet_fundamentals, write_tweet_threshold
-from eth.types.block import AggregateBlockMetrics, DayAggregateBlockMetrics, HourlyAggregateBlockMetrics, SummaryBlock
-from eth.utils.file_utils import pending_tweets_dir, tweeted_tweets_dir
+from eth.types.block import (
+    AggregateBlockMetrics,
+    HourlyAggregateBlockMetrics,
+    PeriodAggregateBlockMetrics,
+    SummaryBlock,
+)
+from eth.types.sketch import FeeSketches
+from eth.utils.file_utils import pending_tweets_dir
 from potpourri.python.ethereum.block import Block
 from potpourri.python.ethereum.coinbase.client import CoinbaseClient
 
@@ -25,20 +39,64 @@ def hour_str(hour: datetime, delimiter="T") -> str:
 
 TWEET_THRESHOLD: int = 10000
 MIN_BURN_THRESHOLD_TWEET: Decimal = Decimal(2500000)
+# blocks older than this only accumulate, the hourly and threshold reports look back at most two hours
+CATCH_UP_MARGIN: timedelta = timedelta(hours=2)
 
 
 class BlockProcessor:
-    def __init__(self, burned_eth: Decimal = Decimal(0)):
+    def __init__(
+        self,
+        burned_eth: Decimal = Decimal(0),
+        coinbase_client: Optional[CoinbaseClient] = None,
+        render_executor: Optional[Executor] = None,
+        outbox: Optional[Outbox] = None,
+        index: Optional[BlockIndex] = None,
+        rollups: Optional[Rollups] = None,
+        catch_up_margin: Optional[timedelta] = CATCH_UP_MARGIN,
+        clock: Optional[Clock] = None,
+        supply_anchor: Optional[SupplyAnchor] = None,
+    ):
+        if catch_up_margin is not None and catch_up_margin < CATCH_UP_MARGIN:
+            raise ValueError(
+                f"Catch-up margin {catch_up_margin} would skip reports, must be at least {CATCH_UP_MARGIN}"
+            )
         self._blocks: List[SummaryBlock] = []
         self._cached_burned_eth = burned_eth
         self._burned_eth: Decimal = burned_eth
         self._burned_threshold = TWEET_THRESHOLD
+        # running ETH supply after the last block, None while no supply is known
+        self._supply_anchor: Optional[SupplyAnchor] = (
+            supply_anchor if supply_anchor is not None else load_supply_anchor()
+        )
+        self._supply_eth: Optional[Decimal] = None
+        # tells which blocks are live and which periods have ended, simulated when replaying history
+        self._clock: Clock = clock if clock is not None else Clock()
 
-        self._coinbase_client = CoinbaseClient()
+        self._coinbase_client = coinbase_client if coinbase_client is not None else CoinbaseClient()
         self._eth_usd_price: Decimal = self._coinbase_client.get_price("ETH")
-        self._eth_usd_price_time: int = int(time.time())
+        self._eth_usd_price_time: int = int(self._clock.time())
 
         self._written = set()
+        self._outbox: Outbox = outbox if outbox is not None else Outbox()
+        # running totals per block, for range queries without iterating blocks
+        self._index: BlockIndex = index if index is not None else BlockIndex()
+        # set while the index does not reach the processed blocks, bin/run_index.py --rebuild fills the gap
+        self._index_gap: bool = False
+        # daily, weekly, monthly and custom cadence reports, merged from the hours as they close
+        self._rollups: Rollups = rollups if rollups is not None else Rollups(self._index)
+        # BASEFEE and gas used ratio distributions of the open and last closed hour, the rollups merge them into days
+        self._hour_sketches: Dict[datetime, FeeSketches] = {}
+        # renders and writes aggregate reports off the processing thread when set
+        self._render_executor: Optional[Executor] = render_executor
+        # wall time the block currently being processed was handed to the processor, also when replaying
+        self._received_at: float = time.time()
+        # blocks mined before the cutoff take the catch-up path, the cutoff is only re-read once a block reaches it
+        self._catch_up_margin: Optional[timedelta] = catch_up_margin
+        self._catch_up_cutoff: int = self._read_catch_up_cutoff()
+        self._live: bool = catch_up_margin is None
+        # hour of the last block processed
+        self._hour_dt: Optional[datetime] = None
+        self._new_hour: bool = False
 
     @property
     def last_block(self) -> Optional[SummaryBlock]:
@@ -46,8 +104,21 @@ class BlockProcessor:
             return None
         return self._blocks[-1]
 
+    @property
+    def live(self) -> bool:
+        return self._live
+
+    @property
+    def supply_eth(self) -> Optional[Decimal]:
+        return self._supply_eth
+
     def process(self, block: SummaryBlock) -> None:
-        now = datetime.now()
+        self._received_at = time.time()
+        if len(self._blocks) > 0 and self._is_catching_up(block):
+            self._catch_up(block)
+            return
+
+        now = self._clock.now()
         now_hour = now.replace(minute=0, second=0, microsecond=0)
         now_day = now_hour.replace(hour=0)
         prev_hour = now_hour - timedelta(hours=1)
@@ -59,12 +130,11 @@ class BlockProcessor:
                     f"Must start with block before: {now_day} since current time is {now}. Got block #{block.number} @ ({block.timestamp_dt})"
                 )
 
-        self._blocks.append(block)
         LOG.debug(f"Block #{block.number} ({block.timestamp_dt}) burned {block.burned_eth:.18f}")
-        self._burned_eth = self._burned_eth + block.burned_eth
+        self._accumulate(block)
 
         if block.number % 10 == 0:
-            now = int(time.time())
+            now = int(self._clock.time())
             if now >= self._eth_usd_price_time + 60:
                 try:
                     self._eth_usd_price: Decimal = self._coinbase_client.get_price("ETH")
@@ -87,24 +157,118 @@ class BlockProcessor:
                 if needs_tweet:
                     self._write_tweet_burned_eth_usd(filename_sub=filename_sub_str, threshold_usd=threshold_usd)
 
+        self._process_if_end_rollup()
+
         if block.timestamp_dt >= now_hour:
             self._process_if_end_hour()
 
         if block.timestamp_dt >= prev_hour:
             self._process_if_threshold()
 
+    def _accumulate(self, block: SummaryBlock) -> None:
+        hour_dt: datetime = block.hour_dt
+        # whether the block closes the previous block's hour, for the hourly bookkeeping
+        self._new_hour = len(self._blocks) > 0 and hour_dt > self._hour_dt
+        self._hour_dt = hour_dt
+
+        if len(self._blocks) == 0:
+            self._supply_eth = self._start_supply(block.number)
+        self._blocks.append(block)
+        self._index_block(block)
+        self._burned_eth = self._burned_eth + block.burned_eth
+        if self._supply_eth is not None:
+            self._supply_eth = self._supply_eth + block.base_issuance_eth + block.uncle_reward_eth - block.burned_eth
+        elif self._supply_anchor is not None and block.number == self._supply_anchor.block:
+            # reached an anchor ahead of the first block, the index answers for the blocks before it too
+            self._supply_eth = self._supply_anchor.supply_eth
+            self._index.set_supply(block.number, self._supply_eth)
+            LOG.info(f"Supply anchored at block {block.number}: {self._supply_eth:,.4f} ETH")
+        self._add_to_sketches(block, hour_dt)
+
+    def _index_block(self, block: SummaryBlock) -> None:
+        """
+        Append the block to the index, unless the index does not reach it. Reports are then aggregated from the
+        processed blocks until the index is rebuilt up to them.
+        """
+        last_block: Optional[int] = self._index.last_block
+        try:
+            if last_block is not None and block.number > last_block + 1:
+                raise ValueError(f"Block {block.number} does not follow the last indexed block {last_block}")
+            self._index.append(block, burned_eth=self._burned_eth, supply_eth=self._supply_eth)
+        except ValueError as e:
+            if not self._index_gap:
+                LOG.warning(f"Stop indexing, {e}. Run bin/run_index.py --rebuild to fill the index")
+            self._index_gap = True
+            return
+        if self._index_gap:
+            LOG.info(f"Index reaches block {block.number}, resume indexing")
+            self._index_gap = False
+
+    def _indexed(self, block: SummaryBlock) -> bool:
+        return self._index.timestamp(block.number) is not None
+
+    def _start_supply(self, first_block: int) -> Optional[Decimal]:
+        """
+        Supply before the first block: the anchor if it is the block before, else shifted through the index.
+        """
+        anchor = self._supply_anchor
+        if anchor is not None and anchor.block == first_block - 1:
+            supply: Optional[Decimal] = anchor.supply_eth
+        else:
+            if anchor is not None and anchor.block < first_block:
+                self._index.set_supply(anchor.block, anchor.supply_eth)
+            supply = self._index.supply(first_block - 1)
+
+        if supply is None:
+            LOG.warning(f"Supply before block {first_block} unknown, reports use the snapshot supply until it is")
+        else:
+            # the index records the anchor when it already holds the first block
+            self._index.set_supply(first_block - 1, supply)
+            LOG.info(f"Supply before block {first_block}: {supply:,.4f} ETH")
+        return supply
+
+    # CATCH UP
+
+    def _read_catch_up_cutoff(self) -> int:
+        if self._catch_up_margin is None:
+            return 0
+        return int(self._clock.time() - self._catch_up_margin.total_seconds())
+
+    def _is_catching_up(self, block: SummaryBlock) -> bool:
+        if self._live:
+            return False
+        if block.timestamp < self._catch_up_cutoff:
+            return True
+
+        # the chain may have moved on while catching up
+        self._catch_up_cutoff = self._read_catch_up_cutoff()
+        if block.timestamp < self._catch_up_cutoff:
+            return True
+        LOG.info(f"Caught up at block #{block.number} @ ({block.timestamp_dt}), process blocks live")
+        self._live = True
+        return False
+
+    def _catch_up(self, block: SummaryBlock) -> None:
+        """
+        Totals, index and rollups only: no clock, price or outbox checks, no report can fire for an old block.
+        """
+        self._accumulate(block)
+        self._process_if_end_rollup()
+
+        # milestones long passed are not announced, the latest one still is once live if it never was
+        while self._burned_eth > self._burned_threshold + TWEET_THRESHOLD:
+            self._burned_threshold += TWEET_THRESHOLD
+
+        if block.number % 10000 == 0:
+            LOG.info(f"Catching up block={block.number} time={block.timestamp_dt} burned_eth={self._burned_eth}")
+
     # AMT BURNED
 
     def _write_tweet_burned_eth_usd(self, filename_sub: str, threshold_usd: Decimal) -> None:
 
-        tweet_filename: str = self.tweet_filename(filename_sub)
-        # write tweet to pending tweets dir
-
         tweet: str = f"Cumulative ${threshold_usd:,.0f} of ETH burned! 🔥 ({self._burned_eth:,.2f} ETH)"
-        pending_filepath: str = os.path.join(pending_tweets_dir(), tweet_filename)
-        LOG.info(f"Writing tweet {filename_sub} to {pending_filepath}")
-        with open(pending_filepath, "w") as f:
-            f.write(tweet)
+        LOG.info(f"Queue tweet {filename_sub}")
+        self._outbox.enqueue(filename_sub, tweet, priority=PRIORITY_MILESTONE)
         self._written.add(filename_sub)
 
     # FUNDAMENTALS
@@ -114,6 +278,11 @@ class BlockProcessor:
             fundamentals_hour_filename_str = f"fundamentals_{hour_str(self.last_block.hour_dt)}"
             if self.needs_tweet(fundamentals_hour_filename_str):
                 metrics = self._trailing_aggregate(timedelta(days=30))
+                if metrics is None:
+                    LOG.warning(
+                        f"Skip {fundamentals_hour_filename_str}, the index does not reach block {self.last_block.number}"
+                    )
+                    return
 
                 # get price
                 eth_usd_price: Decimal = self._coinbase_client.get_price("ETH")
@@ -124,14 +293,9 @@ class BlockProcessor:
         self, filename_sub: str, metrics: AggregateBlockMetrics, eth_usd_price: Decimal
     ) -> None:
 
-        tweet_filename: str = self.tweet_filename(filename_sub)
-        # write tweet to pending tweets dir
-
         tweet: str = write_tweet_fundamentals(metrics, eth_usd_price)
-        pending_filepath: str = os.path.join(pending_tweets_dir(), tweet_filename)
-        LOG.info(f"Writing tweet {filename_sub} to {pending_filepath}")
-        with open(pending_filepath, "w") as f:
-            f.write(tweet)
+        LOG.info(f"Queue tweet {filename_sub}")
+        self._outbox.enqueue(filename_sub, tweet, priority=PRIORITY_DAILY)
         self._written.add(filename_sub)
 
     # THRESHOLD
@@ -148,14 +312,9 @@ class BlockProcessor:
             self._burned_threshold += TWEET_THRESHOLD
 
     def write_tweet_threshold(self, eth_usd_price: Decimal) -> None:
-        tweet_filename: str = self.tweet_filename(self._burned_threshold)
-        # write tweet to pending tweets dir
         tweet: str = write_tweet_threshold(burnt_eth=self._burned_threshold, eth_usd_price=eth_usd_price)
-        pending_filepath: str = os.path.join(pending_tweets_dir(), tweet_filename)
-        LOG.info(f"Writing {self._burned_threshold} ETH burned tweet to {pending_filepath}")
-        os.makedirs(os.path.dirname(pending_filepath), exist_ok=True)
-        with open(pending_filepath, "w") as f:
-            f.write(tweet)
+        LOG.info(f"Queue {self._burned_threshold} ETH burned tweet")
+        self._outbox.enqueue(f"{self._burned_threshold}", tweet, priority=PRIORITY_MILESTONE)
 
     # TIME AGGREGATE
 
@@ -169,7 +328,7 @@ class BlockProcessor:
             prev_block = self._blocks[-2]
             assert prev_block.number + 1 == block.number
 
-            now = datetime.now()
+            now = self._clock.now()
             now_hour = now.replace(minute=0, second=0, microsecond=0)
             now_day = now_hour.replace(hour=0)
             prev_hour = now_hour - timedelta(hours=1)
@@ -185,21 +344,64 @@ class BlockProcessor:
                         metrics: AggregateBlockMetrics = self.aggregate(hour_dt=prev_block.hour_dt)
                         # get price
                         eth_usd_price: Decimal = self._coinbase_client.get_price("ETH")
-                        tweet_filename = self._write_tweet_aggregate(metrics=metrics, eth_usd_price=eth_usd_price)
-
-                        self.write_svg(tweet_filename, metrics)
-
-            # summarize day
-            if block.day_dt > prev_block.day_dt:
-                if self.needs_tweet(day_str(prev_block.day_dt)):
-                    # get price
-                    eth_usd_price: Decimal = self._coinbase_client.get_price("ETH")
-
-                    LOG.info(f"Processing day before {block.timestamp_dt}...")
-                    metrics: AggregateBlockMetrics = self.aggregate(day_dt=prev_block.day_dt)
-                    tweet_filename = self._write_tweet_aggregate(metrics=metrics, eth_usd_price=eth_usd_price)
+                        trace: Dict[str, float] = new_trace(block, self._received_at)
+                        self._publish_aggregate(metrics=metrics, eth_usd_price=eth_usd_price, trace=trace)
+
+    def _add_to_sketches(self, block: SummaryBlock, hour_dt: datetime) -> None:
+        if self._new_hour:
+            # the closed hour is kept for its report and rollup
+            prev_block: SummaryBlock = self._blocks[-2]
+            self._hour_sketches = {h: v for h, v in self._hour_sketches.items() if h >= prev_block.hour_dt}
+
+        sketches: Optional[FeeSketches] = self._hour_sketches.get(hour_dt)
+        if sketches is None:
+            sketches = self._hour_sketches[hour_dt] = FeeSketches()
+        sketches.add(block.base_fee_per_gas, block.gas_used, block.gas_limit)
+
+    def _process_if_end_rollup(self) -> None:
+        if not self._new_hour:
+            return
+        block: SummaryBlock = self._blocks[-1]
+        prev_block: SummaryBlock = self._blocks[-2]
+
+        if self._indexed(prev_block):
+            hour_metrics: Optional[AggregateBlockMetrics] = self._index.aggregate_time(
+                prev_block.hour_dt, prev_block.hour_dt + timedelta(hours=1)
+            )
+            if hour_metrics is None:
+                return
+            hour = HourlyAggregateBlockMetrics(
+                day=prev_block.day_dt,
+                hour=prev_block.hour_dt,
+                **{**vars(hour_metrics), "fee_sketches": self._hour_sketches.get(prev_block.hour_dt)},
+                # the index holds the hour from its start
+                complete=self._index.block_at(prev_block.hour_dt) is not None,
+            )
+        else:
+            # the index is behind, the processed blocks still hold the hour
+            hour = replace(
+                self.aggregate(hour_dt=prev_block.hour_dt), complete=self._blocks[0].hour_dt < prev_block.hour_dt
+            )
 
-                    self.write_svg(tweet_filename, metrics)
+        now_hour = self._clock.now().replace(minute=0, second=0, microsecond=0)
+        for cadence, metrics in self._rollups.add_hour(hour):
+            # days are always reported, the other cadences when configured to
+            if cadence.name != DAY and not cadence.publish:
+                continue
+            # only report periods that just ended, not ones replayed while catching up
+            if block.timestamp_dt < now_hour or not self.needs_tweet(metrics.name):
+                continue
+            if not metrics.complete:
+                LOG.warning(
+                    f"Archive {cadence.name} {metrics.time_range_str()} without tweeting it, only blocks "
+                    f"{metrics.start_number}-{metrics.end_number} of it were seen"
+                )
+                self._archive_aggregate(metrics, self._coinbase_client.get_price("ETH"))
+                continue
+            LOG.info(f"Processing {cadence.name} {metrics.time_range_str()}...")
+            eth_usd_price: Decimal = self._coinbase_client.get_price("ETH")
+            trace: Dict[str, float] = new_trace(block, self._received_at)
+            self._publish_aggregate(metrics=metrics, eth_usd_price=eth_usd_price, trace=trace)
 
     def tweet_filename(self, time_str: str) -> str:
         return f"tweet_{time_str}.txt"
@@ -207,35 +409,69 @@ class BlockProcessor:
     def needs_tweet(self, filename_substring: str) -> bool:
         if filename_substring in self._written:
             return False
-        tweet_filename: str = self.tweet_filename(filename_substring)
 
-        # check if already tweeted
-        tweeted_filepath: str = os.path.join(tweeted_tweets_dir(), tweet_filename)
-        if os.path.exists(tweeted_filepath):
+        # check if already queued or tweeted
+        if self._outbox.contains(filename_substring):
             LOG.info(f"Tweet {filename_substring} already written")
             self._written.add(filename_substring)
             return False
         else:
             return True
 
-    def _write_tweet_aggregate(self, metrics: AggregateBlockMetrics, eth_usd_price: Decimal) -> str:
-        time_str = hour_str(metrics.hour) if isinstance(metrics, HourlyAggregateBlockMetrics) else day_str(metrics.day)
-        time_range_str = (
-            metrics.hour_range_str() if isinstance(metrics, HourlyAggregateBlockMetrics) else metrics.day_range_str()
+    def _publish_aggregate(
+        self, metrics: PeriodAggregateBlockMetrics, eth_usd_price: Decimal, trace: Optional[Dict[str, float]] = None
+    ) -> None:
+        if self._render_executor is None:
+            self._write_aggregate_report(metrics, eth_usd_price, trace)
+            return
+
+        future: Future = self._render_executor.submit(self._write_aggregate_report, metrics, eth_usd_price, trace)
+        future.add_done_callback(_log_failure)
+
+    def _write_aggregate_report(
+        self, metrics: PeriodAggregateBlockMetrics, eth_usd_price: Decimal, trace: Optional[Dict[str, float]] = None
+    ) -> None:
+        # image first, the tweeter picks up the report as soon as it is queued
+        pending_filepath: str = os.path.join(pending_tweets_dir(), self.tweet_filename(metrics.name))
+        media_filepath: str = self.write_svg(pending_filepath, metrics, trace=trace)
+        self._write_tweet_aggregate(
+            metrics=metrics, eth_usd_price=eth_usd_price, media_path=media_filepath, trace=trace
         )
 
-        tweet_filename: str = self.tweet_filename(time_str)
-        # write tweet to pending tweets dir
+    def _write_tweet_aggregate(
+        self,
+        metrics: PeriodAggregateBlockMetrics,
+        eth_usd_price: Decimal,
+        media_path: Optional[str] = None,
+        trace: Optional[Dict[str, float]] = None,
+    ) -> str:
+        is_hourly = isinstance(metrics, HourlyAggregateBlockMetrics)
+        time_range_str = metrics.time_range_str()
+
+        name: str = metrics.name
         tweet: str = write_tweet_aggregate(metrics, eth_usd_price)
-        pending_filepath: str = os.path.join(pending_tweets_dir(), tweet_filename)
-        LOG.info(f"Writing tweet {time_range_str} to {pending_filepath}")
-        with open(pending_filepath, "w") as f:
-            f.write(tweet)
+        stamp(trace, "written")
+        LOG.info(f"Queue tweet {time_range_str}")
+        self._outbox.enqueue(
+            name,
+            tweet,
+            media_path=media_path,
+            priority=PRIORITY_HOURLY if is_hourly else PRIORITY_DAILY,
+            trace=trace,
+        )
 
-        return pending_filepath
+        return name
 
-    def write_svg(self, pending_filepath: str, metrics: AggregateBlockMetrics) -> None:
+    def _archive_aggregate(self, metrics: PeriodAggregateBlockMetrics, eth_usd_price: Decimal) -> None:
+        tweet: str = write_tweet_aggregate(metrics, eth_usd_price)
+        self._outbox.enqueue(metrics.name, tweet, priority=PRIORITY_DAILY, state=STATE_ARCHIVED)
+        self._written.add(metrics.name)
+
+    def write_svg(
+        self, pending_filepath: str, metrics: PeriodAggregateBlockMetrics, trace: Optional[Dict[str, float]] = None
+    ) -> str:
         assert pending_filepath.endswith(".txt")
+        os.makedirs(os.path.dirname(pending_filepath), exist_ok=True)
         # svg
         eth_usd_price: Decimal = self._coinbase_client.get_price("ETH")
         svg: str = make_svg(metrics=metrics, eth_price_usd=eth_usd_price)
@@ -251,44 +487,28 @@ class BlockProcessor:
         LOG.info(f"Write PNG file to {pending_img_filepath_png}")
         cairosvg.svg2png(url=pending_img_filepath_svg, write_to=pending_img_filepath_png)
         os.remove(pending_img_filepath_svg)
+        stamp(trace, "rendered")
 
         return pending_img_filepath_png
 
-    def _trailing_aggregate(self, delta: timedelta) -> None:
+    def _trailing_aggregate(self, delta: timedelta) -> Optional[AggregateBlockMetrics]:
         last_block = self._blocks[len(self._blocks) - 1]
         start_dt = last_block.timestamp_dt - delta
+        if not self._indexed(last_block):
+            return None
 
-        burnt_eth: Decimal = Decimal(0)
-        start_number = None
-        end_number = None
-        cumulative_burnt_eth: Decimal = Decimal(0)
-        base_issuance_eth: Decimal = Decimal(0)
-        uncle_issuance_eth: Decimal = Decimal(0)
-        for block in self._blocks:
-            if block.timestamp_dt <= last_block.timestamp_dt:
-                cumulative_burnt_eth += block.burned_eth
-
-            if block.timestamp_dt >= start_dt and block.timestamp_dt <= last_block.timestamp_dt:
-                burnt_eth = burnt_eth + block.burned_eth
-
-                start_number = start_number if start_number is not None else block.number
-                end_number = block.number
-
-                base_issuance_eth = base_issuance_eth + block.base_issuance_eth
-                uncle_issuance_eth = uncle_issuance_eth + block.uncle_reward_eth
-        return AggregateBlockMetrics(
-            start_number=start_number,
-            end_number=end_number,
-            burnt_eth=burnt_eth,
-            cumulative_burned_eth=cumulative_burnt_eth,
-            base_issuance_eth=base_issuance_eth,
-            uncle_issuance_eth=uncle_issuance_eth,
-        )
-
-    def aggregate(
-        self, hour_dt: Optional[datetime] = None, day_dt: Optional[datetime] = None
-    ) -> DayAggregateBlockMetrics:
-        assert (hour_dt is None) ^ (day_dt is None)
+        # blocks mined from start_dt up to and including the last block
+        blocks = self._index.blocks_between(start_dt, last_block.timestamp_dt + timedelta(seconds=1))
+        if blocks is None:
+            return None
+        if self._index.block_at(start_dt) is None:
+            LOG.warning(f"Trailing {delta} starts before block {blocks[0]}, the first indexed block")
+        return self._index.aggregate(*blocks)
+
+    def aggregate(self, hour_dt: datetime) -> HourlyAggregateBlockMetrics:
+        """
+        Metrics of the hour `hour_dt` from the processed blocks. Days and longer periods come from the rollups.
+        """
         burnt_eth: Decimal = Decimal(0)
         start_number = None
         end_number = None
@@ -298,13 +518,15 @@ class BlockProcessor:
         uncle_issuance_eth: Decimal = Decimal(0)
         inrange_gas_used: Decimal = Decimal(0)
         inrange_gas_fees_paid: Decimal = Decimal(0)
+        # unknown as soon as one block was pulled without its receipts
+        priority_fees_eth: Optional[Decimal] = Decimal(0)
         for block in self._blocks:
             # count sum of previous
-            if (hour_dt is not None and block.hour_dt <= hour_dt) or (day_dt is not None and block.day_dt <= day_dt):
+            if block.hour_dt <= hour_dt:
                 cumulative_burnt_eth = cumulative_burnt_eth + block.burned_eth
 
             # count within range
-            if (hour_dt is not None and block.hour_dt == hour_dt) or (day_dt is not None and block.day_dt == day_dt):
+            if block.hour_dt == hour_dt:
                 burnt_eth = burnt_eth + block.burned_eth
                 inrange_gas_used += block.gas_used
                 inrange_gas_fees_paid += block.gas_used * block.base_fee_per_gas
@@ -314,29 +536,28 @@ class BlockProcessor:
 
                 base_issuance_eth = base_issuance_eth + block.base_issuance_eth
                 uncle_issuance_eth = uncle_issuance_eth + block.uncle_reward_eth
+                if priority_fees_eth is not None and block.priority_fees_eth is not None:
+                    priority_fees_eth = priority_fees_eth + block.priority_fees_eth
+                else:
+                    priority_fees_eth = None
+
+        return HourlyAggregateBlockMetrics(
+            day=hour_dt.replace(hour=0),
+            hour=hour_dt,
+            start_number=start_number,
+            end_number=end_number,
+            burnt_eth=burnt_eth,
+            cumulative_burned_eth=cumulative_burnt_eth,
+            base_issuance_eth=base_issuance_eth,
+            uncle_issuance_eth=uncle_issuance_eth,
+            gas_used=inrange_gas_used,
+            gas_fees_paid=inrange_gas_fees_paid,
+            fee_sketches=self._hour_sketches.get(hour_dt),
+            priority_fees_eth=priority_fees_eth,
+            supply_eth=self._index.supply(end_number) if end_number is not None else None,
+        )
 
-        if hour_dt is not None:
-            return HourlyAggregateBlockMetrics(
-                day=hour_dt.replace(hour=0),
-                hour=hour_dt,
-                start_number=start_number,
-                end_number=end_number,
-                burnt_eth=burnt_eth,
-                cumulative_burned_eth=cumulative_burnt_eth,
-                base_issuance_eth=base_issuance_eth,
-                uncle_issuance_eth=uncle_issuance_eth,
-                gas_used=inrange_gas_used,
-                gas_fees_paid=inrange_gas_fees_paid,
-            )
-        else:
-            return DayAggregateBlockMetrics(
-                day=day_dt,
-                start_number=start_number,
-                end_number=end_number,
-                burnt_eth=burnt_eth,
-                cumulative_burned_eth=cumulative_burnt_eth,
-                base_issuance_eth=base_issuance_eth,
-                uncle_issuance_eth=uncle_issuance_eth,
-                gas_used=inrange_gas_used,
-                gas_fees_paid=inrange_gas_fees_paid,
-            )
+
+def _log_failure(future: Future) -> None:
+    if future.exception() is not None:
+        LOG.error(f"Failed to write report: {future.exception()!r}")
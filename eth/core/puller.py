@@ -1,7 +1,10 @@
 import os
+from concurrent.futures import ThreadPoolExecutor
 from logging import getLogger
-from typing import List
+from typing import Any, Dict, List, Optional
 
+from eth.core.archive import is_archived
+from eth.core.block_writer import BlockWriter
 from eth.core.ethereum_client import EthereumClient
 from eth.core.reader import read_block, read_uncle_block
 from eth.core.writer import write_block, write_uncle_block
@@ -10,21 +13,50 @@ from eth.utils.file_utils import uncle_block_filepath
 
 LOG = getLogger(__name__)
 
+# one block can include up to two uncles
+MAX_UNCLES = 2
+# transactions per eth_getTransactionReceipt batch request
+RECEIPT_BATCH_SIZE = 100
+# sha3Uncles of a block without uncles, the hash of an empty RLP list
+EMPTY_UNCLES_HASH = "0x1dcc4de8dec75d7aab85b567b6ccd41ad312451b948a7413f0a142fd40d49347"
+
+
+def priority_fees(receipts: List[Dict[str, Any]], base_fee_per_gas: int) -> int:
+    """
+    Tips paid by a block's transactions (wei): the gas each used times what it paid per gas above the BASEFEE.
+    """
+    return sum(int(r["gasUsed"], 16) * (int(r["effectiveGasPrice"], 16) - base_fee_per_gas) for r in receipts)
+
 
 class BlockPuller:
-    def __init__(self, eth_client: EthereumClient):
+    def __init__(
+        self,
+        eth_client: EthereumClient,
+        block_writer: Optional[BlockWriter] = None,
+        fetch_priority_fees: bool = False,
+        receipt_workers: int = 4,
+    ):
         self._eth_client: EthereumClient = eth_client
+        # write through a background writer instead of on the calling thread
+        self._block_writer: Optional[BlockWriter] = block_writer
+        # receipts are reduced to the block's tips as they are pulled, only the total is cached
+        self._fetch_priority_fees = fetch_priority_fees
+        self._receipt_executor: Optional[ThreadPoolExecutor] = (
+            ThreadPoolExecutor(max_workers=receipt_workers, thread_name_prefix="receipts")
+            if fetch_priority_fees
+            else None
+        )
 
     def eth_blockNumber(self) -> int:
         return self._eth_client.eth_blockNumber()
 
-    def _get_uncles(self, block: Block, cached: bool = False, prev_sha3_uncles: str = "") -> List[UncleBlock]:
+    def _get_uncles(self, block: Block, cached: bool = False) -> List[UncleBlock]:
 
-        has_uncles = prev_sha3_uncles != block._sha3_uncles
+        # known from the block alone, so blocks can be pulled in any order
+        has_uncles = block._sha3_uncles != EMPTY_UNCLES_HASH
         uncles: List[UncleBlock] = []
         # fetch uncles
         if has_uncles:
-            # LOG.info(f"Block {block._number} has uncles: {prev_sha3_uncles} -> {block._sha3_uncles}")
             num_uncles: int = self.eth_getUncleCountByBlockNumber(block.number, cached=cached)
             if num_uncles > 0:
                 # LOG.info(f"Block {num} has {num_uncles} uncle{'s' if num_uncles > 1 else ''}")
@@ -41,32 +73,73 @@ class BlockPuller:
 
                     if uncle_block is None:
                         uncle_block = self._eth_client.eth_getUncleByBlockNumberAndIndex(block.number, i)
-                        write_uncle_block(uncle_block, warn_overwrite=found_cached)
+                        self._write_uncle_block(uncle_block, warn_overwrite=found_cached)
 
                     uncles.append(uncle_block)
 
         return uncles
 
-    def eth_getBlockByNumber(self, num: int, cached: bool = False, prev_sha3_uncles: str = "") -> DetailedBlock:
+    def eth_getBlockByNumber(self, num: int, cached: bool = False) -> DetailedBlock:
         block = None
         if cached:
             block = read_block(num)
         found_cached = block is not None
 
+        if block is not None and self._fetch_priority_fees and "__priority_fees" not in block._data:
+            if "transactions" not in block._data:
+                # compacted without its transactions, pulled again for its tips
+                block = None
+
         if block is None:
             # else we need to pull it and write it
             block = self._eth_client.eth_getBlockByNumber(num)
 
-        uncles: List[UncleBlock] = self._get_uncles(block, cached=cached, prev_sha3_uncles=prev_sha3_uncles)
-        detailed_block: DetailedBlock = DetailedBlock(block, uncles)
-        write_block(detailed_block, warn_overwrite=found_cached)
-        return block
+        uncles: List[UncleBlock] = self._get_uncles(block, cached=cached)
+        tips: Optional[int] = None
+        if self._fetch_priority_fees and "__priority_fees" not in block._data:
+            tips = self._get_priority_fees(block)
+        detailed_block: DetailedBlock = DetailedBlock(block, uncles, priority_fees=tips)
+        # archived blocks stay in the archive instead of coming back to the hot cache, unless they gained tips
+        if not (found_cached and is_archived(num)) or tips is not None:
+            self._write_block(detailed_block, warn_overwrite=found_cached)
+        return detailed_block
+
+    def _get_priority_fees(self, block: Block) -> int:
+        tx_hashes: List[str] = block._data["transactions"]
+        if len(tx_hashes) == 0:
+            return 0
+
+        receipts: Optional[List[Dict[str, Any]]] = self._eth_client.eth_getBlockReceipts(block.number)
+        if receipts is None:
+            # batches of transaction receipts, a few in flight at once
+            size: int = self._eth_client.batch_size(RECEIPT_BATCH_SIZE)
+            batches = [tx_hashes[i : i + size] for i in range(0, len(tx_hashes), size)]
+            receipts = [
+                receipt
+                for batch in self._receipt_executor.map(self._eth_client.eth_getTransactionReceipts, batches)
+                for receipt in batch
+            ]
+        if len(receipts) != len(tx_hashes):
+            raise IOError(f"Block {block.number} has {len(tx_hashes)} transactions but {len(receipts)} receipts")
+        return priority_fees(receipts, block.base_fee_per_gas)
+
+    def _write_block(self, block: DetailedBlock, warn_overwrite: bool) -> None:
+        if self._block_writer is not None:
+            self._block_writer.write_block(block, warn_overwrite=warn_overwrite)
+        else:
+            write_block(block, warn_overwrite=warn_overwrite)
+
+    def _write_uncle_block(self, uncle_block: UncleBlock, warn_overwrite: bool) -> None:
+        if self._block_writer is not None:
+            self._block_writer.write_uncle_block(uncle_block, warn_overwrite=warn_overwrite)
+        else:
+            write_uncle_block(uncle_block, warn_overwrite=warn_overwrite)
 
     def eth_getUncleCountByBlockNumber(self, num: int, cached: bool) -> int:
         # one block can include up to two uncles
-        if cached and os.path.exists(uncle_block_filepath(num, 1)):
+        if cached and (os.path.exists(uncle_block_filepath(num, 1)) or is_archived(num, 1)):
             return 2
-        elif cached and os.path.exists(uncle_block_filepath(num, 0)):
+        elif cached and (os.path.exists(uncle_block_filepath(num, 0)) or is_archived(num, 0)):
             return 1
         else:
             return self._eth_client.eth_getUncleCountByBlockNumber(num)
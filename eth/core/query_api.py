@@ -0,0 +1,229 @@
+import json
+from datetime import datetime, timedelta
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from logging import getLogger
+from threading import Lock
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from eth.core.index import BlockIndex
+from eth.core.writer import calc_inflation_rate
+from eth.types.block import AggregateBlockMetrics
+
+LOG = getLogger(__name__)
+
+GWEI = Decimal(10**9)
+MAX_BUCKETS = 2000
+BUCKETS: Dict[str, timedelta] = {"hour": timedelta(hours=1), "day": timedelta(days=1)}
+
+
+class QueryError(Exception):
+    pass
+
+
+def parse_time(value: str) -> datetime:
+    """
+    ISO format or unix seconds.
+    """
+    try:
+        return datetime.fromtimestamp(int(value))
+    except ValueError:
+        pass
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise QueryError(f"Invalid time: {value}")
+
+
+def _int(value: str) -> int:
+    try:
+        return int(value)
+    except ValueError:
+        raise QueryError(f"Invalid block number: {value}")
+
+
+def metrics_json(
+    metrics: AggregateBlockMetrics, start_time: datetime, end_time: datetime, period: timedelta
+) -> Dict[str, Any]:
+    return {
+        "start_block": metrics.start_number,
+        "end_block": metrics.end_number,
+        "num_blocks": metrics.num_blocks,
+        "start_time": start_time.isoformat(),
+        "end_time": end_time.isoformat(),
+        "burned_eth": str(metrics.burnt_eth),
+        "cumulative_burned_eth": str(metrics.cumulative_burned_eth),
+        "issuance_eth": str(metrics.issuance_eth),
+        "base_issuance_eth": str(metrics.base_issuance_eth),
+        "uncle_issuance_eth": str(metrics.uncle_issuance_eth),
+        "net_issuance_eth": str(metrics.net_issuance_eth),
+        "priority_fees_eth": str(metrics.priority_fees_eth) if metrics.priority_fees_eth is not None else None,
+        "gas_used": str(metrics.gas_used),
+        "avg_base_fee_gwei": str(metrics.gas_fees_paid / metrics.gas_used / GWEI) if metrics.gas_used > 0 else None,
+        "supply_eth": str(metrics.supply_eth) if metrics.supply_eth is not None else None,
+        "inflation_pct_annualized": str(calc_inflation_rate(metrics, period=period)),
+    }
+
+
+class MetricsQueries:
+    """
+    Burn and issuance queries answered from the block index, never from the cached blocks.
+    """
+
+    def __init__(self, index: BlockIndex):
+        self._index = index
+        # the header is re-read once per request, in case the processor started the index over
+        self._lock = Lock()
+
+    def _refresh(self) -> None:
+        with self._lock:
+            self._index.refresh()
+
+    def status(self, params: Dict[str, str]) -> Dict[str, Any]:
+        self._refresh()
+        last_block = self._index.last_block
+        return {
+            "first_block": self._index.first_block,
+            "last_block": last_block,
+            "last_block_time": (
+                datetime.fromtimestamp(self._index.timestamp(last_block)).isoformat() if last_block else None
+            ),
+        }
+
+    def supply(self, params: Dict[str, str]) -> Dict[str, Any]:
+        """
+        /supply?block=, the last indexed block by default
+        """
+        self._refresh()
+        num = _int(params["block"]) if "block" in params else self._index.last_block
+        supply = self._index.supply(num) if num is not None else None
+        if supply is None:
+            raise QueryError(f"No supply known at block {num}")
+        return {"block": num, "supply_eth": str(supply)}
+
+    def metrics(self, params: Dict[str, str]) -> Dict[str, Any]:
+        """
+        /metrics?start_block=&end_block= or /metrics?start_time=&end_time=
+        """
+        self._refresh()
+        if "start_block" in params or "end_block" in params:
+            start = _int(params["start_block"]) if "start_block" in params else self._index.first_block
+            end = _int(params["end_block"]) if "end_block" in params else self._index.last_block
+            return self._block_range(start, end)
+
+        start_time, end_time = self._time_range(params)
+        result = self._time_bucket(start_time, end_time)
+        if result is None:
+            raise QueryError(f"No indexed blocks from {start_time} to {end_time}")
+        return result
+
+    def buckets(self, params: Dict[str, str], bucket: str) -> List[Dict[str, Any]]:
+        """
+        /hours?start_time=&end_time= or /days?start_time=&end_time=, every bucket with indexed blocks
+        """
+        self._refresh()
+        start_time, end_time = self._time_range(params)
+        period = BUCKETS[bucket]
+        start_time = start_time.replace(minute=0, second=0, microsecond=0)
+        if bucket == "day":
+            start_time = start_time.replace(hour=0)
+        if (end_time - start_time) / period > MAX_BUCKETS:
+            raise QueryError(f"More than {MAX_BUCKETS} {bucket}s requested")
+
+        results: List[Dict[str, Any]] = []
+        bucket_start = start_time
+        while bucket_start < end_time:
+            result = self._time_bucket(bucket_start, bucket_start + period)
+            if result is not None:
+                results.append(result)
+            bucket_start += period
+        return results
+
+    def _time_range(self, params: Dict[str, str]) -> Tuple[datetime, datetime]:
+        if "start_time" not in params:
+            raise QueryError("start_time is required")
+        start_time = parse_time(params["start_time"])
+        end_time = parse_time(params["end_time"]) if "end_time" in params else datetime.now()
+        if end_time <= start_time:
+            raise QueryError("end_time must be after start_time")
+        return start_time, end_time
+
+    def _time_bucket(self, start_time: datetime, end_time: datetime) -> Optional[Dict[str, Any]]:
+        blocks = self._index.blocks_between(start_time, end_time)
+        if blocks is None:
+            return None
+        return metrics_json(self._index.aggregate(*blocks), start_time, end_time, period=end_time - start_time)
+
+    def _block_range(self, start: Optional[int], end: Optional[int]) -> Dict[str, Any]:
+        if start is None or end is None or end < start:
+            raise QueryError(f"Invalid block range {start}-{end}")
+        try:
+            metrics = self._index.aggregate(start, end)
+        except ValueError as e:
+            raise QueryError(str(e))
+
+        # the range covers the time since the block before it
+        start_ts = self._index.timestamp(start - 1) or self._index.timestamp(start)
+        end_ts = self._index.timestamp(end)
+        start_time, end_time = datetime.fromtimestamp(start_ts), datetime.fromtimestamp(end_ts)
+        period = max(end_time - start_time, timedelta(seconds=1))
+        return metrics_json(metrics, start_time, end_time, period=period)
+
+
+class QueryServer:
+    """
+    Local read-only HTTP API over the block index. Each request reads a few index records, so queries stay
+    fast and never block on the processor appending to the index.
+    """
+
+    def __init__(self, index: BlockIndex, host: str = "127.0.0.1", port: int = 8550):
+        queries = MetricsQueries(index)
+        routes: Dict[str, Callable[[Dict[str, str]], Any]] = {
+            "/status": queries.status,
+            "/metrics": queries.metrics,
+            "/supply": queries.supply,
+            "/hours": lambda params: queries.buckets(params, "hour"),
+            "/days": lambda params: queries.buckets(params, "day"),
+        }
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlparse(self.path)
+                params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+                route = routes.get(url.path)
+                if route is None:
+                    self._respond(404, {"error": f"Unknown path {url.path}, expected one of {sorted(routes)}"})
+                    return
+                try:
+                    self._respond(200, route(params))
+                except QueryError as e:
+                    self._respond(400, {"error": str(e)})
+                except Exception as e:
+                    LOG.exception(f"Query {self.path} failed")
+                    self._respond(500, {"error": repr(e)})
+
+            def _respond(self, status: int, body: Any) -> None:
+                content = json.dumps(body, indent=2).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            def log_message(self, format, *args):
+                LOG.debug(format % args)
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def serve_forever(self) -> None:
+        self._server.serve_forever()
+
+    def shutdown(self) -> None:
+        self._server.shutdown()
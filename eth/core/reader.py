@@ -1,46 +1,90 @@
 import json
 import os
+import time
 from logging import getLogger
-from typing import Optional
+from typing import Any, Dict, Optional
 
+from eth.core.archive import BLOCK_INDEX, read_archived
+from eth.core.block_client import BlockClient
 from eth.types.block import Block, DetailedBlock, SummaryBlock, UncleBlock
 from eth.utils.file_utils import block_filepath, uncle_block_filepath
 
 LOG = getLogger(__name__)
 
+# URL of a bin/run_block_server.py to read blocks from instead of data/blocks
+BLOCK_SERVER_ENV = "ETHBURNBOT_BLOCK_SERVER"
 
-def read_block(num: int) -> Optional[SummaryBlock]:
+_block_client: Optional[BlockClient] = None
 
-    filepath = block_filepath(num)
 
-    if not os.path.exists(filepath):
+def block_client() -> Optional[BlockClient]:
+    """
+    Client of the block server named by ETHBURNBOT_BLOCK_SERVER, None to read the local block files.
+    """
+    global _block_client
+    url = os.getenv(BLOCK_SERVER_ENV)
+    if not url:
         return None
+    if _block_client is None or _block_client.url != url.rstrip("/"):
+        _block_client = BlockClient(url)
+    return _block_client
 
-    if os.stat(filepath).st_size == 0:
-        LOG.warning(f"Deleting erroneous empty cache file: {filepath}")
-        os.remove(filepath)
-        return None
 
-    with open(filepath, "r") as f:
-        try:
-            content = json.loads(f.read())
-        except Exception as e:
-            print("could not read", f)
-            raise
-        return SummaryBlock(content)
+def read_block_json(num: int, uncle_index: int = BLOCK_INDEX) -> Optional[Dict[str, Any]]:
+    """
+    Cached JSON of a block, or of one of its uncles, None if it is not cached.
+    Raises ValueError if the cached file is empty or not valid JSON.
+    """
+    filepath = block_filepath(num) if uncle_index == BLOCK_INDEX else uncle_block_filepath(num, uncle_index)
 
+    try:
+        with open(filepath, "r") as f:
+            return json.loads(f.read())
+    except FileNotFoundError:
+        # cold history is sealed into archives by bin/run_archiver.py
+        content = read_archived(num, uncle_index)
+        return json.loads(content) if content is not None else None
 
-def read_uncle_block(num: int, uncle_index: int) -> Optional[UncleBlock]:
-    filepath = uncle_block_filepath(num, uncle_index)
 
-    if not os.path.exists(filepath):
+def _read_or_delete(num: int, uncle_index: int) -> Optional[Dict[str, Any]]:
+    try:
+        return read_block_json(num, uncle_index)
+    except ValueError as e:
+        # truncated or empty file, the puller fetches the block again
+        filepath = block_filepath(num) if uncle_index == BLOCK_INDEX else uncle_block_filepath(num, uncle_index)
+        if os.path.exists(filepath):
+            LOG.warning(f"Deleting erroneous cache file: {filepath}: {e}")
+            os.remove(filepath)
+        else:
+            LOG.error(f"Erroneous archived block {num} uncle {uncle_index}: {e}")
         return None
 
-    if os.stat(filepath).st_size == 0:
-        LOG.warning(f"Deleting erroneous empty cache file: {filepath}")
-        os.remove(filepath)
-        return None
 
-    with open(filepath, "r") as f:
-        content = json.loads(f.read())
-        return UncleBlock(content, num, uncle_index)
+def read_block(num: int) -> Optional[SummaryBlock]:
+    client = block_client()
+    content = client.read_block_json(num) if client is not None else _read_or_delete(num, BLOCK_INDEX)
+    return SummaryBlock(content) if content is not None else None
+
+
+def wait_block(num: int, timeout: float) -> Optional[SummaryBlock]:
+    """
+    Block `num`, waiting up to `timeout` seconds for it to be cached. A block server is long-polled, local
+    files are checked every second.
+    """
+    client = block_client()
+    if client is not None:
+        content = client.wait_block_json(num, timeout)
+        return SummaryBlock(content) if content is not None else None
+
+    deadline = time.time() + timeout
+    while True:
+        block = read_block(num)
+        remaining = deadline - time.time()
+        if block is not None or remaining <= 0:
+            return block
+        time.sleep(min(remaining, 1))
+
+
+def read_uncle_block(num: int, uncle_index: int) -> Optional[UncleBlock]:
+    content = _read_or_delete(num, uncle_index)
+    return UncleBlock(content, num, uncle_index) if content is not None else None
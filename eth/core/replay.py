@@ -0,0 +1,124 @@
+import time
+from datetime import datetime
+from decimal import Decimal
+from logging import getLogger
+from typing import Any, Dict, List, Optional
+
+from eth.core.clock import SimulatedClock
+from eth.core.latency import percentile, stage_latencies
+from eth.core.outbox import Outbox
+from eth.core.processor import BlockProcessor
+from eth.core.reader import read_block
+from eth.types.block import SummaryBlock
+
+LOG = getLogger(__name__)
+
+# a live block reaches the processor about this long after it is mined
+RECEIVE_DELAY_SEC: float = 2.0
+# report stages timed from the traces, render includes aggregating the period
+REPORT_STAGES: Dict[str, str] = {"rendered": "render", "written": "write"}
+PERCENTILES: List[int] = [50, 90, 99]
+
+
+class FixedPriceClient:
+    """
+    ETH/USD price that never moves, so replays are reproducible and make no requests.
+    """
+
+    def __init__(self, price: Decimal = Decimal(3000)):
+        self._price = price
+
+    def get_price(self, symbol: str) -> Decimal:
+        return self._price
+
+
+def summarize(values: List[float]) -> Dict[str, float]:
+    if len(values) == 0:
+        return {"count": 0}
+    stats: Dict[str, float] = {"count": len(values), "total": sum(values)}
+    stats.update({f"p{p}": percentile(values, p) for p in PERCENTILES})
+    stats["max"] = max(values)
+    return stats
+
+
+class Replay:
+    """
+    Feeds cached blocks through the live processing path on a simulated clock, as if each block arrived
+    RECEIVE_DELAY_SEC after it was mined, so the processor writes the tweets and images it would have live.
+
+    The clock starts at `start_time`, blocks before it are caught up. From there on blocks come `speed` times
+    faster than they were mined, or as fast as possible when `speed` is 0. The processor should render on the
+    calling thread, so that the timings of each stage are its own.
+    """
+
+    def __init__(self, processor: BlockProcessor, clock: SimulatedClock, outbox: Outbox, speed: float = 0):
+        self._processor = processor
+        self._clock = clock
+        self._outbox = outbox
+        self._speed = speed
+
+        self._read_sec: List[float] = []
+        self._process_sec: List[float] = []
+        self._report_process_sec: List[float] = []
+        self._tweets: int = 0
+
+    def run(self, start: int, end: int) -> Dict[str, Any]:
+        live_start: float = self._clock.time()
+        wall_start: float = time.perf_counter()
+        for num in range(start, end + 1):
+            t0 = time.perf_counter()
+            block: Optional[SummaryBlock] = read_block(num)
+            self._read_sec.append(time.perf_counter() - t0)
+            if block is None:
+                LOG.warning(f"Block {num} not cached, stop replay")
+                end = num - 1
+                break
+
+            if self._speed > 0 and block.timestamp > live_start:
+                # wait for the block the way it was mined, `speed` times faster
+                delay = (block.timestamp - live_start) / self._speed - (time.perf_counter() - wall_start)
+                if delay > 0:
+                    time.sleep(delay)
+            self._clock.set(block.timestamp + RECEIVE_DELAY_SEC)
+
+            self._process(block)
+
+        elapsed: float = time.perf_counter() - wall_start
+        return self._stats(start, end, elapsed)
+
+    def _process(self, block: SummaryBlock) -> None:
+        pending: int = self._outbox.count_pending()
+        t0 = time.perf_counter()
+        self._processor.process(block)
+        process_sec = time.perf_counter() - t0
+
+        queued: int = self._outbox.count_pending() - pending
+        if queued > 0:
+            self._tweets += queued
+            self._report_process_sec.append(process_sec)
+        else:
+            self._process_sec.append(process_sec)
+
+    def _stats(self, start: int, end: int, elapsed: float) -> Dict[str, Any]:
+        stages: Dict[str, List[float]] = {stage: [] for stage in REPORT_STAGES.values()}
+        for trace in self._outbox.traces():
+            for stage, latency in stage_latencies(trace).items():
+                if stage in REPORT_STAGES:
+                    stages[REPORT_STAGES[stage]].append(latency)
+
+        blocks: int = end - start + 1
+        return {
+            "start": start,
+            "end": end,
+            "blocks": blocks,
+            "elapsed_sec": elapsed,
+            "blocks_per_sec": blocks / elapsed if elapsed > 0 else 0,
+            "tweets": self._tweets,
+            "clock": datetime.fromtimestamp(self._clock.time()).isoformat(),
+            "stages": {
+                "read": summarize(self._read_sec),
+                "process": summarize(self._process_sec),
+                "process_report": summarize(self._report_process_sec),
+                **{stage: summarize(latencies) for stage, latencies in stages.items()},
+            },
+        }
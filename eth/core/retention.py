@@ -0,0 +1,237 @@
+import json
+import os
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from logging import getLogger
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from eth.core.archive import BLOCK_INDEX, open_archive, train_dict, write_archive
+from eth.core.puller import MAX_UNCLES
+from eth.core.reader import read_block_json
+from eth.types.block import SummaryBlock
+from eth.utils.file_utils import (
+    archive_dir,
+    archive_filepath,
+    block_filepath,
+    summaries_dir,
+    summary_filepath,
+    uncle_block_filepath,
+)
+from potpourri.python.ethereum.constants import LONDON
+
+LOG = getLogger(__name__)
+
+# what a compacted block keeps of the node's JSON, besides the "__" annotations of the puller
+SUMMARY_FIELDS = [
+    "number",
+    "hash",
+    "parentHash",
+    "timestamp",
+    "gasUsed",
+    "gasLimit",
+    "baseFeePerGas",
+    "sha3Uncles",
+    "uncles",
+    "miner",
+]
+# every figure the processor and the index take from a block, compared before the full block is dropped
+SUMMARY_PROPERTIES = [
+    "number",
+    "timestamp",
+    "gas_used",
+    "gas_limit",
+    "base_fee_per_gas",
+    "burned_eth",
+    "base_issuance_eth",
+    "uncle_count",
+    "uncle_reward",
+    "priority_fees",
+    "pulled_at",
+]
+
+
+def _read(filepath: str) -> bytes:
+    with open(filepath, "rb") as f:
+        return f.read()
+
+
+def hot_filepaths(start: int, end: int) -> Iterator[Tuple[int, int, str]]:
+    """
+    (block number, uncle index, path) of the cached files in a range, in archive order.
+    """
+    for num in range(start, end + 1):
+        if os.path.exists(block_filepath(num)):
+            yield num, BLOCK_INDEX, block_filepath(num)
+        for uncle_index in range(MAX_UNCLES):
+            filepath = uncle_block_filepath(num, uncle_index)
+            if os.path.exists(filepath):
+                yield num, uncle_index, filepath
+
+
+def archive_range(start: int, end: int, dict_samples: int, delete: bool) -> bool:
+    filepath = archive_filepath(start, end)
+    missing: List[int] = [num for num in range(start, end + 1) if not os.path.exists(block_filepath(num))]
+    if len(missing) > 0:
+        LOG.warning(f"Skip blocks {start}-{end}: {len(missing)} blocks not cached, first {missing[0]}")
+        return False
+
+    step = max(1, (end - start + 1) // dict_samples)
+    zdict = train_dict(_read(block_filepath(num)) for num in range(start, end + 1, step))
+    if len(zdict) == 0:
+        LOG.warning(f"No dictionary trained from blocks {start}-{end}, archive them without one")
+
+    entries = [(num, uncle_index, path) for num, uncle_index, path in hot_filepaths(start, end)]
+    count = write_archive(filepath, ((num, i, _read(path)) for num, i, path in entries), zdict=zdict)
+    hot_size = sum(os.path.getsize(path) for _, _, path in entries)
+    archive_size = os.path.getsize(filepath)
+    LOG.info(
+        f"Archive blocks {start}-{end} to {filepath}: {count} files, {hot_size / 1e6:,.1f}MB -> "
+        f"{archive_size / 1e6:,.1f}MB ({hot_size / max(1, archive_size):.1f}x)"
+    )
+
+    # read everything back before dropping the hot files
+    archive = open_archive(filepath)
+    for num, uncle_index, path in entries:
+        if archive.read(num, uncle_index) != _read(path):
+            LOG.error(f"Archive {filepath} does not match {path}, removing it")
+            os.remove(filepath)
+            return False
+
+    if delete:
+        _delete(entries)
+        LOG.info(f"Delete {len(entries)} cached files for blocks {start}-{end}")
+    return True
+
+
+def _delete(entries: List[Tuple[int, int, str]]) -> None:
+    for _, _, path in entries:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def summarize(content: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Compact form of a cached block: the fields in SUMMARY_FIELDS and the puller's annotations.
+    """
+    return {k: v for k, v in content.items() if k in SUMMARY_FIELDS or k.startswith("__")}
+
+
+def _same_summary(content: Dict[str, Any], summary: Dict[str, Any]) -> bool:
+    try:
+        block, compact = SummaryBlock(content), SummaryBlock(summary)
+        return all(getattr(block, name) == getattr(compact, name) for name in SUMMARY_PROPERTIES)
+    except (KeyError, ValueError, TypeError):
+        return False
+
+
+def compact_range(start: int, end: int, dict_samples: int) -> bool:
+    """
+    Replace the cached blocks `start` to `end`, and their uncles, by their summaries in one summary archive.
+    Blocks already sealed in a full archive are compacted from it, the archive itself is kept.
+    """
+    filepath = summary_filepath(start, end)
+    if not os.path.exists(filepath):
+        entries: List[Tuple[int, int, bytes]] = []
+        for num in range(start, end + 1):
+            try:
+                content = read_block_json(num)
+            except ValueError as e:
+                content = None
+                LOG.warning(f"Erroneous cached block {num}: {e}")
+            if content is None:
+                LOG.warning(f"Skip blocks {start}-{end}: block {num} not cached")
+                return False
+
+            summary = summarize(content)
+            if not _same_summary(content, summary):
+                LOG.error(f"Skip blocks {start}-{end}: the summary of block {num} does not read the same")
+                return False
+            # one member per line, so the dictionary picks up the member names
+            entries.append((num, BLOCK_INDEX, json.dumps(summary, indent=0).encode()))
+            # uncles are few and the puller reads them back, they are kept whole
+            for uncle_index in range(len(content.get("uncles", []))):
+                uncle = read_block_json(num, uncle_index)
+                if uncle is not None:
+                    entries.append((num, uncle_index, json.dumps(uncle, indent=0).encode()))
+
+        step = max(1, len(entries) // dict_samples)
+        zdict = train_dict(content for _, _, content in entries[::step])
+        if len(zdict) == 0:
+            LOG.warning(f"No dictionary trained from blocks {start}-{end}, compact them without one")
+        count = write_archive(filepath, entries, zdict=zdict)
+
+        summaries = open_archive(filepath)
+        if any(summaries.read(num, uncle_index) != content for num, uncle_index, content in entries):
+            LOG.error(f"Summaries {filepath} do not read back, removing them")
+            os.remove(filepath)
+            return False
+        LOG.info(
+            f"Compact blocks {start}-{end} to {filepath}: {count} entries, {os.path.getsize(filepath) / 1e6:,.2f}MB"
+        )
+
+    hot = list(hot_filepaths(start, end))
+    if len(hot) > 0:
+        hot_size = sum(os.path.getsize(path) for _, _, path in hot)
+        _delete(hot)
+        LOG.info(f"Delete {len(hot)} cached files for blocks {start}-{end}, {hot_size / 1e6:,.1f}MB")
+    return True
+
+
+@dataclass
+class RetentionPolicy:
+    """
+    Blocks older than `days`, and already summarized, are compacted by ranges of `range_size` blocks aligned
+    to LONDON. With `archive`, a range is also sealed whole into a compressed archive first.
+    """
+
+    days: int
+    range_size: int = 10_000
+    archive: bool = False
+    dict_samples: int = 500
+
+    def ranges(self, start: int, end: int) -> Iterator[Tuple[int, int]]:
+        """
+        Aligned ranges from `start` that end by block `end`.
+        """
+        range_start = start - (start - LONDON) % self.range_size
+        if range_start < start:
+            range_start += self.range_size
+        while range_start + self.range_size - 1 <= end:
+            yield range_start, range_start + self.range_size - 1
+            range_start += self.range_size
+
+
+def _older_than(num: int, cutoff: datetime) -> bool:
+    try:
+        content = read_block_json(num)
+    except ValueError:
+        return False
+    return content is not None and datetime.fromtimestamp(int(content["timestamp"], 16)) < cutoff
+
+
+def run_retention(policy: RetentionPolicy, start: int, end: int, now: Optional[datetime] = None) -> int:
+    """
+    One incremental pass: compact every range between `start` and `end` old enough and not compacted yet,
+    oldest first. Returns the number of ranges compacted.
+    """
+    cutoff = (now if now is not None else datetime.now()) - timedelta(days=policy.days)
+    os.makedirs(summaries_dir(), exist_ok=True)
+    if policy.archive:
+        os.makedirs(archive_dir(), exist_ok=True)
+
+    compacted = 0
+    for range_start, range_end in policy.ranges(start, end):
+        hot = os.path.exists(block_filepath(range_start)) or os.path.exists(block_filepath(range_end))
+        if os.path.exists(summary_filepath(range_start, range_end)) and not hot:
+            continue
+        if not _older_than(range_end, cutoff):
+            # ranges are visited in order, the rest are younger
+            break
+        if policy.archive and not os.path.exists(archive_filepath(range_start, range_end)):
+            if not archive_range(range_start, range_end, dict_samples=policy.dict_samples, delete=False):
+                continue
+        if compact_range(range_start, range_end, dict_samples=policy.dict_samples):
+            compacted += 1
+    return compacted
@@ -0,0 +1,183 @@
+import json
+from dataclasses import dataclass, fields, replace
+from datetime import datetime, timedelta
+from logging import getLogger
+from typing import Any, Dict, List, Optional, Tuple
+
+from eth.core.index import BlockIndex
+from eth.types.block import (
+    AggregateBlockMetrics,
+    CadenceAggregateBlockMetrics,
+    DayAggregateBlockMetrics,
+    HourlyAggregateBlockMetrics,
+    MonthlyAggregateBlockMetrics,
+    PeriodAggregateBlockMetrics,
+    WeeklyAggregateBlockMetrics,
+    next_month,
+)
+from eth.utils.file_utils import cadences_filepath
+
+LOG = getLogger(__name__)
+
+# custom cadences of whole days are aligned to this Monday
+EPOCH = datetime(1970, 1, 5)
+
+DAY = "day"
+WEEK = "week"
+MONTH = "month"
+
+
+def _base_fields(metrics: AggregateBlockMetrics) -> Dict[str, Any]:
+    return {f.name: getattr(metrics, f.name) for f in fields(AggregateBlockMetrics)}
+
+
+@dataclass
+class Cadence:
+    """
+    Report period composed from hours (`hours` dividing a day) or from days (`days`, or a calendar week or month).
+    """
+
+    name: str
+    hours: int = 0
+    days: int = 0
+    publish: bool = False
+
+    @property
+    def from_days(self) -> bool:
+        return self.hours == 0
+
+    def bucket(self, start: datetime) -> Tuple[datetime, datetime]:
+        """
+        Start and end of the period containing `start`.
+        """
+        if self.name == DAY:
+            day = start.replace(hour=0, minute=0, second=0, microsecond=0)
+            return day, day + timedelta(days=1)
+        if self.name == WEEK:
+            week = start.replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=start.weekday())
+            return week, week + timedelta(days=7)
+        if self.name == MONTH:
+            month = start.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+            return month, next_month(month)
+        if self.hours > 0:
+            bucket_start = start.replace(hour=start.hour - start.hour % self.hours, minute=0, second=0, microsecond=0)
+            return bucket_start, bucket_start + timedelta(hours=self.hours)
+
+        day = start.replace(hour=0, minute=0, second=0, microsecond=0)
+        bucket_start = day - timedelta(days=(day - EPOCH).days % self.days)
+        return bucket_start, bucket_start + timedelta(days=self.days)
+
+    def wrap(self, start: datetime, end: datetime, metrics: AggregateBlockMetrics) -> PeriodAggregateBlockMetrics:
+        if self.name == DAY:
+            return DayAggregateBlockMetrics(day=start, **_base_fields(metrics))
+        if self.name == WEEK:
+            return WeeklyAggregateBlockMetrics(week=start, **_base_fields(metrics))
+        if self.name == MONTH:
+            return MonthlyAggregateBlockMetrics(month=start, **_base_fields(metrics))
+        return CadenceAggregateBlockMetrics(cadence=self.name, start=start, end=end, **_base_fields(metrics))
+
+
+def load_cadences(filepath: Optional[str] = None) -> List[Cadence]:
+    """
+    Day, week and month, plus the custom cadences in config/cadences.json. Only cadences with "publish" are
+    tweeted, e.g.
+
+        {"cadences": [{"name": "week", "publish": true}, {"name": "4h", "hours": 4, "publish": true}]}
+    """
+    cadences: Dict[str, Cadence] = {name: Cadence(name) for name in [DAY, WEEK, MONTH]}
+    filepath = filepath if filepath is not None else cadences_filepath()
+    try:
+        with open(filepath, "r") as f:
+            config: Dict[str, Any] = json.load(f)
+    except FileNotFoundError:
+        return list(cadences.values())
+
+    for entry in config.get("cadences", []):
+        cadence = Cadence(
+            name=entry["name"],
+            hours=int(entry.get("hours", 0)),
+            days=int(entry.get("days", 0)),
+            publish=bool(entry.get("publish", False)),
+        )
+        if cadence.name not in cadences:
+            if (cadence.hours > 0) == (cadence.days > 0):
+                raise ValueError(f"Cadence {cadence.name} needs either hours or days")
+            if cadence.hours > 0 and 24 % cadence.hours != 0:
+                raise ValueError(f"Cadence {cadence.name}: hours must divide a day, got {cadence.hours}")
+        else:
+            cadence = Cadence(name=cadence.name, publish=cadence.publish)
+        cadences[cadence.name] = cadence
+    return list(cadences.values())
+
+
+class Rollups:
+    """
+    Hour -> day -> week and month rollups, kept incrementally as hours close.
+
+    Every closed hour is merged into the open day and the hour-based cadences, every closed day into the week,
+    the month and the day-based cadences, so no period is ever re-aggregated from blocks. A period already under
+    way when the rollups start is seeded from the block index.
+    """
+
+    def __init__(self, index: BlockIndex, cadences: Optional[List[Cadence]] = None):
+        self._index = index
+        cadences = cadences if cadences is not None else load_cadences()
+        self._day: Cadence = next(c for c in cadences if c.name == DAY)
+        self._hour_cadences: List[Cadence] = [c for c in cadences if not c.from_days]
+        self._day_cadences: List[Cadence] = [c for c in cadences if c.from_days and c.name != DAY]
+        self._open: Dict[str, PeriodAggregateBlockMetrics] = {}
+
+    @property
+    def cadences(self) -> List[Cadence]:
+        return [self._day] + self._hour_cadences + self._day_cadences
+
+    def add_hour(self, hour: HourlyAggregateBlockMetrics) -> List[Tuple[Cadence, PeriodAggregateBlockMetrics]]:
+        """
+        Merge a closed hour into the rollups, returning the periods it closes.
+        """
+        closed: List[Tuple[Cadence, PeriodAggregateBlockMetrics]] = []
+        for cadence in [self._day] + self._hour_cadences:
+            closed += self._add(cadence, hour)
+
+        for _, day in [c for c in closed if c[0] is self._day]:
+            for cadence in self._day_cadences:
+                closed += self._add(cadence, day)
+        return closed
+
+    def open_period(self, name: str) -> Optional[PeriodAggregateBlockMetrics]:
+        return self._open.get(name)
+
+    def _add(
+        self, cadence: Cadence, piece: PeriodAggregateBlockMetrics
+    ) -> List[Tuple[Cadence, PeriodAggregateBlockMetrics]]:
+        closed: List[Tuple[Cadence, PeriodAggregateBlockMetrics]] = []
+        start, end = cadence.bucket(piece.period_start)
+
+        current = self._open.get(cadence.name)
+        if current is not None and current.period_start != start:
+            # the rest of the period was never seen, e.g. an hour without blocks
+            LOG.warning(f"Close incomplete {cadence.name} {current.time_range_str()}")
+            closed.append((cadence, replace(current, complete=False)))
+            current = None
+
+        if current is None:
+            seed = self._index.aggregate_time(start, piece.period_start) if start < piece.period_start else None
+            current = cadence.wrap(start, end, seed if seed is not None else piece)
+            if seed is not None:
+                LOG.info(f"Seed {cadence.name} {current.time_range_str()} from the index, without BASEFEE distribution")
+                current = current.merge(piece)
+            # the index must hold the period from its start up to the piece
+            seeded = seed is not None and self._index.block_at(start) is not None
+            complete = piece.complete and (start == piece.period_start or seeded)
+            complete = complete and (seed is None or seed.end_number + 1 == piece.start_number)
+            current = replace(current, complete=complete)
+        else:
+            follows = current.end_number + 1 == piece.start_number
+            current = replace(current.merge(piece), complete=current.complete and piece.complete and follows)
+
+        if piece.period_end >= end:
+            closed.append((cadence, current))
+            self._open.pop(cadence.name, None)
+        else:
+            self._open[cadence.name] = current
+        return closed
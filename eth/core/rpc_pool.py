@@ -0,0 +1,179 @@
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from logging import getLogger
+from threading import Lock
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import requests
+
+from eth.core.ethereum_client import EthereumClient, GethClient
+from eth.core.throttle import RequestController
+
+LOG = getLogger(__name__)
+
+# weight of the newest sample in the moving averages
+EWMA_ALPHA: float = 0.2
+# latency assumed for an endpoint that has not answered yet
+INITIAL_LATENCY_SEC: float = 0.1
+
+
+class Endpoint:
+    def __init__(self, url: str):
+        self.url = url
+        self.session = requests.Session()
+        self.latency_sec: float = INITIAL_LATENCY_SEC
+        self.error_rate: float = 0.0
+        self.head: Optional[int] = None
+        self.lagging: bool = False
+
+    @property
+    def score(self) -> float:
+        """
+        Expected cost of a request, lower is better. Errors count as a 10x slowdown.
+        """
+        return self.latency_sec * (1 + 10 * self.error_rate) * (100 if self.lagging else 1)
+
+    def record(self, latency_sec: float, success: bool) -> None:
+        self.latency_sec = (1 - EWMA_ALPHA) * self.latency_sec + EWMA_ALPHA * latency_sec
+        self.error_rate = (1 - EWMA_ALPHA) * self.error_rate + EWMA_ALPHA * (0.0 if success else 1.0)
+
+    def __str__(self) -> str:
+        return f"{self.url} latency={self.latency_sec * 1000:,.0f}ms errors={self.error_rate:.0%} head={self.head}"
+
+
+class PooledEthereumClient(EthereumClient):
+    """
+    EthereumClient over several endpoints.
+
+    Requests go to the endpoint with the best latency and error rate. A request that has not answered after
+    `hedge_sec` is sent again to the next best endpoint and the first good response wins.
+    Endpoints more than `max_head_lag` blocks behind the others are only used as a last resort. A `controller`
+    paces the requests to all endpoints together.
+    """
+
+    def __init__(
+        self,
+        urls: List[str],
+        hedge_sec: float = 0.5,
+        max_head_lag: int = 2,
+        controller: Optional[RequestController] = None,
+    ):
+        assert len(urls) > 0
+        super().__init__(urls[0], controller=controller)
+        self._endpoints: List[Endpoint] = [Endpoint(url) for url in urls]
+        self._hedge_sec = hedge_sec
+        self._max_head_lag = max_head_lag
+        self._lock = Lock()
+        self._executor = ThreadPoolExecutor(max_workers=2 * len(urls), thread_name_prefix="rpc-pool")
+
+    @property
+    def endpoints(self) -> List[Endpoint]:
+        return self._endpoints
+
+    def _ranked(self) -> List[Endpoint]:
+        with self._lock:
+            return sorted(self._endpoints, key=lambda e: e.score)
+
+    def _post_to(
+        self, endpoint: Endpoint, data: Union[Dict[str, Any], List[Dict[str, Any]]]
+    ) -> Tuple[Optional[requests.Response], Optional[Any]]:
+        """
+        Response of `endpoint` and its JSON, None if it failed. The response is None if the request raised.
+        """
+        start = time.time()
+        response: Optional[requests.Response] = None
+        response_json: Optional[Any] = None
+        try:
+            response = self._controlled(lambda: endpoint.session.post(endpoint.url, json=data, timeout=10), data)
+            response_json = self._parse(response)
+        except (requests.RequestException, ValueError) as e:
+            LOG.error(f"Request to {endpoint.url} failed: {e}")
+
+        with self._lock:
+            endpoint.record(time.time() - start, response_json is not None)
+        return response, response_json
+
+    def retry_post(
+        self, data: Union[Dict[str, Any], List[Dict[str, Any]]], attempts: int = 10
+    ) -> Tuple[requests.Response, Optional[Any]]:
+        """
+        Last response and its JSON, None if every attempt failed, like EthereumClient.retry_post().
+        """
+        backoff_sec = 1
+        last_response: Optional[requests.Response] = None
+        for i in range(attempts):
+            if i > 0:
+                time.sleep(backoff_sec)
+                backoff_sec = backoff_sec * 1.5
+
+            ranked = self._ranked()
+            futures: List[Future] = [self._executor.submit(self._post_to, ranked[0], data)]
+            pending = set(futures)
+            hedged = False
+            while len(pending) > 0:
+                done, pending = wait(pending, timeout=None if hedged else self._hedge_sec, return_when=FIRST_COMPLETED)
+                for future in done:
+                    response, response_json = future.result()
+                    if response_json is not None:
+                        return response, response_json
+                    # an error answered by a node says more than a failed HTTP request
+                    if response is not None and (last_response is None or last_response.status_code != 200):
+                        last_response = response
+
+                # slow or failed, hedge to the next best endpoint
+                if not hedged and len(ranked) > 1:
+                    hedged = True
+                    pending.add(self._executor.submit(self._post_to, ranked[1], data))
+
+            LOG.warning(f"[Attempt: {i+1}] all endpoints failed: {', '.join(str(e) for e in ranked[:2])}")
+
+        if last_response is None:
+            # no endpoint answered at all, fail as a single unreachable node does
+            method = data[0].get("method") if isinstance(data, list) else data.get("method")
+            raise requests.ConnectionError(f"No endpoint answered {method} after {attempts} attempts")
+        return last_response, None
+
+    def check_heads(self) -> int:
+        """
+        Ask every endpoint for its head and mark the ones behind the others as lagging.
+
+        Returns the newest block every healthy endpoint has.
+        """
+        params = self._params("eth_blockNumber", [])
+        futures = {e: self._executor.submit(self._post_to, e, params) for e in self._endpoints}
+        heads: Dict[Endpoint, int] = {}
+        for endpoint, future in futures.items():
+            _, response_json = future.result()
+            if response_json is not None:
+                heads[endpoint] = int(response_json["result"], 16)
+
+        if len(heads) == 0:
+            raise IOError("No endpoint returned a head block")
+
+        best_head = max(heads.values())
+        with self._lock:
+            for endpoint in self._endpoints:
+                endpoint.head = heads.get(endpoint)
+                lagging = endpoint.head is None or best_head - endpoint.head > self._max_head_lag
+                if lagging and not endpoint.lagging:
+                    LOG.warning(f"Endpoint lagging behind head {best_head}: {endpoint}")
+                elif not lagging and endpoint.lagging:
+                    LOG.info(f"Endpoint caught up to head {best_head}: {endpoint}")
+                endpoint.lagging = lagging
+
+        return min(head for endpoint, head in heads.items() if not endpoint.lagging)
+
+    def eth_blockNumber(self) -> int:
+        return self.check_heads()
+
+
+def make_eth_client(
+    eth_addr: str,
+    eth_port: int,
+    rpc_urls: Optional[List[str]],
+    hedge_ms: int,
+    controller: Optional[RequestController] = None,
+) -> EthereumClient:
+    if rpc_urls is None:
+        return GethClient(ip_addr=eth_addr, port=eth_port, controller=controller)
+    return PooledEthereumClient(rpc_urls, hedge_sec=hedge_ms / 1000, controller=controller)
@@ -0,0 +1,34 @@
+import json
+from dataclasses import dataclass
+from decimal import Decimal
+from logging import getLogger
+from typing import Any, Dict, Optional
+
+from eth.utils.file_utils import supply_filepath
+
+LOG = getLogger(__name__)
+
+
+@dataclass
+class SupplyAnchor:
+    """
+    ETH supply after block `block`, from a source outside the cache, e.g. a node's state or a supply tracker.
+    """
+
+    block: int
+    supply_eth: Decimal
+
+
+def load_supply_anchor(filepath: Optional[str] = None) -> Optional[SupplyAnchor]:
+    """
+    Supply anchor in config/supply.json, None if there is none, e.g.
+
+        {"block": 15537393, "supply_eth": "123456789.123456789012345678"}
+    """
+    filepath = filepath if filepath is not None else supply_filepath()
+    try:
+        with open(filepath, "r") as f:
+            config: Dict[str, Any] = json.load(f)
+    except FileNotFoundError:
+        return None
+    return SupplyAnchor(block=int(config["block"]), supply_eth=Decimal(str(config["supply_eth"])))
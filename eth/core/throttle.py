@@ -0,0 +1,170 @@
+import math
+import time
+from datetime import datetime, timedelta, timezone
+from logging import getLogger
+from threading import Condition
+from typing import Optional
+
+import requests
+
+LOG = getLogger(__name__)
+
+# requests per receipt batch when nothing is throttling
+MAX_BATCH_SIZE: int = 100
+# pause after a 429 without a Retry-After header
+THROTTLE_PAUSE_SEC: float = 1.0
+
+OK = "ok"
+ERROR = "error"
+THROTTLED = "throttled"
+
+
+def outcome(response: Optional[requests.Response]) -> str:
+    if response is None or response.status_code >= 500:
+        return ERROR
+    if response.status_code == 429:
+        return THROTTLED
+    return OK
+
+
+def retry_after_sec(response: Optional[requests.Response]) -> float:
+    try:
+        return float(response.headers.get("Retry-After", THROTTLE_PAUSE_SEC))
+    except (AttributeError, ValueError):
+        return THROTTLE_PAUSE_SEC
+
+
+class RequestController:
+    """
+    Paces the requests of an EthereumClient to what its endpoint takes.
+
+    The requests in flight follow AIMD: the limit grows by about one per round of fast successful requests, holds
+    while requests are slower than `latency_target_sec`, and halves on an error. A 429 (or a JSON-RPC limit error)
+    also halves the receipt batch size and pauses every request for the Retry-After, so one throttled request
+    does not set off a storm of retries. The limit and batch size are cut at most once per `latency_target_sec`.
+
+    `requests_per_sec` and `daily_budget` are hard caps, counting every call of a batch. Once the daily budget
+    (UTC days, like Infura's) is spent, requests wait for the next day.
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int = 16,
+        latency_target_sec: float = 1.0,
+        requests_per_sec: Optional[float] = None,
+        daily_budget: Optional[int] = None,
+        max_batch_size: int = MAX_BATCH_SIZE,
+    ):
+        self._max_in_flight = max_in_flight
+        self._latency_target_sec = latency_target_sec
+        self._requests_per_sec = requests_per_sec
+        self._daily_budget = daily_budget
+        self._max_batch_size = max_batch_size
+
+        self._cond = Condition()
+        self._limit: float = 1.0
+        self._in_flight: int = 0
+        self._batch_size: int = max_batch_size
+        self._paused_until: float = 0.0
+        self._last_cut: float = 0.0
+        # token bucket of at most a second of requests
+        self._tokens: float = requests_per_sec if requests_per_sec is not None else 0.0
+        self._tokens_at: float = time.time()
+        # calls on the current UTC day
+        self._day: datetime = _utc_day(self._tokens_at)
+        self._calls: int = 0
+        self._budget_spent_logged: bool = False
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    @property
+    def batch_size(self) -> int:
+        return self._batch_size
+
+    @property
+    def calls_today(self) -> int:
+        return self._calls
+
+    def acquire(self, cost: int = 1) -> None:
+        """
+        Wait for a request slot, for `cost` calls of rate and for the daily budget.
+        """
+        with self._cond:
+            while True:
+                wait_sec = self._wait_sec(time.time(), cost)
+                if wait_sec <= 0:
+                    break
+                self._cond.wait(None if math.isinf(wait_sec) else wait_sec)
+
+            self._in_flight += 1
+            self._calls += cost
+            if self._requests_per_sec is not None:
+                self._tokens -= cost
+
+    def release(self, latency_sec: float, response: Optional[requests.Response]) -> None:
+        result = outcome(response)
+        with self._cond:
+            self._in_flight -= 1
+            if result == THROTTLED:
+                self._throttle(retry_after_sec(response))
+            elif result == ERROR:
+                self._cut()
+            elif latency_sec <= self._latency_target_sec:
+                self._limit = min(self._max_in_flight, self._limit + 1 / self._limit)
+                self._batch_size = min(self._max_batch_size, self._batch_size + 1)
+            self._cond.notify_all()
+
+    def throttle(self, pause_sec: float = THROTTLE_PAUSE_SEC) -> None:
+        """
+        Back off after a rate limit reported in the response body.
+        """
+        with self._cond:
+            self._throttle(pause_sec)
+
+    def _throttle(self, pause_sec: float) -> None:
+        now = time.time()
+        if now + pause_sec > self._paused_until:
+            LOG.warning(f"Throttled, pause requests for {pause_sec:.1f}s, in flight limit={self.limit}")
+            self._paused_until = now + pause_sec
+        if self._cut():
+            self._batch_size = max(1, self._batch_size // 2)
+
+    def _cut(self) -> bool:
+        now = time.time()
+        if now - self._last_cut < self._latency_target_sec:
+            return False
+        self._last_cut = now
+        self._limit = max(1.0, self._limit / 2)
+        return True
+
+    def _wait_sec(self, now: float, cost: int) -> float:
+        if now < self._paused_until:
+            return self._paused_until - now
+
+        if self._daily_budget is not None:
+            day = _utc_day(now)
+            if day != self._day:
+                self._day, self._calls, self._budget_spent_logged = day, 0, False
+            if self._calls + cost > self._daily_budget:
+                next_day: datetime = day + timedelta(days=1)
+                if not self._budget_spent_logged:
+                    LOG.warning(f"Daily budget of {self._daily_budget} calls spent, wait until {next_day}")
+                    self._budget_spent_logged = True
+                return next_day.timestamp() - now
+
+        if self._requests_per_sec is not None:
+            self._tokens = min(
+                max(self._requests_per_sec, cost),
+                self._tokens + (now - self._tokens_at) * self._requests_per_sec,
+            )
+            self._tokens_at = now
+            if self._tokens < cost:
+                return (cost - self._tokens) / self._requests_per_sec
+
+        return 0 if self._in_flight < self.limit else math.inf
+
+
+def _utc_day(timestamp: float) -> datetime:
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
@@ -1,44 +1,58 @@
 import os
-import shutil
 from logging import getLogger
+from typing import Optional
 
-from eth.utils.file_utils import pending_tweets_filepaths, tweeted_tweets_dir
+from eth.core.latency import stamp
+from eth.core.outbox import Outbox, OutboxTweet
 from potpourri.python.twitter.client import TwitterClient, make_twitter_client
 
 LOG = getLogger(__name__)
 
+# attempts before a tweet is given up on and marked failed
+MAX_ATTEMPTS: int = 5
+
 
 class TweeterException(Exception):
     pass
 
 
 class Tweeter:
-    def __init__(self):
+    def __init__(self, outbox: Optional[Outbox] = None):
         self._client: TwitterClient = make_twitter_client(secrets_json_filepath="/app/config/secrets/twitter.json")
+        self._outbox: Outbox = outbox if outbox is not None else Outbox()
+
+    @property
+    def pending(self) -> int:
+        return self._outbox.count_pending()
+
+    def wait(self, timeout: float) -> None:
+        """
+        Sleep until the processor queues a tweet or `timeout` seconds pass.
+        """
+        self._outbox.wait(timeout)
 
     def process(self, dry_run: bool = False) -> bool:
-        tweeted = False
-        for pending_tweet_filepath in pending_tweets_filepaths(".txt"):
-            media_filepath = pending_tweet_filepath.replace(".txt", ".png")
-            media_exists = os.path.exists(media_filepath)
-            success = False
-            with open(pending_tweet_filepath, "r") as f:
-
-                tweet = str(f.read())
-                LOG.info(f"Tweeting{' with media from ' + media_filepath if media_exists else ''}:")
-                LOG.info("\n" + tweet)
-                tweeted = True
-
-                if not dry_run:
-                    success = self._client.tweet(tweet, media_filepath=(media_filepath if media_exists else None))
-                    if not success:
-                        raise TweeterException("Tweet failed to send")
-
-            if success:
-                tweeted_filepath = os.path.join(tweeted_tweets_dir(), os.path.basename(pending_tweet_filepath))
-                shutil.move(pending_tweet_filepath, tweeted_filepath)
-
-            # only process one
-            return tweeted
-
-        return tweeted
+        """
+        Publish the most urgent queued tweet. Returns whether there was one. A dry run only logs each tweet once
+        and leaves it pending.
+        """
+        tweet: Optional[OutboxTweet] = self._outbox.next_pending(dry_run=dry_run)
+        if tweet is None:
+            return False
+
+        media_exists = tweet.media_path is not None and os.path.exists(tweet.media_path)
+        LOG.info(f"Tweeting {tweet.name}{' with media from ' + tweet.media_path if media_exists else ''}:")
+        LOG.info("\n" + tweet.text)
+
+        if dry_run:
+            self._outbox.mark_dry_run(tweet.name)
+            return True
+
+        success = self._client.tweet(tweet.text, media_filepath=(tweet.media_path if media_exists else None))
+        if not success:
+            attempts = self._outbox.mark_failed(tweet.name, max_attempts=MAX_ATTEMPTS)
+            raise TweeterException(f"Tweet {tweet.name} failed to send ({attempts}/{MAX_ATTEMPTS} attempts)")
+
+        stamp(tweet.trace, "tweeted")
+        self._outbox.mark_sent(tweet.name, trace=tweet.trace)
+        return True
@@ -0,0 +1,142 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from logging import getLogger
+from typing import Any, Dict, Iterable, List, Optional
+
+from eth.core.archive import BLOCK_INDEX
+from eth.core.puller import MAX_UNCLES
+from eth.core.reader import read_block_json
+from eth.utils.file_utils import repair_list_filepath
+
+LOG = getLogger(__name__)
+
+
+@dataclass
+class CacheProblem:
+    num: int
+    uncle_index: int
+    reason: str
+
+    def __str__(self) -> str:
+        where = f"block {self.num}" if self.uncle_index == BLOCK_INDEX else f"uncle {self.num}[{self.uncle_index}]"
+        return f"{where}: {self.reason}"
+
+
+def _read(num: int, uncle_index: int, problems: List[CacheProblem]) -> Optional[Dict[str, Any]]:
+    try:
+        content = read_block_json(num, uncle_index)
+    except ValueError as e:
+        problems.append(CacheProblem(num, uncle_index, f"corrupt: {e}"))
+        return None
+    if content is None:
+        problems.append(CacheProblem(num, uncle_index, "missing"))
+    return content
+
+
+def _number(content: Dict[str, Any]) -> Optional[int]:
+    try:
+        return int(content["number"], 16)
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def verify_uncles(num: int, content: Dict[str, Any], problems: List[CacheProblem]) -> None:
+    uncle_hashes: List[str] = content.get("uncles", [])
+    try:
+        uncle_count = int(content["__uncle_count"])
+    except (KeyError, ValueError):
+        problems.append(CacheProblem(num, BLOCK_INDEX, "missing __uncle_count"))
+        return
+    if uncle_count != len(uncle_hashes):
+        problems.append(CacheProblem(num, BLOCK_INDEX, f"__uncle_count {uncle_count} != {len(uncle_hashes)} uncles"))
+
+    for uncle_index, uncle_hash in enumerate(uncle_hashes):
+        uncle = _read(num, uncle_index, problems)
+        if uncle is None:
+            continue
+        if uncle.get("hash") != uncle_hash:
+            problems.append(CacheProblem(num, uncle_index, f"hash {uncle.get('hash')} != {uncle_hash}"))
+        uncle_num = _number(uncle)
+        if uncle_num is None or not num - 6 <= uncle_num < num:
+            problems.append(CacheProblem(num, uncle_index, f"number {uncle_num} is not a valid uncle depth"))
+
+    for uncle_index in range(len(uncle_hashes), MAX_UNCLES):
+        try:
+            extra = read_block_json(num, uncle_index)
+        except ValueError:
+            extra = {}
+        if extra is not None:
+            problems.append(CacheProblem(num, uncle_index, "unexpected uncle file"))
+
+
+def verify_range(start: int, end: int) -> List[CacheProblem]:
+    """
+    Check every cached block from `start` to `end`: valid JSON, `number` matching the file, `parentHash`
+    matching the previous block's `hash` and uncle files matching the block's `uncles`.
+    """
+    problems: List[CacheProblem] = []
+
+    prev_hash: Optional[str] = None
+    try:
+        # the block before the range, to check continuity across ranges
+        prev = read_block_json(start - 1)
+        prev_hash = prev.get("hash") if prev is not None else None
+    except ValueError:
+        pass
+
+    for num in range(start, end + 1):
+        content = _read(num, BLOCK_INDEX, problems)
+        if content is None:
+            prev_hash = None
+            continue
+
+        content_num = _number(content)
+        if content_num != num:
+            problems.append(CacheProblem(num, BLOCK_INDEX, f"number {content_num} does not match the file"))
+        if prev_hash is not None and content.get("parentHash") != prev_hash:
+            # either side may be stale, e.g. cached before a reorg
+            problems.append(CacheProblem(num - 1, BLOCK_INDEX, f"hash is not the parentHash of block {num}"))
+            problems.append(CacheProblem(num, BLOCK_INDEX, f"parentHash {content.get('parentHash')} != {prev_hash}"))
+        prev_hash = content.get("hash")
+
+        verify_uncles(num, content, problems)
+
+    return problems
+
+
+def verify_cache(start: int, end: int, workers: Optional[int] = None, chunk_size: int = 10_000) -> List[CacheProblem]:
+    """
+    verify_range() split into chunks across a pool of processes.
+    """
+    starts = list(range(start, end + 1, chunk_size))
+    ends = [min(end, chunk_start + chunk_size - 1) for chunk_start in starts]
+
+    problems: List[CacheProblem] = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for chunk_start, chunk_end, chunk_problems in zip(starts, ends, executor.map(verify_range, starts, ends)):
+            LOG.info(f"Verified blocks {chunk_start}-{chunk_end}: {len(chunk_problems)} problems")
+            problems.extend(chunk_problems)
+    return problems
+
+
+# REPAIR LIST
+
+
+def write_repair_list(nums: Iterable[int]) -> List[int]:
+    repair_nums = sorted(set(nums))
+    filepath = repair_list_filepath()
+    os.makedirs(os.path.dirname(filepath), exist_ok=True)
+    tmp_filepath = f"{filepath}.tmp"
+    with open(tmp_filepath, "w") as f:
+        f.write("".join(f"{num}\n" for num in repair_nums))
+    os.replace(tmp_filepath, filepath)
+    return repair_nums
+
+
+def read_repair_list() -> List[int]:
+    try:
+        with open(repair_list_filepath(), "r") as f:
+            return [int(line) for line in f.read().split()]
+    except FileNotFoundError:
+        return []
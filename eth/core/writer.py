@@ -2,15 +2,17 @@ import json
 import logging
 import os
 import shutil
+from datetime import timedelta
 from decimal import Decimal
+from typing import Optional
 
-from eth.types.block import AggregateBlockMetrics, Block, HourlyAggregateBlockMetrics, UncleBlock
+from eth.types.block import AggregateBlockMetrics, Block, DetailedBlock, PeriodAggregateBlockMetrics, UncleBlock
 from eth.utils.file_utils import block_filepath, uncle_block_filepath
 
 LOG = logging.getLogger(__name__)
 
 
-# TODO compute accurately this is just a snapshot taken. Small rounding error for now.
+# snapshot, only for metrics without the supply from the block index
 SUPPLY = 119_712_770
 
 
@@ -19,7 +21,7 @@ def write_block(block: Block, warn_overwrite: bool = False) -> None:
     os.makedirs(os.path.dirname(filepath), exist_ok=True)
     exists: bool = os.path.exists(filepath)
     tmp_filepath: str = f"{filepath}.tmp"
-    with open(tmp_filepath, "w") as f:
+    with open(tmp_filepath, "wb") as f:
         if not exists:
             LOG.info(f"Write block {block.number} @ {block.timestamp_dt} to {filepath}")
         elif warn_overwrite:
@@ -27,11 +29,22 @@ def write_block(block: Block, warn_overwrite: bool = False) -> None:
         else:
             LOG.debug(f"Overwrite block {block.number} @ {block.timestamp_dt} to {filepath}")
 
-        f.write(json.dumps(block.json, indent=2))
+        f.write(block_json_bytes(block))
 
     shutil.move(tmp_filepath, filepath)
 
 
+def block_json_bytes(block: Block) -> bytes:
+    if isinstance(block, DetailedBlock) and block.raw is not None:
+        # the node's bytes with the annotations spliced in before the closing brace, nothing dumped again
+        return block.raw[:-1] + b"," + json.dumps(block.annotations).encode()[1:]
+    return json.dumps(block.json, indent=2).encode()
+
+
+def uncle_block_json_str(uncle_block: UncleBlock) -> str:
+    return json.dumps(uncle_block.json, indent=2)
+
+
 def write_uncle_block(uncle_block: UncleBlock, warn_overwrite: bool = False) -> None:
     filepath = uncle_block_filepath(uncle_block.mined_block_num, uncle_block.uncle_index)
     exists = os.path.exists(filepath)
@@ -44,7 +57,7 @@ def write_uncle_block(uncle_block: UncleBlock, warn_overwrite: bool = False) ->
         else:
             LOG.debug(f"Overwrite uncle block {uncle_block.number} @ {uncle_block.timestamp_dt} to {filepath}")
 
-        f.write(json.dumps(uncle_block.json, indent=2))
+        f.write(uncle_block_json_str(uncle_block))
 
     shutil.move(tmp_filepath, filepath)
 
@@ -65,11 +78,26 @@ def to_billion_usd(num: Decimal) -> str:
     return f"${num / 1_000_000_000:,.2f}B"
 
 
+def supply_eth(metrics: AggregateBlockMetrics) -> Decimal:
+    """
+    ETH supply at the metrics' last block, the SUPPLY snapshot when the block index does not know it.
+    """
+    return metrics.supply_eth if metrics.supply_eth is not None else Decimal(SUPPLY)
+
+
 def write_tweet_fundamentals(metrics: AggregateBlockMetrics, eth_usd_price: Decimal) -> str:
     period_burn = metrics.burnt_eth * eth_usd_price
 
     annualized_burn = period_burn * 365 / 30
-    market_cap = eth_usd_price * SUPPLY
+    market_cap = eth_usd_price * supply_eth(metrics)
+
+    # fee revenue is the burn plus the tips, when the puller fetched receipts for the whole period
+    tip_lines = []
+    annualized_revenue = annualized_burn
+    if metrics.priority_fees_eth is not None:
+        period_tips = metrics.priority_fees_eth * eth_usd_price
+        annualized_revenue = annualized_burn + period_tips * 365 / 30
+        tip_lines.append(f"30d Tips: {metrics.priority_fees_eth:,.0f} ETH ({to_billion_usd(period_tips)})")
 
     return "\n".join(
         [
@@ -79,22 +107,29 @@ def write_tweet_fundamentals(metrics: AggregateBlockMetrics, eth_usd_price: Deci
             f"Market Cap: {to_billion_usd(market_cap)}",
             "",
             f"30d 🔥: {metrics.burnt_eth:,.0f} ETH ({to_billion_usd(period_burn)})",
+            *tip_lines,
             f"Annualized: {metrics.burnt_eth * 365/30:,.0f} ETH ({to_billion_usd(annualized_burn)})",
             "",
-            f"Price / Revenue: {market_cap / annualized_burn:,.2f}",
+            f"Price / Revenue: {market_cap / annualized_revenue:,.2f}",
         ]
     )
 
 
-def calc_inflation_rate(metrics: AggregateBlockMetrics) -> Decimal:
-    issuance_multiplier = 365 * (24 if isinstance(metrics, HourlyAggregateBlockMetrics) else 1)
+def calc_inflation_rate(metrics: AggregateBlockMetrics, period: Optional[timedelta] = None) -> Decimal:
+    """
+    Net issuance over `period` annualized, as a percentage of the supply at the last block. `period` defaults to
+    the metrics' period, or a day.
+    """
+    if period is None:
+        period = metrics.period if isinstance(metrics, PeriodAggregateBlockMetrics) else timedelta(days=1)
+    issuance_multiplier = Decimal(timedelta(days=365).total_seconds()) / Decimal(period.total_seconds())
     change_per_year: Decimal = issuance_multiplier * metrics.net_issuance_eth
-    inflation_pct: Decimal = 100 * change_per_year / SUPPLY
+    inflation_pct: Decimal = 100 * change_per_year / supply_eth(metrics)
 
     return inflation_pct
 
 
-def write_tweet_aggregate(metrics: AggregateBlockMetrics, eth_usd_price: Decimal) -> str:
+def write_tweet_aggregate(metrics: PeriodAggregateBlockMetrics, eth_usd_price: Decimal) -> str:
     emoji = get_emoji(metrics.burnt_eth)
 
     burned_price_usd = metrics.burnt_eth * eth_usd_price
@@ -104,7 +139,7 @@ def write_tweet_aggregate(metrics: AggregateBlockMetrics, eth_usd_price: Decimal
     # no_burn_change_per_year =  365*24*metrics.issuance_eth
     # no_burn_annualized = 100 * no_burn_change_per_year / SUPPLY
 
-    time_phrase = "last hour" if isinstance(metrics, HourlyAggregateBlockMetrics) else "yesterday"
+    time_phrase = metrics.time_phrase
     header_line = f"{metrics.burnt_eth:,.2f} $ETH burned {emoji} {time_phrase}."
     if int(metrics.burnt_eth) == 69:
         header_line += " Nice."
@@ -115,12 +150,17 @@ def write_tweet_aggregate(metrics: AggregateBlockMetrics, eth_usd_price: Decimal
         annualized_line = annualized_line + " 📉"
 
     avg_gwei = metrics.gas_fees_paid / metrics.gas_used / Decimal(1_000_000_000)
+    base_fee_lines = []
+    if metrics.fee_sketches is not None:
+        p10, p50, p90, max_gwei = [metrics.base_fee_gwei(q) for q in [0.1, 0.5, 0.9, 1]]
+        base_fee_lines.append(f"BASEFEE p10/50/90: {p10:,.1f}/{p50:,.1f}/{p90:,.1f} gwei, max {max_gwei:,.1f}")
 
     return "\n".join(
         [
             header_line,
             "",
             f"Average BASEFEE: {avg_gwei:,.2f} gwei",
+            *base_fee_lines,
             f"Issuance: {metrics.issuance_eth:,.2f} ETH",
             f"Net Change: {'+' if metrics.net_issuance_eth > 0 else ''}{metrics.net_issuance_eth:,.2f} ETH",
             annualized_line,
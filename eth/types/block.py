@@ -1,9 +1,12 @@
-from dataclasses import dataclass
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field, replace
 from datetime import datetime, timedelta
 from decimal import Decimal
 from logging import getLogger
 from typing import Any, Dict, List, Optional
 
+from eth.types.sketch import FeeSketches
 from potpourri.python.ethereum.block import BaseBlock, Block, UncleBlock
 
 LOG = getLogger(__name__)
@@ -27,6 +30,12 @@ class AggregateBlockMetrics:
     uncle_issuance_eth: Decimal
     gas_used: Decimal
     gas_fees_paid: Decimal
+    # per-block BASEFEE and gas used ratio distribution, None when aggregated without the blocks (e.g. the index)
+    fee_sketches: Optional[FeeSketches] = field(default=None, kw_only=True, compare=False)
+    # tips to fee recipients, None unless every block in the range was pulled with its receipts
+    priority_fees_eth: Optional[Decimal] = field(default=None, kw_only=True)
+    # ETH supply after the last block, None unless the block index knows the supply
+    supply_eth: Optional[Decimal] = field(default=None, kw_only=True)
 
     @property
     def num_blocks(self) -> int:
@@ -40,14 +49,130 @@ class AggregateBlockMetrics:
     def net_issuance_eth(self) -> Decimal:
         return self.issuance_eth - self.burnt_eth
 
+    def merge(self, other: "AggregateBlockMetrics") -> "AggregateBlockMetrics":
+        """
+        Metrics of both block ranges together, keeping this one's period fields (e.g. its hour) and the
+        cumulative burn of whichever range ends later. Associative, so a period split across shards can be
+        aggregated separately and merged in any grouping.
+        """
+        later = other if other.end_number > self.end_number else self
+        return replace(
+            self,
+            burnt_eth=self.burnt_eth + other.burnt_eth,
+            start_number=min(self.start_number, other.start_number),
+            end_number=max(self.end_number, other.end_number),
+            cumulative_burned_eth=later.cumulative_burned_eth,
+            base_issuance_eth=self.base_issuance_eth + other.base_issuance_eth,
+            uncle_issuance_eth=self.uncle_issuance_eth + other.uncle_issuance_eth,
+            gas_used=self.gas_used + other.gas_used,
+            gas_fees_paid=self.gas_fees_paid + other.gas_fees_paid,
+            fee_sketches=(
+                self.fee_sketches.merge(other.fee_sketches)
+                if self.fee_sketches is not None and other.fee_sketches is not None
+                else None
+            ),
+            priority_fees_eth=(
+                self.priority_fees_eth + other.priority_fees_eth
+                if self.priority_fees_eth is not None and other.priority_fees_eth is not None
+                else None
+            ),
+            supply_eth=later.supply_eth,
+        )
+
+    def base_fee_gwei(self, q: float) -> Optional[Decimal]:
+        """
+        Per-block BASEFEE at quantile `q`, 1 being the max. None without fee sketches.
+        """
+        if self.fee_sketches is None or self.fee_sketches.base_fee.count == 0:
+            return None
+        return Decimal(self.fee_sketches.base_fee.quantile(q)) / Decimal(10**9)
+
+    def gas_used_ratio(self, q: float) -> Optional[Decimal]:
+        """
+        Per-block gas used / gas limit at quantile `q`, 1 being the max. None without fee sketches.
+        """
+        if self.fee_sketches is None or self.fee_sketches.gas_used_ratio.count == 0:
+            return None
+        return Decimal(self.fee_sketches.gas_used_ratio.quantile(q))
+
+    def offset(self, burned_eth: Decimal) -> "AggregateBlockMetrics":
+        """
+        Cumulative burn shifted by the ETH burned before the range these metrics were aggregated from.
+        """
+        return replace(self, cumulative_burned_eth=self.cumulative_burned_eth + burned_eth)
+
     def __str__(self) -> str:
         return str(vars(self))
 
 
 @dataclass
-class DayAggregateBlockMetrics(AggregateBlockMetrics):
+class PeriodAggregateBlockMetrics(AggregateBlockMetrics, ABC):
+    """
+    Metrics of a calendar period, from `period_start` up to, not including, `period_end`.
+    """
+
+    # False when some blocks of the period were not seen, e.g. a period under way when the processor started
+    complete: bool = field(default=True, kw_only=True)
+
+    @property
+    @abstractmethod
+    def period_start(self) -> datetime: ...
+
+    @property
+    @abstractmethod
+    def period_end(self) -> datetime: ...
+
+    @property
+    def period(self) -> timedelta:
+        return self.period_end - self.period_start
+
+    @property
+    @abstractmethod
+    def name(self) -> str:
+        """
+        Unique name of the period's report.
+        """
+
+    @property
+    @abstractmethod
+    def report_name(self) -> str: ...
+
+    @property
+    @abstractmethod
+    def time_phrase(self) -> str: ...
+
+    def time_range_str(self, delimiter="T") -> str:
+        return (
+            self.period_start.strftime(f"%Y-%m-%d{delimiter}%H:%M")
+            + "-"
+            + self.period_end.strftime(f"%Y-%m-%d{delimiter}%H:%M%Z")
+        )
+
+
+@dataclass
+class DayAggregateBlockMetrics(PeriodAggregateBlockMetrics):
     day: datetime
 
+    @property
+    def period_start(self) -> datetime:
+        return self.day
+
+    @property
+    def period_end(self) -> datetime:
+        return self.day + timedelta(days=1)
+
+    @property
+    def name(self) -> str:
+        return day_str(self.day)
+
+    @property
+    def report_name(self) -> str:
+        return "Daily"
+
+    @property
+    def time_phrase(self) -> str:
+        return "yesterday"
+
     def time_range_str(self, delimiter="T") -> str:
         return self.day_range_str(delimiter=delimiter)
 
@@ -60,6 +185,26 @@ class DayAggregateBlockMetrics(AggregateBlockMetrics):
 class HourlyAggregateBlockMetrics(DayAggregateBlockMetrics):
     hour: datetime
 
+    @property
+    def period_start(self) -> datetime:
+        return self.hour
+
+    @property
+    def period_end(self) -> datetime:
+        return self.hour + timedelta(hours=1)
+
+    @property
+    def name(self) -> str:
+        return hour_str(self.hour)
+
+    @property
+    def report_name(self) -> str:
+        return "Hourly"
+
+    @property
+    def time_phrase(self) -> str:
+        return "last hour"
+
     def hour_range_str(self, delimiter="T") -> str:
         next_hour = self.hour + timedelta(hours=1)
         return self.hour.strftime(f"%Y-%m-%d{delimiter}%H:%M") + "-" + next_hour.strftime("%H:%M%Z")
@@ -68,17 +213,122 @@ class HourlyAggregateBlockMetrics(DayAggregateBlockMetrics):
         return self.hour_range_str(delimiter=delimiter)
 
 
+@dataclass
+class WeeklyAggregateBlockMetrics(PeriodAggregateBlockMetrics):
+    # Monday 00:00
+    week: datetime
+
+    @property
+    def period_start(self) -> datetime:
+        return self.week
+
+    @property
+    def period_end(self) -> datetime:
+        return self.week + timedelta(days=7)
+
+    @property
+    def name(self) -> str:
+        return f"week_{day_str(self.week)}"
+
+    @property
+    def report_name(self) -> str:
+        return "Weekly"
+
+    @property
+    def time_phrase(self) -> str:
+        return "last week"
+
+    def time_range_str(self, delimiter="T") -> str:
+        return day_str(self.week) + " - " + day_str(self.period_end - timedelta(days=1))
+
+
+@dataclass
+class MonthlyAggregateBlockMetrics(PeriodAggregateBlockMetrics):
+    # first of the month 00:00
+    month: datetime
+
+    @property
+    def period_start(self) -> datetime:
+        return self.month
+
+    @property
+    def period_end(self) -> datetime:
+        return next_month(self.month)
+
+    @property
+    def name(self) -> str:
+        return f"month_{self.month.strftime('%Y-%m')}"
+
+    @property
+    def report_name(self) -> str:
+        return "Monthly"
+
+    @property
+    def time_phrase(self) -> str:
+        return "last month"
+
+    def time_range_str(self, delimiter="T") -> str:
+        return self.month.strftime("%B %Y")
+
+
+@dataclass
+class CadenceAggregateBlockMetrics(PeriodAggregateBlockMetrics):
+    """
+    Metrics of a custom report cadence, e.g. every 4 hours.
+    """
+
+    cadence: str
+    start: datetime
+    end: datetime
+
+    @property
+    def period_start(self) -> datetime:
+        return self.start
+
+    @property
+    def period_end(self) -> datetime:
+        return self.end
+
+    @property
+    def name(self) -> str:
+        return f"{self.cadence}_{hour_str(self.start)}"
+
+    @property
+    def report_name(self) -> str:
+        return self.cadence
+
+    @property
+    def time_phrase(self) -> str:
+        return f"in the last {self.cadence}"
+
+
+def next_month(month: datetime) -> datetime:
+    return month.replace(year=month.year + 1, month=1) if month.month == 12 else month.replace(month=month.month + 1)
+
+
 class SummaryBlock(BaseBlock):
     def __init__(self, data: Dict[str, Any]):
         super().__init__(data)
 
         self._uncle_count: int = int(data["__uncle_count"])
         self._uncle_reward: int = int(data["__uncle_reward"])
+        self._gas_limit: int = int(data["gasLimit"], 16)
+        self._pulled_at: Optional[float] = float(data["__pulled_at"]) if "__pulled_at" in data else None
+        # only pulled when the puller fetches receipts
+        self._priority_fees: Optional[int] = int(data["__priority_fees"]) if "__priority_fees" in data else None
 
     @property
     def uncle_count(self) -> int:
         return self._uncle_count
 
+    @property
+    def pulled_at(self) -> Optional[float]:
+        return self._pulled_at
+
+    @property
+    def gas_limit(self) -> int:
+        return self._gas_limit
+
     @property
     def uncle_reward(self) -> int:
         return self._uncle_reward
@@ -87,11 +337,38 @@ class SummaryBlock(BaseBlock):
     def uncle_reward_eth(self) -> Decimal:
         return Decimal(self._uncle_reward) / Decimal(10**18)
 
+    @property
+    def priority_fees(self) -> Optional[int]:
+        """
+        Tips paid to the block's fee recipient (wei), None if the block was pulled without receipts.
+        """
+        return self._priority_fees
+
+    @property
+    def priority_fees_eth(self) -> Optional[Decimal]:
+        return Decimal(self._priority_fees) / Decimal(10**18) if self._priority_fees is not None else None
+
+
+class PulledBlock(Block):
+    """
+    Block as pulled from the node, with the bytes the node sent for it when they could be told apart.
+    """
+
+    def __init__(self, data: Dict[str, Any], raw: Optional[bytes] = None):
+        super().__init__(data)
+        self.raw: Optional[bytes] = raw
+
 
 class DetailedBlock(BaseBlock):
-    def __init__(self, block: Block, uncles: Optional[List[UncleBlock]] = None):
+    def __init__(self, block: Block, uncles: Optional[List[UncleBlock]] = None, priority_fees: Optional[int] = None):
         super().__init__(block._data)
         self._uncles = uncles if uncles is not None else []
+        # keep the original pull time when re-writing a block that was already cached
+        self._pulled_at: float = float(block._data.get("__pulled_at", time.time()))
+        # reduced from the receipts at pull time, the receipts themselves are not kept
+        self._priority_fees: Optional[int] = priority_fees
+        # cached as is with the annotations spliced in, None for blocks read back from the cache
+        self._raw: Optional[bytes] = block.raw if isinstance(block, PulledBlock) else None
 
     @property
     def uncle_count(self) -> int:
@@ -102,11 +379,21 @@ class DetailedBlock(BaseBlock):
         return sum([u.uncle_reward for u in self._uncles])
 
     @property
-    def json(self) -> Dict[str, Any]:
+    def raw(self) -> Optional[bytes]:
+        return self._raw
+
+    @property
+    def annotations(self) -> Dict[str, str]:
+        """
+        What the bot adds to the node's block when caching it.
+        """
         return {
-            **self._data,
-            **{
-                "__uncle_count": str(self.uncle_count),
-                "__uncle_reward": str(self.uncle_reward),
-            },
+            "__uncle_count": str(self.uncle_count),
+            "__uncle_reward": str(self.uncle_reward),
+            "__pulled_at": str(self._pulled_at),
+            **({"__priority_fees": str(self._priority_fees)} if self._priority_fees is not None else {}),
         }
+
+    @property
+    def json(self) -> Dict[str, Any]:
+        return {**self._data, **self.annotations}
@@ -0,0 +1,124 @@
+import math
+from typing import Dict, Optional
+
+
+class QuantileSketch:
+    """
+    Streaming quantiles of positive values in bounded memory, in the manner of DDSketch.
+
+    Values are counted in logarithmic buckets, so any quantile is within `relative_accuracy` of an actual value.
+    Past `max_buckets` the lowest buckets are collapsed together, which only costs accuracy in the low tail.
+    Sketches with the same accuracy merge exactly, so hourly sketches add up to the daily one.
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01, max_buckets: int = 2048):
+        self._relative_accuracy = relative_accuracy
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self._max_buckets = max_buckets
+
+        self._buckets: Dict[int, int] = {}
+        self._zero_count: int = 0
+        self._count: int = 0
+        self._min: Optional[float] = None
+        self._max: Optional[float] = None
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    @property
+    def min(self) -> Optional[float]:
+        return self._min
+
+    @property
+    def max(self) -> Optional[float]:
+        return self._max
+
+    def add(self, value: float) -> None:
+        if value < 0:
+            raise ValueError(f"Negative value {value}")
+        if value == 0:
+            self._zero_count += 1
+        else:
+            key = math.ceil(math.log(value) / self._log_gamma)
+            self._buckets[key] = self._buckets.get(key, 0) + 1
+            if len(self._buckets) > self._max_buckets:
+                self._collapse()
+
+        self._count += 1
+        self._min = value if self._min is None else min(self._min, value)
+        self._max = value if self._max is None else max(self._max, value)
+
+    def merge(self, other: "QuantileSketch") -> "QuantileSketch":
+        """
+        New sketch of the values of both.
+        """
+        if other._gamma != self._gamma:
+            raise ValueError(
+                f"Cannot merge sketches of accuracy {self._relative_accuracy} and {other._relative_accuracy}"
+            )
+
+        merged = QuantileSketch(self._relative_accuracy, max(self._max_buckets, other._max_buckets))
+        merged._buckets = dict(self._buckets)
+        for key, count in other._buckets.items():
+            merged._buckets[key] = merged._buckets.get(key, 0) + count
+        merged._zero_count = self._zero_count + other._zero_count
+        merged._count = self._count + other._count
+        mins = [m for m in [self._min, other._min] if m is not None]
+        maxes = [m for m in [self._max, other._max] if m is not None]
+        merged._min = min(mins) if len(mins) > 0 else None
+        merged._max = max(maxes) if len(maxes) > 0 else None
+        while len(merged._buckets) > merged._max_buckets:
+            merged._collapse()
+        return merged
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Value at quantile `q` in [0, 1], None if the sketch is empty. 0 and 1 are the exact min and max.
+        """
+        if self._count == 0:
+            return None
+        if q <= 0:
+            return self._min
+        if q >= 1:
+            return self._max
+
+        rank = q * (self._count - 1)
+        seen = self._zero_count
+        if seen > rank:
+            return 0.0
+        for key in sorted(self._buckets):
+            seen += self._buckets[key]
+            if seen > rank:
+                # midpoint of the bucket (gamma^(key-1), gamma^key], kept within the values seen
+                value = 2 * self._gamma**key / (self._gamma + 1)
+                return min(max(value, self._min), self._max)
+        return self._max
+
+    def _collapse(self) -> None:
+        lowest, second = sorted(self._buckets)[:2]
+        self._buckets[second] += self._buckets.pop(lowest)
+
+    def __repr__(self) -> str:
+        return f"QuantileSketch(count={self._count}, buckets={len(self._buckets)})"
+
+
+class FeeSketches:
+    """
+    Per-block BASEFEE (wei) and gas used ratio sketches of a period.
+    """
+
+    def __init__(self, base_fee: Optional[QuantileSketch] = None, gas_used_ratio: Optional[QuantileSketch] = None):
+        self.base_fee: QuantileSketch = base_fee if base_fee is not None else QuantileSketch()
+        self.gas_used_ratio: QuantileSketch = gas_used_ratio if gas_used_ratio is not None else QuantileSketch()
+
+    def add(self, base_fee_per_gas: int, gas_used: int, gas_limit: int) -> None:
+        self.base_fee.add(base_fee_per_gas)
+        self.gas_used_ratio.add(gas_used / gas_limit if gas_limit > 0 else 0)
+
+    def merge(self, other: "FeeSketches") -> "FeeSketches":
+        return FeeSketches(self.base_fee.merge(other.base_fee), self.gas_used_ratio.merge(other.gas_used_ratio))
+
+    def __repr__(self) -> str:
+        return f"FeeSketches(blocks={self.base_fee.count})"
@@ -8,7 +8,7 @@ def root_dir() -> str:
 
 
 def data_dir() -> str:
-    return os.path.join(root_dir(), "data")
+    return os.getenv("ETHBURNBOT_DATA_DIR", os.path.join(root_dir(), "data"))
 
 
 def blocks_dir() -> str:
@@ -24,7 +24,7 @@ def uncle_block_filepath(num: int, uncle_index: int) -> str:
 
 
 def tweets_dir() -> str:
-    return os.path.join(data_dir(), "tweets")
+    return os.getenv("ETHBURNBOT_TWEETS_DIR", os.path.join(data_dir(), "tweets"))
 
 
 def pending_tweets_dir() -> str:
@@ -44,6 +44,64 @@ def pending_tweets_filepaths(ext: str = "") -> List[str]:
 
 
 def tweeted_tweets_dir() -> str:
-    result = os.path.join(tweets_dir(), "tweeted")
-    os.makedirs(result, exist_ok=True)
-    return result
+    return os.path.join(tweets_dir(), "tweeted")
+
+
+def outbox_filepath() -> str:
+    return os.path.join(tweets_dir(), "outbox.sqlite3")
+
+
+def outbox_wakeup_filepath(outbox_filepath: str) -> str:
+    return f"{outbox_filepath}.wakeup"
+
+
+def durable_block_filepath() -> str:
+    return os.path.join(blocks_dir(), ".durable_block")
+
+
+def available_blocks_filepath() -> str:
+    return os.path.join(blocks_dir(), ".available")
+
+
+def leases_dir() -> str:
+    return os.path.join(blocks_dir(), ".leases")
+
+
+def archive_dir() -> str:
+    return os.path.join(data_dir(), "archive")
+
+
+def archive_filepath(start: int, end: int) -> str:
+    return os.path.join(archive_dir(), f"{start}_{end}.blocks")
+
+
+def summaries_dir() -> str:
+    return os.path.join(data_dir(), "summaries")
+
+
+def summary_filepath(start: int, end: int) -> str:
+    return os.path.join(summaries_dir(), f"{start}_{end}.blocks")
+
+
+def repair_list_filepath() -> str:
+    return os.path.join(blocks_dir(), ".repair")
+
+
+def index_dir() -> str:
+    return os.path.join(data_dir(), "index")
+
+
+def block_index_filepath() -> str:
+    return os.path.join(index_dir(), "blocks.idx")
+
+
+def config_dir() -> str:
+    return os.path.join(root_dir(), "config")
+
+
+def cadences_filepath() -> str:
+    return os.path.join(config_dir(), "cadences.json")
+
+
+def supply_filepath() -> str:
+    return os.path.join(config_dir(), "supply.json")
@@ -0,0 +1,185 @@
+import cProfile
+import os
+import pstats
+import signal
+import time
+from datetime import datetime
+from logging import getLogger
+from threading import RLock, local
+from typing import Any, Dict, List, Optional, Tuple
+
+from eth.utils.file_utils import data_dir, root_dir
+
+LOG = getLogger(__name__)
+
+# library functions on our hot paths that are worth reporting next to our own code
+WATCHED_FUNCTIONS: List[str] = ["loads", "dumps", "svg2png", "post", "move", "makedirs"]
+
+# window profiled when a snapshot is requested by signal and no profile is running
+SIGNAL_PROFILE_SEC: int = 60
+
+
+def profiles_dir() -> str:
+    return os.path.join(data_dir(), "profiles")
+
+
+class _Snapshot:
+    """
+    Stats of a profile taken without disabling it, its thread may still be running it.
+    """
+
+    def __init__(self, profile: cProfile.Profile):
+        profile.snapshot_stats()
+        self.stats: Dict[Any, Any] = profile.stats
+
+    def create_stats(self) -> None:
+        pass
+
+
+class Profiler:
+    """
+    Deterministic profiler over a bounded number of blocks or seconds of a main loop.
+
+    Call tick() once per block. The report is written when the bound is hit, or on demand with snapshot().
+
+    cProfile only sees the thread that enabled it, so each thread doing the work calls attach(), or tick(), as it
+    goes. The first call after the profiler starts enables a profile of that thread, the first call after it stops
+    disables it. The report merges the profiles of every attached thread.
+    """
+
+    def __init__(self, name: str, max_blocks: Optional[int] = None, max_seconds: Optional[int] = None):
+        self._name = name
+        self._max_blocks = max_blocks
+        self._max_seconds = max_seconds
+
+        # re-entrant, the signal handler may interrupt the main thread holding it
+        self._lock = RLock()
+        self._running: bool = False
+        # bumped on every start and stop, so threads notice both at their next attach()
+        self._session: int = 0
+        self._profiles: List[cProfile.Profile] = []
+        self._thread = local()
+        self._blocks: int = 0
+        self._start_time: float = 0
+
+    @property
+    def running(self) -> bool:
+        return self._running
+
+    def start(self, max_seconds: Optional[int] = None) -> None:
+        with self._lock:
+            if self._running:
+                return
+            if max_seconds is not None:
+                self._max_seconds = max_seconds
+            LOG.info(f"Start profiling {self._name} blocks={self._max_blocks} seconds={self._max_seconds}")
+            self._blocks = 0
+            self._start_time = time.time()
+            self._profiles = []
+            self._session += 1
+            self._running = True
+
+    def attach(self) -> None:
+        """
+        Profile the calling thread while the profiler runs.
+        """
+        if getattr(self._thread, "session", 0) == self._session:
+            return
+        with self._lock:
+            profile: Optional[cProfile.Profile] = getattr(self._thread, "profile", None)
+            if profile is not None:
+                profile.disable()
+                profile = None
+            if self._running:
+                profile = cProfile.Profile()
+                self._profiles.append(profile)
+            self._thread.profile = profile
+            self._thread.session = self._session
+        if profile is not None:
+            profile.enable()
+
+    def tick(self) -> None:
+        self.attach()
+        with self._lock:
+            if not self._running:
+                return
+            self._blocks += 1
+            blocks_done = self._max_blocks is not None and self._blocks >= self._max_blocks
+            seconds_done = self._max_seconds is not None and time.time() - self._start_time >= self._max_seconds
+        if blocks_done or seconds_done:
+            self.stop()
+
+    def stop(self) -> Optional[str]:
+        with self._lock:
+            if not self._running:
+                return None
+            filepath = self._write_report()
+            # the threads disable their profiles at their next attach()
+            self._profiles = []
+            self._session += 1
+            self._running = False
+            return filepath
+
+    def snapshot(self) -> Optional[str]:
+        """
+        Write a report of everything profiled so far and keep profiling.
+        """
+        with self._lock:
+            if not self._running:
+                return None
+            return self._write_report()
+
+    def install_signal_handler(self, sig: int = signal.SIGUSR1) -> None:
+        """
+        On signal, snapshot the running profile, or start a new bounded one.
+        """
+
+        def handler(signum, frame):
+            if self.running:
+                self.snapshot()
+            else:
+                self.start(max_seconds=self._max_seconds or SIGNAL_PROFILE_SEC)
+
+        signal.signal(sig, handler)
+
+    def _write_report(self) -> Optional[str]:
+        if len(self._profiles) == 0:
+            LOG.warning(f"Nothing profiled in {self._name}, no thread attached")
+            return None
+
+        os.makedirs(profiles_dir(), exist_ok=True)
+        time_str = datetime.now().strftime("%Y-%m-%dT%H%M%S")
+        basepath = os.path.join(profiles_dir(), f"{self._name}_{time_str}")
+
+        stats = pstats.Stats(*[_Snapshot(profile) for profile in self._profiles])
+        stats.dump_stats(f"{basepath}.prof")
+
+        elapsed = time.time() - self._start_time
+        with open(f"{basepath}.txt", "w") as f:
+            f.write(f"{self._name}: {self._blocks} blocks in {elapsed:,.1f}s, {len(self._profiles)} threads\n\n")
+            f.write(format_grouped_stats(stats))
+
+        LOG.info(f"Write profile of {self._blocks} blocks in {elapsed:,.1f}s to {basepath}.txt")
+        return f"{basepath}.txt"
+
+
+def format_grouped_stats(stats: pstats.Stats, limit: int = 40) -> str:
+    """
+    Table of our own functions and watched library functions, by cumulative time.
+    """
+    repo = root_dir()
+    rows: Dict[str, Tuple[int, float, float]] = {}
+    for (filename, lineno, func), (_, ncalls, tottime, cumtime, _) in stats.stats.items():
+        if filename.startswith(repo):
+            key = f"{os.path.relpath(filename, repo)}:{func}"
+        elif func in WATCHED_FUNCTIONS:
+            key = f"{os.path.basename(os.path.dirname(filename))}/{os.path.basename(filename)}:{func}"
+        else:
+            continue
+        prev_calls, prev_tottime, prev_cumtime = rows.get(key, (0, 0.0, 0.0))
+        rows[key] = (prev_calls + ncalls, prev_tottime + tottime, prev_cumtime + cumtime)
+
+    lines = [f"{'ncalls':>10} {'tottime':>10} {'cumtime':>10}  function"]
+    for key, (ncalls, tottime, cumtime) in sorted(rows.items(), key=lambda kv: kv[1][2], reverse=True)[:limit]:
+        lines.append(f"{ncalls:>10} {tottime:>10.3f} {cumtime:>10.3f}  {key}")
+    return "\n".join(lines) + "\n"